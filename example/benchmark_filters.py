@@ -0,0 +1,41 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Benchmark the temporal filters of senxor.utils across filter depths
+# and FPA sizes. No camera is required; frames are synthetic.
+#
+import sys
+import timeit
+import numpy as np
+
+try:
+    from senxor.mi48 import FPA_SHAPE
+    from senxor.utils import TrueAverageFilter, EMAFilter, TemporalMedianFilter
+except ImportError:
+    print("Please ensure the 'senxor' library is correctly installed.")
+    sys.exit(1)
+
+N_CALLS = 200
+DEPTHS = [4, 16, 64]
+SENSORS = ['lynx', 'cougar', 'panther']
+
+def bench(filt, frames):
+    """Return the average cost [ms] of one filter update"""
+    it = iter(range(N_CALLS))
+    cost = timeit.timeit(lambda: filt(frames[next(it) % len(frames)]),
+                         number=N_CALLS)
+    return cost / N_CALLS * 1.e3
+
+rng = np.random.default_rng(0)
+print('{:8s} {:>10s} {:>6s} {:>14s} {:>10s} {:>10s}'.format(
+      'sensor', 'shape', 'depth', 'TrueAverage', 'EMA', 'Median'))
+for sensor in SENSORS:
+    ncols, nrows = FPA_SHAPE[sensor]
+    frames = rng.normal(30., 0.5, size=(16, nrows, ncols)).astype(np.float16)
+    for depth in DEPTHS:
+        costs = [
+            bench(TrueAverageFilter(depth), frames),
+            bench(EMAFilter(alpha=1./depth), frames),
+            bench(TemporalMedianFilter(depth), frames),
+        ]
+        print('{:8s} {:>10s} {:6d} {:11.3f} ms {:7.3f} ms {:7.3f} ms'.format(
+              sensor, '{}x{}'.format(ncols, nrows), depth, *costs))
@@ -3,6 +3,7 @@
 import sys
 import os
 import signal
+import threading
 import logging
 import numpy as np
 import cv2 as cv
@@ -10,8 +11,12 @@ import socket
 
 try:
     from senxor.mi48 import MI48
-    from senxor.utils import data_to_frame, remap, cv_filter,\
-                             RollingAverageFilter, connect_senxor
+    from senxor.utils import data_to_frame, remap, FilterPipeline,\
+                             RollingAverageFilter, FrameRenderer, Display,\
+                             connect_senxor
+    from senxor.roi import ROISet
+    from senxor.overlay import Overlay
+    from senxor.stream import FrameSender
 except ImportError:
     print("Please ensure the 'senxor' library is correctly installed.")
     sys.exit(1)
@@ -20,10 +25,17 @@ except ImportError:
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=os.environ.get("LOGLEVEL", "DEBUG"))
 
-# Define signal handler for clean exit
+# Define signal handler for clean exit; it may run before the sensor
+# and the display are set up
+mi48 = None
+display = None
+
 def signal_handler(sig, frame):
     logger.info("Exiting due to SIGINT or SIGTERM")
-    mi48.stop()
+    if mi48 is not None:
+        mi48.stop()
+    if display is not None:
+        display.stop()
     cv.destroyAllWindows()
     logger.info("Done.")
     sys.exit(0)
@@ -72,9 +84,38 @@ GUI = True
 par = {'blur_ks': 3, 'd': 5, 'sigmaColor': 27, 'sigmaSpace': 27}
 dminav = RollingAverageFilter(N=10)
 dmaxav = RollingAverageFilter(N=10)
+spatial_filter = FilterPipeline.from_cv_filter(par, use_median=True,
+                                               use_bilat=True, use_nlm=False)
+render = FrameRenderer((900, 600), colormap='jet', interpolation=cv.INTER_LINEAR)
 
 # Region definitions
 GRID_ROWS, GRID_COLS = 3, 3
+FRAME_SHAPE = (62, 80)
+region_height = FRAME_SHAPE[0] // GRID_ROWS
+region_width = FRAME_SHAPE[1] // GRID_COLS
+rois = ROISet(FRAME_SHAPE)
+rois.add_slice('Front', slice(None, region_height), slice(None, region_width))    # Top-left
+rois.add_slice('Back', slice(None, region_height), slice(-region_width, None))    # Top-right
+rois.add_slice('Left', slice(-region_height, None), slice(None, region_width))    # Bottom-left
+rois.add_slice('Right', slice(-region_height, None), slice(-region_width, None))  # Bottom-right
+rois.add_slice('Center', slice(region_height, -region_height),
+               slice(region_width, -region_width))
+
+# Display overlay: grid lines are drawn once, labels when their text changes
+overlay = Overlay((900, 600))
+overlay.add_grid(GRID_ROWS, GRID_COLS)
+overlay.add_text('Front', (50, 50))
+overlay.add_text('Back', (650, 50))
+overlay.add_text('Left', (50, 550))
+overlay.add_text('Right', (650, 550))
+overlay.add_text('Avg', (350, 300))
+
+# The display shows the latest frame handed over at DISPLAY_FPS
+DISPLAY_FPS = 10
+display = Display({'window_coord': None, 'window_title': 'Thermal Camera Output',
+                   'display_fps': DISPLAY_FPS})
+if GUI:
+    display.start()
 
 # Socket setup for sending frames to the client
 server_ip = '172.28.42.196'  # Listening on all available interfaces
@@ -86,71 +127,78 @@ logger.info(f"Server listening on {server_ip}:{server_port}...")
 
 client_socket, client_address = server_socket.accept()  # Wait for a client to connect
 logger.info(f"Client connected from {client_address}")
-
-
-while True:
-    data, header = mi48.read()
-    if data is None:
-        logger.critical('NONE data received instead of GFRA')
-        mi48.stop()
-        sys.exit(1)
-
-    # Process frame data
-    min_temp = dminav(data.min())
-    max_temp = dmaxav(data.max())
-    frame = data_to_frame(data, (80, 62), hflip=False)
-    frame = np.clip(frame, min_temp, max_temp)
-    filt_uint8 = cv_filter(remap(frame), par, use_median=True, use_bilat=True, use_nlm=False)
-
-    # Calculate region-wise temperatures
-    region_height, region_width = frame.shape[0] // GRID_ROWS, frame.shape[1] // GRID_COLS
-    regions = [
-        frame[:region_height, :region_width].mean(),        # Top-left (Front)
-        frame[:region_height, -region_width:].mean(),       # Top-right (Back)
-        frame[-region_height:, :region_width].mean(),       # Bottom-left (Left)
-        frame[-region_height:, -region_width:].mean(),      # Bottom-right (Right)
-        frame[region_height:-region_height, region_width:-region_width].mean(),  # Center
-    ]
-    avg_temp = np.mean(regions)
-
-    # Print measured temperatures to the console
-    print(f"Front: {regions[0]:.1f}°C, Back: {regions[1]:.1f}°C, "
-          f"Left: {regions[2]:.1f}°C, Right: {regions[3]:.1f}°C, "
-          f"Average: {avg_temp:.1f}°C")
-
-    # Create display frame
-    display_frame = cv.applyColorMap(filt_uint8, cv.COLORMAP_JET)
-    enlarged_frame = cv.resize(display_frame, (900, 600), interpolation=cv.INTER_LINEAR)
-
-    # Draw grid lines
-    for i in range(1, GRID_ROWS):
-        cv.line(enlarged_frame, (0, i * 200), (900, i * 200), (255, 255, 255), 1)
-    for j in range(1, GRID_COLS):
-        cv.line(enlarged_frame, (j * 300, 0), (j * 300, 600), (255, 255, 255), 1)
-
-    # Overlay temperature values with text boxes
-    positions = [
-        (50, 50, f"Front: {regions[0]:.1f}°C"),
-        (650, 50, f"Back: {regions[1]:.1f}°C"),
-        (50, 550, f"Left: {regions[2]:.1f}°C"),
-        (650, 550, f"Right: {regions[3]:.1f}°C"),
-        (350, 300, f"Avg: {avg_temp:.1f}°C"),
-    ]
-
-    for x, y, text in positions:
-        (text_width, text_height), _ = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 1, 2)
-        text_box_top_left = (x - 10, y - text_height - 10)
-        text_box_bottom_right = (x + text_width + 10, y + 10)
-        cv.rectangle(enlarged_frame, text_box_top_left, text_box_bottom_right, (0, 0, 0), -1)
-        cv.putText(enlarged_frame, text, (x, y), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-
-    # Render the frame
-    if GUI:
-        # cv_render(filt_uint8, resize=(400,310), colormap='rainbow2')
-        cv.imshow("Thermal Camera Output", enlarged_frame)
-        if cv.waitKey(1) == ord("q"):
+# JPEG cuts the 1.6 MB of a 900x600 BGR frame tenfold or more, so that
+# sending it holds up acquisition much less, also for a slow client
+sender = FrameSender(client_socket, encoding='jpeg',
+                     params=[cv.IMWRITE_JPEG_QUALITY, 90])
+
+
+def process_frames():
+    """Acquire and process frames until `done` is set; runs on a thread"""
+    global sender
+    while not done.is_set():
+        data, header = mi48.read()
+        if data is None:
+            logger.critical('NONE data received instead of GFRA')
             break
 
+        # Process frame data
+        min_temp = dminav(data.min())
+        max_temp = dmaxav(data.max())
+        frame = data_to_frame(data, (80, 62), hflip=False)
+        frame = np.clip(frame, min_temp, max_temp)
+        filt_uint8 = spatial_filter(remap(frame))
+
+        # Calculate region-wise temperatures
+        regions = rois(frame)['mean']
+        avg_temp = np.mean(regions)
+
+        # Print measured temperatures to the console
+        print(f"Front: {regions[0]:.1f}°C, Back: {regions[1]:.1f}°C, "
+              f"Left: {regions[2]:.1f}°C, Right: {regions[3]:.1f}°C, "
+              f"Average: {avg_temp:.1f}°C")
+
+        # Create display frame
+        enlarged_frame = render(filt_uint8)
+
+        # Overlay grid lines and temperature values with text boxes
+        overlay.set_text('Front', f"Front: {regions[0]:.1f}°C")
+        overlay.set_text('Back', f"Back: {regions[1]:.1f}°C")
+        overlay.set_text('Left', f"Left: {regions[2]:.1f}°C")
+        overlay.set_text('Right', f"Right: {regions[3]:.1f}°C")
+        overlay.set_text('Avg', f"Avg: {avg_temp:.1f}°C")
+        overlay(enlarged_frame)
+
+        # Stream the frame to the client, until it disconnects
+        if sender is not None:
+            try:
+                sender.send(enlarged_frame, seq=header['frame_counter'])
+            except (BrokenPipeError, ConnectionError) as e:
+                logger.warning(f"Client disconnected: {e}")
+                sender = None
+
+        # Hand the frame over to the display, which never blocks
+        if GUI:
+            display([enlarged_frame])
+    done.set()
+
+# Acquisition and processing run on a thread, so that they never wait on
+# the GUI; HighGUI calls stay on the main thread, in display.update
+done = threading.Event()
+worker = threading.Thread(target=process_frames, name='Acquisition',
+                          daemon=True)
+worker.start()
+while not done.is_set():
+    if not GUI:
+        done.wait(0.1)
+    elif display.update() == ord("q"):
+        done.set()
+worker.join()
+
 # Stop capture and clean up
 mi48.stop()
+display.stop()
+client_socket.close()
+server_socket.close()
+logger.info(f"Display statistics: {display.stats()}")
 cv.destroyAllWindows()
@@ -1,17 +1,13 @@
 import sys
 import cv2
 import socket
-import pickle
-import struct
 from PyQt5.QtWidgets import QApplication, QDialog
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.uic import loadUi
 from PyQt5.QtCore import QTimer
 
-import socket
-import pickle
-import struct
 from threading import Thread
+from senxor.stream import FrameReceiver
 
 class VideoApp(QDialog):
     def __init__(self):
@@ -46,27 +42,15 @@ class VideoApp(QDialog):
             self.display_frame(frame_live, self.Live)
 
     def receive_thermal_frames(self):
-        data = b""
-        payload_size = struct.calcsize(">L")
+        receiver = FrameReceiver(self.thermal_socket)
 
         while True:
-            # Receive frame size
-            while len(data) < payload_size:
-                data += self.thermal_socket.recv(4096)
-
-            packed_size = data[:payload_size]
-            data = data[payload_size:]
-            frame_size = struct.unpack(">L", packed_size)[0]
-
-            # Receive frame data
-            while len(data) < frame_size:
-                data += self.thermal_socket.recv(4096)
-
-            frame_data = data[:frame_size]
-            data = data[frame_size:]
+            # Receive the next frame, straight into the receiver's buffer
+            message = receiver.recv()
+            if message is None:
+                break  # server closed the connection
 
-            # Deserialize the frame
-            frame = pickle.loads(frame_data)
+            header, frame = message
             self.display_frame(frame, self.the)
 
     def display_frame(self, frame, label):
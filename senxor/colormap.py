@@ -0,0 +1,115 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Registry of colormaps as precompiled uint8 lookup tables.
+#
+# All supported colormaps -- OpenCV's, those defined in senxor.utils and
+# Matplotlib's -- ship as 256-entry BGR LUTs in senxor/colormaps.npz,
+# loaded on first use. Derived LUTs, quantised to a number of colours
+# or reversed, are computed once and cached, so rendering never rebuilds
+# a colormap, and Matplotlib is imported only to build the bundle.
+#
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+
+COLORMAP_FILE = Path(__file__).parent / 'colormaps.npz'
+
+NMAX = 256
+
+
+def build_colormap_bundle(path=None):
+    """
+    Write the LUTs of all supported colormaps to `path`, as an .npz file.
+
+    Requires OpenCV and Matplotlib. Where a name is defined both by OpenCV
+    (or senxor.utils) and by Matplotlib, the former wins, as it always did
+    in `senxor.utils.get_colormap`. Reversed Matplotlib maps, named
+    `<name>_r`, are not stored, since `get_lut` derives them.
+    """
+    import cv2 as cv
+    import matplotlib
+    from senxor.utils import colormaps
+    path = COLORMAP_FILE if path is None else path
+    luts = {}
+    for name in matplotlib.colormaps:
+        if not name.endswith('_r'):
+            luts[name] = _mpl_lut(name)
+    ramp = np.arange(NMAX, dtype=np.uint8).reshape(NMAX, 1)
+    for name, cmap in colormaps.items():
+        if isinstance(cmap, int):
+            luts[name] = cv.applyColorMap(ramp, cmap)
+        else:
+            luts[name] = cmap
+    luts = {name: np.asarray(lut, dtype=np.uint8).reshape(NMAX, 1, 3)
+            for name, lut in luts.items()}
+    np.savez_compressed(path, **luts)
+
+def _mpl_lut(name):
+    """Return the BGR LUT of Matplotlib colormap `name`, as cmapy.cmap does"""
+    import matplotlib
+    import matplotlib.cm
+    cmap = matplotlib.colormaps[name].resampled(NMAX)
+    rgba = matplotlib.cm.ScalarMappable(cmap=cmap).to_rgba(
+        np.arange(0, 1.0, 1.0 / NMAX), bytes=True)
+    return np.ascontiguousarray(rgba[:, 2::-1]).reshape(NMAX, 1, 3)
+
+@lru_cache(maxsize=None)
+def _load_bundle(path):
+    with np.load(path) as bundle:
+        luts = {name: bundle[name] for name in bundle.files}
+    for lut in luts.values():
+        lut.setflags(write=False)
+    return luts
+
+def colormap_names(path=None):
+    """Return the sorted names of the colormaps in the bundle"""
+    path = COLORMAP_FILE if path is None else path
+    return sorted(_load_bundle(str(path)))
+
+def quantise_lut(lut, n_colors):
+    """
+    Return a 256-entry LUT with `n_colors` different colours of `lut`.
+
+    The colours are equally spaced in `lut`, each spanning 256 // n_colors
+    entries; any remaining entries take the last colour.
+    """
+    if n_colors < 2:
+        raise ValueError(f'Quantised colormap needs at least 2 colours: {n_colors}')
+    # number of indexes per color
+    ipc = NMAX // n_colors
+    delta = NMAX % n_colors
+    index = np.full(NMAX, NMAX - 1)
+    j = np.arange(NMAX - delta)
+    index[:NMAX - delta] = (j // ipc) / (n_colors - 1) * (NMAX - 1)
+    return lut[index]
+
+@lru_cache(maxsize=None)
+def get_lut(name='rainbow2', n_colors=None, reverse=False, path=None,
+            use_matplotlib=False):
+    """
+    Return the read-only (256, 1, 3) uint8 BGR LUT of colormap `name`.
+
+    A trailing `_r` in `name`, or `reverse`, reverses the colormap;
+    `n_colors` quantises it. Results are cached by these arguments, and
+    are suitable for `cv.applyColorMap` or as a lookup table for `np.take`.
+
+    Raise KeyError if `name` is not in the bundle, unless `use_matplotlib`
+    is true; then the name is looked up in Matplotlib, which is imported.
+    Acquisition processes should leave it false.
+    """
+    luts = _load_bundle(str(COLORMAP_FILE if path is None else path))
+    if name not in luts and name.endswith('_r'):
+        name, reverse = name[:-2], not reverse
+    try:
+        lut = luts[name]
+    except KeyError:
+        if not use_matplotlib:
+            raise KeyError(f'Unknown colormap: {name}') from None
+        lut = _mpl_lut(name)
+    if reverse:
+        lut = lut[::-1]
+    if n_colors is not None:
+        lut = quantise_lut(lut, n_colors)
+    lut = np.ascontiguousarray(lut)
+    lut.setflags(write=False)
+    return lut
@@ -0,0 +1,219 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Host-side corrections of temperature frames.
+#
+# The distance correction compensates the drop of apparent temperature with
+# the distance of the target from the camera, by the factors tabulated in
+# senxor/distance_correction.dat. The table is parsed once; factors for a
+# frame, a set of ROIs or every pixel are interpolated from it in one
+# vectorised call. For a fixed set-up, the per-pixel factors are computed
+# once into a map, so that the per-frame correction is one in-place multiply.
+#
+# The emissivity correction refines the single emissivity of the camera
+# by a per-pixel or per-ROI emissivity map on the host, folded into the
+# conversion of raw frames to temperature.
+#
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from senxor.mi48 import KELVIN_0
+
+DISTANCE_CORRECTION_FILE = Path(__file__).parent / 'distance_correction.dat'
+
+# columns of the distance correction table
+_columns = {'distance': 0, 'raw': 1, 'clean': 2}
+
+
+@lru_cache(maxsize=None)
+def _read_distance_table(path):
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            values = [float(x) for x in line.split()]
+            if len(values) > len(_columns):
+                raise ValueError(f'Too many columns in {path}: {line}')
+            values += [np.nan] * (len(_columns) - len(values))
+            rows.append(values)
+    table = np.array(rows, dtype=np.float64).reshape(-1, len(_columns))
+    table = table[np.argsort(table[:, 0], kind='stable')]
+    # fill in missing factors by interpolation over their neighbours
+    distance = table[:, 0]
+    for col in table[:, 1:].T:
+        missing = np.isnan(col)
+        if missing.all():
+            raise ValueError(f'No correction factors in {path}')
+        if missing.any():
+            col[missing] = np.interp(distance[missing], distance[~missing],
+                                     col[~missing])
+    table.setflags(write=False)
+    return table
+
+def load_distance_correction(path=None, column='clean'):
+    """
+    Return the (distance, factor) arrays of the distance correction table.
+
+    Distance is in cm. `column` selects the 'raw' or the 'clean' (smoothed)
+    correction factors. Missing factors are interpolated from neighbouring
+    rows. The file is parsed only once; the returned arrays are read-only.
+    """
+    if column not in ('raw', 'clean'):
+        raise ValueError(f'Correction column must be raw or clean: {column}')
+    path = DISTANCE_CORRECTION_FILE if path is None else path
+    table = _read_distance_table(str(path))
+    return table[:, 0], table[:, _columns[column]]
+
+def distance_factor(distance, path=None, column='clean'):
+    """
+    Return the correction factor at `distance` in cm.
+
+    `distance` may be a scalar, e.g. the camera-to-bed distance, an array
+    of per-ROI distances, or a per-pixel distance map; the result has the
+    same shape. Factors are interpolated linearly in the table, and held
+    constant beyond its ends.
+    """
+    dist, factor = load_distance_correction(path, column)
+    return np.interp(distance, dist, factor)
+
+
+class DistanceCorrection:
+    """
+    Correct temperature frames for the distance of the target.
+
+    `distance` is a scalar, or a per-pixel map in cm, e.g. of the
+    camera-to-bed distance across a fixture. The factors are interpolated
+    once into a factor map; correcting a frame is then one multiply,
+    in place by default.
+
+    Usage:
+
+        correct = DistanceCorrection(distance_map)
+        ...
+        data, header = mi48.read()
+        frame = correct(data_to_frame(data, mi48.fpa_shape))
+    """
+    def __init__(self, distance, path=None, column='clean', dtype=np.float32):
+        self.path = path
+        self.column = column
+        self.dtype = dtype
+        self.set_distance(distance)
+
+    def set_distance(self, distance):
+        """Set a new scalar or per-pixel `distance`; recompute the factor map"""
+        factor = distance_factor(distance, self.path, self.column)
+        self.factor = np.asarray(factor, dtype=self.dtype)
+        self.distance = distance
+
+    def __call__(self, frame, out=None):
+        """
+        Return `frame` multiplied by the correction factors.
+
+        If `out` is None the frame is corrected in place, which requires a
+        floating point frame, e.g. from `MI48.read`.
+        """
+        if out is None:
+            out = frame
+        return np.multiply(frame, self.factor, out=out)
+
+    def correct_rois(self, values, distances):
+        """
+        Return per-ROI `values`, e.g. ROI means, corrected by the factors at
+        per-ROI `distances`.
+        """
+        return np.asarray(values) * distance_factor(distances, self.path,
+                                                    self.column)
+
+
+class EmissivityCorrection:
+    """
+    Convert raw MI48 frames to temperature with a per-pixel emissivity.
+
+    `MI48.set_emissivity` applies one emissivity, `reference`, to the whole
+    frame. Here, pixels of emissivity e are corrected in the grey-body
+    approximation, neglecting reflected radiation:
+
+        T = T_measured * (reference / e) ** (1/4),   in Kelvin
+
+    The correction is folded, with the conversion from deci-Kelvin, into a
+    cached scale map, so that converting a raw frame costs the same as the
+    uncorrected `data / 10. + KELVIN_0`. An optional multiplicative
+    `factor` in Celsius, e.g. `DistanceCorrection.factor`, is folded in too.
+
+    Changes of the emissivity map are prepared aside and take effect from
+    the next frame, so they may be made from another thread.
+
+    Set as the converter of an MI48, the correction replaces the default
+    conversion within `MI48.read`. Flat frames, as read from the MI48, are
+    taken in the row-major order of the (rows, cols) FPA, i.e. that of
+    `data_to_frame` without flips.
+
+    Usage:
+
+        rois = ROISet((62, 80))
+        rois.add_rect('plate', 0, 0, 80, 62)
+        rois.add_polygon('part_1', [(10, 10), (30, 12), (20, 40)])
+        to_celsius = EmissivityCorrection((62, 80), reference=0.95)
+        to_celsius.set_emissivity(rois.value_map([0.3, 0.9], default=0.95))
+        mi48.set_converter(to_celsius)
+        ...
+        data, header = mi48.read()
+        frame = data_to_frame(data, mi48.fpa_shape)
+    """
+    def __init__(self, shape, emissivity=1., reference=1., factor=None,
+                 dtype=np.float32):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.reference = reference
+        self.emissivity = None
+        self.factor = factor
+        self.out = None
+        self.set_emissivity(emissivity)
+
+    def _maps(self, emissivity, factor):
+        """Return the scale and offset maps of raw data to corrected Celsius"""
+        emissivity = np.asarray(emissivity, dtype=np.float64)
+        if np.any(emissivity <= 0) or np.any(emissivity > 1):
+            raise ValueError('Emissivity must be within (0, 1]')
+        scale = np.broadcast_to(0.1 * (self.reference / emissivity) ** 0.25,
+                                self.shape)
+        offset = KELVIN_0
+        if factor is not None:
+            scale = scale * factor
+            offset = KELVIN_0 * np.broadcast_to(factor, self.shape)
+            offset = np.ascontiguousarray(offset, dtype=self.dtype)
+        return np.ascontiguousarray(scale, dtype=self.dtype), offset
+
+    def set_emissivity(self, emissivity):
+        """Set a scalar or per-pixel `emissivity` for the following frames"""
+        maps = self._maps(emissivity, self.factor)
+        # single assignment, so a frame sees either the old or the new maps
+        self.maps = maps
+        self.emissivity = emissivity
+
+    def set_factor(self, factor):
+        """Set the multiplicative correction `factor` for the following frames"""
+        maps = self._maps(self.emissivity, factor)
+        self.maps = maps
+        self.factor = factor
+
+    def __call__(self, data, out=None):
+        """
+        Return the corrected temperature in Celsius of the raw (rows, cols)
+        frame `data`, or of the flat frame `data` as read from the MI48.
+
+        If `out` is None, the result is written into an internal buffer that
+        is overwritten on the next call.
+        """
+        if data.ndim == 1:
+            out = None if out is None else out.reshape(self.shape)
+            return self(data.reshape(self.shape), out).reshape(data.shape)
+        scale, offset = self.maps
+        if out is None:
+            if self.out is None or self.out.shape != data.shape:
+                self.out = np.empty(data.shape, dtype=self.dtype)
+            out = self.out
+        np.multiply(data, scale, out=out)
+        out += offset
+        return out
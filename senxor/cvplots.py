@@ -0,0 +1,519 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2019 - 2022. All rights reserved.
+#
+# Live plots drawn directly with OpenCV.
+#
+# Drop-in alternatives to Histogram, LinePlot and LivePlot2Y of
+# senxor.plots, with the same constructor parameters and the same
+# update()/get_image() API, but without Matplotlib. The axes, ticks,
+# labels and legends are drawn once into a cached background; each
+# get_image() copies the background into a reused BGR buffer and
+# rasterises only the bars or data points.
+#
+import math
+import numpy as np
+import cv2 as cv
+from senxor.utils import FrameHistogram
+from senxor.timeseries import TimeSeries
+
+FONT = cv.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.4
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRID_COLOR = (222, 222, 222)
+
+# Matplotlib's default colour cycle, in BGR
+COLOR_CYCLE = [(180, 119, 31), (14, 127, 255), (44, 160, 44), (40, 39, 214),
+               (189, 103, 148), (75, 86, 140), (194, 119, 227),
+               (127, 127, 127), (34, 189, 188), (207, 190, 23)]
+
+_named_colors = {
+    'black': (0, 0, 0), 'white': (255, 255, 255), 'red': (0, 0, 255),
+    'green': (0, 128, 0), 'lime': (0, 255, 0), 'blue': (255, 0, 0),
+    'yellow': (0, 255, 255), 'cyan': (255, 255, 0), 'magenta': (255, 0, 255),
+    'orange': (0, 165, 255), 'grey': (128, 128, 128), 'gray': (128, 128, 128),
+    'k': (0, 0, 0), 'w': (255, 255, 255), 'r': (0, 0, 255), 'g': (0, 128, 0),
+    'b': (255, 0, 0), 'y': (0, 191, 191), 'c': (191, 191, 0), 'm': (191, 0, 191),
+}
+
+
+def to_bgr(color):
+    """
+    Return the BGR tuple of `color`: a BGR tuple, a basic colour name,
+    a '#rrggbb' string, or 'C0'...'C9' of the default colour cycle.
+    """
+    if not isinstance(color, str):
+        return tuple(int(c) for c in color)
+    if color in _named_colors:
+        return _named_colors[color]
+    if color.startswith('#') and len(color) == 7:
+        r, g, b = (int(color[i: i+2], 16) for i in (1, 3, 5))
+        return (b, g, r)
+    if len(color) == 2 and color[0] == 'C' and color[1].isdigit():
+        return COLOR_CYCLE[int(color[1])]
+    raise ValueError(f'Unknown colour: {color}')
+
+def blend(color, alpha, background=WHITE):
+    """Return `color` with opacity `alpha` over `background`"""
+    return tuple(int(round(alpha * c + (1 - alpha) * b))
+                 for c, b in zip(to_bgr(color), background))
+
+def nice_ticks(lo, hi, n=5):
+    """Return about `n` round tick values within [`lo`, `hi`]"""
+    if hi <= lo:
+        return np.array([lo])
+    step = (hi - lo) / n
+    mag = 10 ** math.floor(math.log10(step))
+    for m in (1, 2, 2.5, 5, 10):
+        if step <= m * mag:
+            step = m * mag
+            break
+    return np.arange(math.ceil(lo / step) * step, hi + step * 1e-6, step)
+
+def _limits(values, margin=0.05):
+    """Return the limits of finite `values`, extended by `margin`"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return (0., 1.)
+    lo, hi = values.min(), values.max()
+    pad = (hi - lo) * margin if hi > lo else max(abs(lo) * margin, 0.5)
+    return (lo - pad, hi + pad)
+
+def _fixed(fixed, values):
+    """Return the axis limits `fixed` if given, else the limits of `values`"""
+    if fixed is not None:
+        return tuple(fixed)
+    return _limits(values)
+
+def _follow(current, fixed, values):
+    """
+    Return the axis limits for `values`: `fixed` if given, else `current`
+    if it holds the values, else new limits with room to spare.
+    """
+    if fixed is not None:
+        return tuple(fixed)
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values) or (values.min() >= current[0] and
+                           values.max() <= current[1]):
+        return current
+    return _limits(values, margin=0.1)
+
+def _tick_label(value):
+    return '{:g}'.format(round(float(value), 6))
+
+def _figsize_pixels(figsize, param):
+    """Return the figure size in pixels; `figsize` is in inches if height <= 20"""
+    if figsize[1] > 20:
+        return int(figsize[0]), int(figsize[1])
+    try:
+        dpi = param.get('dpi', 100)
+    except AttributeError:
+        # param is None
+        dpi = 100
+    return int(figsize[0] * dpi), int(figsize[1] * dpi)
+
+
+class Axes:
+    """
+    Axes of a plot in an image of `size` (width, height) pixels.
+
+    The background -- frame, grid, ticks, tick and axis labels -- is drawn
+    by `draw_background`; `to_pixels` transforms data to pixel coordinates.
+    A second Y axis on the right is added by `set_y2`.
+    """
+    def __init__(self, size, xlim, ylim, xlabel=None, ylabel=None,
+                 xticks=None, yticks=None, grid=True):
+        self.size = tuple(size)
+        self.xlim, self.ylim = tuple(xlim), tuple(ylim)
+        self.xlabel, self.ylabel = xlabel, ylabel
+        self.xticks = nice_ticks(*xlim) if xticks is None else np.asarray(xticks)
+        self.yticks = nice_ticks(*ylim) if yticks is None else np.asarray(yticks)
+        self.grid = grid
+        self.y2lim = None
+        self.y2label = None
+        self.y2ticks = None
+        self._layout()
+
+    def set_y2(self, ylim, ylabel=None, yticks=None):
+        self.y2lim = tuple(ylim)
+        self.y2label = ylabel
+        self.y2ticks = nice_ticks(*ylim) if yticks is None else np.asarray(yticks)
+        self._layout()
+
+    def _layout(self):
+        """Compute the plot area (x0, y0, x1, y1), leaving room for labels"""
+        width, height = self.size
+        (_, th), _ = cv.getTextSize('0', FONT, FONT_SCALE, 1)
+        tick_width = max(cv.getTextSize(_tick_label(t), FONT, FONT_SCALE, 1)[0][0]
+                         for t in self.yticks)
+        left = tick_width + 12 + (th + 8 if self.ylabel else 0)
+        right = 10
+        if self.y2lim is not None:
+            tick_width = max(cv.getTextSize(_tick_label(t), FONT, FONT_SCALE, 1)[0][0]
+                             for t in self.y2ticks)
+            right = tick_width + 12 + (th + 8 if self.y2label else 0)
+        bottom = th + 14 + (th + 8 if self.xlabel else 0)
+        self.area = (left, 8, width - right, height - bottom)
+        self.text_height = th
+
+    def to_pixels(self, x, y, y2=False):
+        """
+        Return the (n, 2) int32 pixel coordinates of data points `x`, `y`;
+        points with a non-finite coordinate are left out.
+        """
+        x0, y0, x1, y1 = self.area
+        xlo, xhi = self.xlim
+        ylo, yhi = self.y2lim if y2 else self.ylim
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        finite = np.isfinite(x) & np.isfinite(y)
+        if not finite.all():
+            x, y = x[finite], y[finite]
+        pts = np.empty((len(x), 2), dtype=np.int32)
+        pts[:, 0] = np.round(x0 + (x - xlo) * ((x1 - x0) / (xhi - xlo)))
+        pts[:, 1] = np.round(y1 - (y - ylo) * ((y1 - y0) / (yhi - ylo)))
+        return pts
+
+    def _vertical_text(self, img, text, centre_y, x):
+        """Draw `text` rotated by 90 deg counter-clockwise, centred at `centre_y`"""
+        (tw, th), base = cv.getTextSize(text, FONT, FONT_SCALE, 1)
+        patch = np.full((th + base + 2, tw + 2, 3), WHITE, dtype=np.uint8)
+        cv.putText(patch, text, (1, th + 1), FONT, FONT_SCALE, BLACK, 1, cv.LINE_AA)
+        patch = np.ascontiguousarray(np.rot90(patch))
+        h, w = patch.shape[:2]
+        top = max(int(centre_y - h // 2), 0)
+        img[top: top + h, x: x + w] = patch[:img.shape[0] - top]
+
+    def draw_background(self, img=None):
+        """Draw the axes into `img`, or a new white image, and return it"""
+        width, height = self.size
+        if img is None:
+            img = np.full((height, width, 3), WHITE, dtype=np.uint8)
+        x0, y0, x1, y1 = self.area
+        th = self.text_height
+        # grid and ticks
+        xpix = self.to_pixels(self.xticks, np.full(len(self.xticks), self.ylim[0]))
+        ypix = self.to_pixels(np.full(len(self.yticks), self.xlim[0]), self.yticks)
+        for (x, _), value in zip(xpix, self.xticks):
+            if self.grid:
+                cv.line(img, (x, y0), (x, y1), GRID_COLOR, 1)
+            cv.line(img, (x, y1), (x, y1 + 4), BLACK, 1)
+            (tw, _), _ = cv.getTextSize(_tick_label(value), FONT, FONT_SCALE, 1)
+            cv.putText(img, _tick_label(value), (x - tw // 2, y1 + 8 + th),
+                       FONT, FONT_SCALE, BLACK, 1, cv.LINE_AA)
+        for (_, y), value in zip(ypix, self.yticks):
+            if self.grid:
+                cv.line(img, (x0, y), (x1, y), GRID_COLOR, 1)
+            cv.line(img, (x0 - 4, y), (x0, y), BLACK, 1)
+            (tw, _), _ = cv.getTextSize(_tick_label(value), FONT, FONT_SCALE, 1)
+            cv.putText(img, _tick_label(value), (x0 - 7 - tw, y + th // 2),
+                       FONT, FONT_SCALE, BLACK, 1, cv.LINE_AA)
+        if self.y2lim is not None:
+            y2pix = self.to_pixels(np.full(len(self.y2ticks), self.xlim[0]),
+                                   self.y2ticks, y2=True)
+            for (_, y), value in zip(y2pix, self.y2ticks):
+                cv.line(img, (x1, y), (x1 + 4, y), BLACK, 1)
+                cv.putText(img, _tick_label(value), (x1 + 7, y + th // 2),
+                           FONT, FONT_SCALE, BLACK, 1, cv.LINE_AA)
+        cv.rectangle(img, (x0, y0), (x1, y1), BLACK, 1)
+        # axis labels
+        if self.xlabel:
+            (tw, _), _ = cv.getTextSize(self.xlabel, FONT, FONT_SCALE, 1)
+            cv.putText(img, self.xlabel, ((x0 + x1 - tw) // 2, height - 6),
+                       FONT, FONT_SCALE, BLACK, 1, cv.LINE_AA)
+        if self.ylabel:
+            self._vertical_text(img, self.ylabel, (y0 + y1) // 2, 2)
+        if self.y2label:
+            self._vertical_text(img, self.y2label, (y0 + y1) // 2,
+                                width - th - 8)
+        return img
+
+    def draw_legend(self, img, labels, colors, loc='upper left'):
+        """Draw a legend box of `labels` and their `colors` at `loc`"""
+        x0, y0, x1, y1 = self.area
+        th = self.text_height
+        tw = max(cv.getTextSize(label, FONT, FONT_SCALE, 1)[0][0] for label in labels)
+        w, h = tw + 30, len(labels) * (th + 8) + 6
+        x = x0 + 6 if 'left' in loc else x1 - 6 - w
+        y = y0 + 6 if 'upper' in loc else y1 - 6 - h
+        cv.rectangle(img, (x, y), (x + w, y + h), WHITE, -1)
+        cv.rectangle(img, (x, y), (x + w, y + h), GRID_COLOR, 1)
+        for i, (label, color) in enumerate(zip(labels, colors)):
+            yi = y + 5 + (i + 1) * (th + 8) - 4
+            cv.line(img, (x + 5, yi - th // 2), (x + 20, yi - th // 2), color, 2)
+            cv.putText(img, label, (x + 25, yi), FONT, FONT_SCALE, BLACK, 1,
+                       cv.LINE_AA)
+
+
+def _marker_segments(pts, marker, size):
+    """
+    Return the polylines that draw `marker` at each of the pixel points `pts`.
+
+    '+' and 'x' are drawn as pairs of segments; other markers, e.g. 'o'
+    and 's', as closed diamonds or squares.
+    """
+    r = size
+    if marker in ('+', 'x'):
+        if marker == '+':
+            offs = np.array([[[-r, 0], [r, 0]], [[0, -r], [0, r]]])
+        else:
+            offs = np.array([[[-r, -r], [r, r]], [[-r, r], [r, -r]]])
+        return (pts[:, None, None, :] + offs[None]).reshape(-1, 2, 2).astype(np.int32)
+    if marker == 's':
+        offs = np.array([[-r, -r], [r, -r], [r, r], [-r, r]])
+    else:
+        offs = np.array([[0, -r], [r, 0], [0, r], [-r, 0]])
+    return (pts[:, None, :] + offs[None]).astype(np.int32)
+
+def _draw_series(img, pts, color, marker, size=3, clip=None):
+    """Draw pixel points `pts` as `marker`s, or as a line if `marker` is None"""
+    if clip is not None:
+        x0, y0, x1, y1 = clip
+        pts = pts[(pts[:, 0] >= x0) & (pts[:, 0] <= x1) &
+                  (pts[:, 1] >= y0) & (pts[:, 1] <= y1)]
+    if not len(pts):
+        return
+    if marker is None:
+        cv.polylines(img, [pts], False, color, 1, cv.LINE_AA)
+        return
+    closed = marker not in ('+', 'x')
+    cv.polylines(img, _marker_segments(pts, marker, size), closed, color, 1)
+
+
+class _CVPlot:
+    """Common parts of the plots: cached background and reused image buffer"""
+
+    def _set_background(self, background):
+        self.background = background
+        self.img = background.copy()
+
+    def get_image(self):
+        """
+        Return an image to be displayed by `OpenCV.imshow`.
+
+        The image is a buffer that is overwritten on the next call.
+        """
+        np.copyto(self.img, self.background)
+        self.draw(self.img)
+        return self.img
+
+
+class Histogram(_CVPlot):
+    """
+    Continuously updatable histogram plot
+
+    As `senxor.plots.Histogram`, the bins are fixed and the data are binned
+    by a `FrameHistogram`, optionally shared as `param['engine']`.
+    """
+
+    def __init__(self, data, figsize=(6,5), param=None):
+        param = {} if param is None else dict(param)
+        size = _figsize_pixels(figsize, param)
+        self.nbins = param.get('bins', 50)
+        self.labels = param.get('labels', None)
+        xlim, ylim = param.get('xlim', None), param.get('ylim', None)
+        self.cumulative = param.get('cumulative', False)
+        self.engine = param.get('engine', None)
+        if self.engine is None:
+            hist_range = param.get('range', None)
+            if hist_range is None:
+                hist_range = xlim
+            if hist_range is None:
+                hist_range = (float(np.min(data)), float(np.max(data)))
+            self.engine = FrameHistogram(self.nbins, hist_range,
+                                         decay=param.get('decay', None))
+        # a shared engine sets the bins
+        self.nbins = len(self.engine.edges) - 1
+        self.data = data
+        if data is not None:
+            self.engine(data)
+        if xlim is None:
+            xlim = self.engine.range
+        if ylim is None:
+            ylim = (0, self.counts.max() * 1.1 or 1)
+        self.ax = Axes(size, xlim, ylim, param.get('xlabel', None),
+                       param.get('ylabel', None), param.get('xticks', None),
+                       param.get('yticks', None))
+        face_alpha = param.get('hist_face_alpha', 0.5)
+        self.edge_color = blend(param.get('hist_edge_color', 'yellow'), face_alpha)
+        self.face_color = blend(param.get('hist_face_color', 'green'), face_alpha)
+        # bar outlines, of which only the tops change
+        left = self.ax.to_pixels(self.engine.edges[:-1], np.zeros(self.nbins))
+        right = self.ax.to_pixels(self.engine.edges[1:], np.zeros(self.nbins))
+        x0, y0, x1, y1 = self.ax.area
+        self.bars = np.empty((self.nbins, 4, 2), dtype=np.int32)
+        self.bars[:, 0:2, 0] = np.clip(left[:, None, 0], x0, x1)
+        self.bars[:, 2:4, 0] = np.clip(right[:, None, 0], x0, x1)
+        self.bars[:, 0::3, 1] = np.clip(left[:, None, 1], y0, y1)
+        self._set_background(self.ax.draw_background())
+
+    @property
+    def counts(self):
+        return self.engine.cumulative if self.cumulative else self.engine.counts
+
+    def update(self, data=None):
+        """Bin `data`, if given; the bars are drawn from the current counts"""
+        if data is not None:
+            self.data = data
+            self.engine(data)
+        return self.counts
+
+    def draw(self, img):
+        """Draw the bars of the histogram on `img`"""
+        x0, y0, x1, y1 = self.ax.area
+        ylo, yhi = self.ax.ylim
+        top = y1 - (self.counts - ylo) * ((y1 - y0) / (yhi - ylo))
+        np.clip(np.round(top), y0, y1, out=top)
+        self.bars[:, 1, 1] = top
+        self.bars[:, 2, 1] = top
+        cv.fillPoly(img, list(self.bars), self.face_color)
+        cv.polylines(img, self.bars, True, self.edge_color, 1)
+
+
+class LinePlot(_CVPlot):
+    """
+    Line plot of one or more variables on same Y axis
+
+    Limits not fixed by `param` follow the data: when the data leave them,
+    the axes are redrawn with room to spare. `data` may also be a
+    `TimeSeries`, which is read, decimated to `param['max_points']`, on
+    each update.
+    """
+
+    def __init__(self, data, figsize=(6,5), param=None):
+        self.param = {} if param is None else param
+        self.size = _figsize_pixels(figsize, self.param)
+        self.labels = self.param.get('labels', None)
+        self.max_points = self.param.get('max_points', 2000)
+        self.series = data if isinstance(data, TimeSeries) else None
+        if self.series is not None:
+            data = self.series.data(self.max_points)
+        # establish a reference to a data object that
+        # is updated outside, but is accessible to self.update
+        self.data = data
+        nvars = data.shape[1] - 1
+        self.colors = [to_bgr(c) for c in self.param.get('colors',
+                                                          COLOR_CYCLE[:nvars])]
+        # None draws lines instead of markers
+        self.marker = self.param.get('marker', '+')
+        self.build(_fixed(self.param.get('xlim', None), data[:, 0]),
+                   _fixed(self.param.get('ylim', None), data[:, 1:]))
+
+    def build(self, xlim, ylim):
+        """Draw the axes for the given limits into the cached background"""
+        param = self.param
+        self.ax = Axes(self.size, xlim, ylim, param.get('xlabel', None),
+                       param.get('ylabel', None), param.get('xticks', None),
+                       param.get('yticks', None))
+        background = self.ax.draw_background()
+        if self.labels is not None:
+            self.ax.draw_legend(background, self.labels, self.colors,
+                                loc='lower left')
+        self._set_background(background)
+
+    def update(self, data=None):
+        """Update the data to be drawn by `get_image`"""
+        if data is None and self.series is not None:
+            data = self.series.data(self.max_points)
+        if data is not None:
+            self.data = data
+            xlim = _follow(self.ax.xlim, self.param.get('xlim', None), data[:, 0])
+            ylim = _follow(self.ax.ylim, self.param.get('ylim', None), data[:, 1:])
+            if (xlim, ylim) != (self.ax.xlim, self.ax.ylim):
+                self.build(xlim, ylim)
+        return self.data
+
+    def draw(self, img):
+        """Draw the data points on `img`"""
+        x = self.data[:, 0]
+        for i, color in enumerate(self.colors):
+            pts = self.ax.to_pixels(x, self.data[:, i+1])
+            _draw_series(img, pts, color, self.marker, clip=self.ax.area)
+
+
+class LivePlot2Y(_CVPlot):
+    """
+    Live plot of variables on 2 Y-axis
+
+    Limits follow the data as in `LinePlot`. `data` and `data2` may also
+    be two `TimeSeries` appended to at the same times; then the X values
+    are taken from the first one.
+    """
+
+    def __init__(self, data, data2, figsize=(6,5), param=None):
+        self.param = {} if param is None else param
+        self.size = _figsize_pixels(figsize, self.param)
+        self.max_points = self.param.get('max_points', 2000)
+        self.series = None
+        if isinstance(data, TimeSeries):
+            self.series = (data, data2)
+            data, data2 = self._series_data()
+        # Note: data has X and left-Y items, data2 has only right-Y items
+        self.data = data
+        self.data2 = data2
+        nvars, nvars2 = data.shape[1] - 1, data2.shape[1]
+        self.labels = self.param.get('labels', None)
+        colors = self.param.get('colors', None)
+        if colors is None:
+            colors = COLOR_CYCLE[:nvars + nvars2]
+        if len(colors) != nvars + nvars2:
+            raise ValueError(f'Expected {nvars + nvars2} colors, got {len(colors)}')
+        self.colors = [to_bgr(c) for c in colors]
+        self.markers = (self.param.get('marker', 'o'),
+                        self.param.get('marker2', '+'))
+        self.build(_fixed(self.param.get('xlim', None), data[:, 0]),
+                   _fixed(self.param.get('ylim', None), data[:, 1:]),
+                   _fixed(self.param.get('y2lim', None), data2))
+
+    def _series_data(self):
+        series, series2 = self.series
+        return series.data(self.max_points), \
+               series2.data(self.max_points)[:, 1:]
+
+    def build(self, xlim, ylim, y2lim):
+        """Draw the axes for the given limits into the cached background"""
+        param = self.param
+        nvars = self.data.shape[1] - 1
+        self.ax = Axes(self.size, xlim, ylim, param.get('xlabel', None),
+                       param.get('ylabel', None), param.get('xticks', None),
+                       param.get('yticks', None))
+        self.ax.set_y2(y2lim, param.get('y2label', None),
+                       param.get('y2ticks', None))
+        background = self.ax.draw_background()
+        if self.labels is not None:
+            self.ax.draw_legend(background, self.labels[:nvars],
+                                self.colors[:nvars], loc='upper left')
+            self.ax.draw_legend(background, self.labels[nvars:],
+                                self.colors[nvars:], loc='upper right')
+        self._set_background(background)
+
+    def update(self, *args, **kwargs):
+        """Update the data to be drawn by `get_image`"""
+        try:
+            data, data2 = kwargs['data'], kwargs['data2']
+        except KeyError:
+            if self.series is None:
+                return self.data, self.data2
+            data, data2 = self._series_data()
+        self.data, self.data2 = data, data2
+        param = self.param
+        limits = (_follow(self.ax.xlim, param.get('xlim', None), data[:, 0]),
+                  _follow(self.ax.ylim, param.get('ylim', None), data[:, 1:]),
+                  _follow(self.ax.y2lim, param.get('y2lim', None), data2))
+        if limits != (self.ax.xlim, self.ax.ylim, self.ax.y2lim):
+            self.build(*limits)
+        return self.data, self.data2
+
+    def draw(self, img):
+        """Draw the data points on `img`"""
+        x = self.data[:, 0]
+        nvars = self.data.shape[1] - 1
+        for i in range(nvars):
+            pts = self.ax.to_pixels(x, self.data[:, i+1])
+            _draw_series(img, pts, self.colors[i], self.markers[0],
+                         clip=self.ax.area)
+        for i in range(self.data2.shape[1]):
+            pts = self.ax.to_pixels(x, self.data2[:, i], y2=True)
+            _draw_series(img, pts, self.colors[nvars + i], self.markers[1],
+                         clip=self.ax.area)
@@ -218,6 +218,8 @@ class MI48:
             self.set_fps(fps)
         # set the format of the returned data
         self.read_raw = read_raw
+        # conversion of raw data to Celsius, if not the default one
+        self.converter = None
 
     def bootup(self, verbose=False, powerup=False):
         """Ensure bootup of the mi48 is complete, returning MODE and STATUS.
@@ -341,7 +343,10 @@ class MI48:
         Return the temperature data or (data, header), where the
         header is a dictionary.
         The returned data is a 2D array of np.float16 representing the
-        temperature in Celsius.
+        temperature in Celsius. With a converter set, see `set_converter`,
+        the data has the dtype of the converter's output, e.g. np.float32,
+        and is copied into a new array, so it is never a buffer of the
+        converter that the next read overwrites.
         Header values if requested are also decoded from bytes.
         """
         # figure out how many words to get; recall 2 bytes per pixel
@@ -387,10 +392,24 @@ class MI48:
         # unless raw numbers are requested
         if self.read_raw:
             return data, header
+        elif self.converter is not None:
+            return np.array(self.converter(data)), header
         else:
             data = data / 10. + KELVIN_0
             return data.astype(np.float16), header
 
+    def set_converter(self, converter):
+        """
+        Convert the raw data returned by `read` with `converter(data)`.
+
+        This replaces the default conversion to Celsius, e.g. by a
+        `senxor.correction.EmissivityCorrection`, which folds a per-pixel
+        emissivity into the conversion. `read` returns a copy of the
+        converter's output, in its dtype. Set None to restore the default
+        conversion.
+        """
+        self.converter = converter
+
     def has_evk_bridge(self):
         """
         Check if MI48 has a bridge-board + mi48 core dev board or
@@ -0,0 +1,133 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Layered overlays for rendered frames, e.g. the grid display of grid.py.
+#
+# Static content -- grid lines, boxes, legends -- is drawn once into an
+# overlay image with a mask. Text labels are drawn into the same overlay,
+# but are rasterised again only when their text changes. Each frame, the
+# overlay is blended onto the rendered image by a single masked copy.
+#
+import numpy as np
+import cv2 as cv
+
+
+class TextLabel:
+    """A text label of an `Overlay`, drawn over an optional background box"""
+
+    def __init__(self, org, font=cv.FONT_HERSHEY_SIMPLEX, scale=1.,
+                 color=(255, 255, 255), thickness=2, background=(0, 0, 0),
+                 padding=10):
+        self.org = tuple(org)
+        self.font = font
+        self.scale = scale
+        self.color = color
+        self.thickness = thickness
+        self.background = background
+        self.padding = padding
+        self.text = None
+        # (x0, y0, x1, y1) of the area covered by the label, if drawn
+        self.bbox = None
+
+    def extent(self, text):
+        """Return the (x0, y0, x1, y1) area covered by `text`, box included"""
+        (width, height), _ = cv.getTextSize(text, self.font, self.scale,
+                                            self.thickness)
+        x, y = self.org
+        pad = self.padding
+        return (x - pad, y - height - pad, x + width + pad, y + pad)
+
+    def draw(self, image, text, color=None):
+        """Draw `text` on `image`; use `color` for both box and text if given"""
+        if self.background is not None:
+            x0, y0, x1, y1 = self.extent(text)
+            cv.rectangle(image, (x0, y0), (x1, y1),
+                         self.background if color is None else color, -1)
+        cv.putText(image, text, self.org, self.font, self.scale,
+                   self.color if color is None else color, self.thickness)
+
+
+class Overlay:
+    """
+    An overlay of static drawings and dynamic text labels for images of
+    `size` (width, height).
+
+    Static drawings are made once with `draw`; labels are added with
+    `add_text` and updated every frame with `set_text`, which redraws a
+    label only if its text has changed. Labels should not overlap each
+    other.
+
+    Usage:
+
+        overlay = Overlay((900, 600))
+        overlay.add_grid(3, 3)
+        overlay.draw(cv.circle, (450, 300), 20, color=(0, 0, 255), thickness=2)
+        overlay.add_text('avg', (350, 300))
+        ...
+        overlay.set_text('avg', f'Avg: {avg_temp:.1f}C')
+        cv.imshow('Thermal', overlay(render(frame)))
+    """
+    def __init__(self, size):
+        width, height = size
+        self.size = (width, height)
+        # static layers and their mask, kept to restore the area of labels
+        self.static = np.zeros((height, width, 3), dtype=np.uint8)
+        self.static_mask = np.zeros((height, width), dtype=np.uint8)
+        # static layers with the labels, blended onto every frame
+        self.image = self.static.copy()
+        self.mask = self.static_mask.copy()
+        self.labels = {}
+
+    def draw(self, func, *args, color=(255, 255, 255), **kwargs):
+        """
+        Draw on the static layer with an OpenCV drawing function, e.g.
+
+            overlay.draw(cv.line, (0, 200), (900, 200), color=(255, 255, 255))
+        """
+        for image, c in ((self.static, color), (self.static_mask, 255),
+                         (self.image, color), (self.mask, 255)):
+            func(image, *args, color=c, **kwargs)
+
+    def add_grid(self, n_rows, n_cols, color=(255, 255, 255), thickness=1):
+        """Draw the lines between the cells of an `n_rows` x `n_cols` grid"""
+        width, height = self.size
+        for i in range(1, n_rows):
+            y = i * height // n_rows
+            self.draw(cv.line, (0, y), (width, y), color=color, thickness=thickness)
+        for j in range(1, n_cols):
+            x = j * width // n_cols
+            self.draw(cv.line, (x, 0), (x, height), color=color, thickness=thickness)
+
+    def add_text(self, name, org, text=None, **kwargs):
+        """
+        Add a text label called `name` at `org`; keyword arguments are
+        those of `TextLabel`.
+        """
+        self.labels[name] = TextLabel(org, **kwargs)
+        if text is not None:
+            self.set_text(name, text)
+
+    def _restore(self, bbox):
+        """Restore the static layers within `bbox`"""
+        width, height = self.size
+        x0, y0, x1, y1 = bbox
+        region = (slice(max(y0, 0), min(y1 + 1, height)),
+                  slice(max(x0, 0), min(x1 + 1, width)))
+        self.image[region] = self.static[region]
+        self.mask[region] = self.static_mask[region]
+
+    def set_text(self, name, text):
+        """Set the text of label `name`; rasterise it only if it changed"""
+        label = self.labels[name]
+        if text == label.text:
+            return
+        if label.bbox is not None:
+            self._restore(label.bbox)
+        label.draw(self.image, text)
+        label.draw(self.mask, text, color=255)
+        label.text = text
+        label.bbox = label.extent(text)
+
+    def __call__(self, image):
+        """Blend the overlay onto `image`, in place, and return it"""
+        cv.copyTo(self.image, self.mask, image)
+        return image
@@ -0,0 +1,197 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Multi-process analytics pipeline with shared-memory frame transfer.
+#
+# Acquisition stays in the main process and writes each frame into a ring
+# of slots in shared memory. Analytics, e.g. segmentation and hot/cold
+# spot statistics, run in a pool of worker processes that read the frame
+# directly from shared memory. Results carry the frame sequence number and
+# are returned in acquisition order.
+#
+import time
+import logging
+import threading
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-worker view of the shared frame ring; set by _init_worker
+_worker = {}
+
+
+def _attach_shm(name):
+    """Attach to an existing shared memory block without tracking it"""
+    try:
+        # Python >= 3.13: do not let the worker unlink the block at exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _init_worker(shm_name, ring_shape, dtype, func, func_kwargs):
+    shm = _attach_shm(shm_name)
+    _worker['shm'] = shm
+    _worker['ring'] = np.ndarray(ring_shape, dtype=dtype, buffer=shm.buf)
+    _worker['func'] = func
+    _worker['kwargs'] = func_kwargs
+
+def _run_worker(seq, slot):
+    frame = _worker['ring'][slot]
+    t0 = time.perf_counter()
+    result = _worker['func'](frame, **_worker['kwargs'])
+    return seq, slot, result, time.perf_counter() - t0
+
+
+def segment_hot_cold(frame, param):
+    """
+    Segment `frame` into hot and cold spots; return picklable results.
+
+    This is the default analytics function of an `AnalyticsPipeline`;
+    `param` is the parameter dictionary of `senxor.utils.CVSegmentCH`.
+    """
+    from senxor.utils import CVSegmentCH, SpotAnalyser
+    segment = CVSegmentCH(param)
+    segment(frame)
+    return {
+        'osd': segment.osd,
+        'hotspots': SpotAnalyser.to_osd(segment.hotspot_table),
+        'coldspots': SpotAnalyser.to_osd(segment.coldspot_table),
+    }
+
+
+class AnalyticsPipeline:
+    """
+    Run per-frame analytics in a pool of worker processes.
+
+    Frames are copied once, into a ring of `n_slots` slots in shared memory;
+    workers read them in place. `submit` never blocks: if all slots hold
+    frames still being analysed, the frame is not submitted and
+    `n_skipped` is incremented, so acquisition is never throttled by the
+    analytics.
+
+    `func(frame, **func_kwargs)` must be a module-level function, so that
+    it can be sent to the workers, and must not modify `frame`.
+
+    Usage:
+
+        pipeline = AnalyticsPipeline(segment_hot_cold, shape=(62, 80),
+                                     func_kwargs={'param': seg_param})
+        while True:
+            data, header = mi48.read()
+            frame = data_to_frame(data, mi48.fpa_shape)
+            pipeline.submit(frame, seq=header['frame_counter'])
+            for seq, timestamp, result in pipeline.results():
+                ...
+        pipeline.close()
+    """
+    def __init__(self, func=segment_hot_cold, shape=(62, 80), dtype=np.float32,
+                 n_slots=16, n_workers=None, func_kwargs=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.n_slots = n_slots
+        ring_shape = (n_slots,) + self.shape
+        nbytes = int(np.prod(ring_shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.ring = np.ndarray(ring_shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.free_slots = deque(range(n_slots))
+        # sequence numbers and timestamps of submitted frames, in order
+        self.submitted = deque()
+        self.timestamps = {}
+        # results by sequence number, filled in by the pool's callback thread
+        self.done = {}
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.seq = 0
+        self.n_skipped = 0
+        self.n_errors = 0
+        self.cost = 0.
+        self.pool = mp.Pool(n_workers, initializer=_init_worker,
+                            initargs=(self.shm.name, ring_shape, self.dtype,
+                                      func, func_kwargs or {}))
+
+    def submit(self, frame, seq=None, timestamp=None):
+        """
+        Copy `frame` to shared memory and queue it for analysis.
+
+        Return the sequence number of the frame, or None if it was skipped
+        because no slot was free.
+        """
+        if seq is None:
+            seq = self.seq
+        self.seq = seq + 1
+        with self.lock:
+            if not self.free_slots:
+                self.n_skipped += 1
+                return None
+            slot = self.free_slots.popleft()
+            self.submitted.append(seq)
+            self.timestamps[seq] = time.time() if timestamp is None else timestamp
+        self.ring[slot] = frame
+        self.pool.apply_async(_run_worker, (seq, slot),
+                              callback=self._on_result,
+                              error_callback=self._on_error(seq, slot))
+        return seq
+
+    def _on_result(self, res):
+        seq, slot, result, cost = res
+        with self.lock:
+            self.free_slots.append(slot)
+            self.done[seq] = result
+            self.cost = cost
+            self.ready.notify_all()
+
+    def _on_error(self, seq, slot):
+        def handler(exc):
+            logger.error('Analytics failed on frame {}: {}'.format(seq, exc))
+            with self.lock:
+                self.free_slots.append(slot)
+                self.done[seq] = None
+                self.n_errors += 1
+                self.ready.notify_all()
+        return handler
+
+    def results(self, block=False, timeout=None):
+        """
+        Yield (seq, timestamp, result) for analysed frames in submission order.
+
+        Results of frames that follow a frame still being analysed are held
+        back until that frame is done. If `block` is true, wait (up to
+        `timeout` seconds) until all submitted frames are done.
+        The result is None if the analytics function raised an exception.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self.lock:
+                if block and self.submitted and self.submitted[0] not in self.done:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self.ready.wait(remaining)
+                    continue
+                if not self.submitted or self.submitted[0] not in self.done:
+                    return
+                seq = self.submitted.popleft()
+                result = self.done.pop(seq)
+                timestamp = self.timestamps.pop(seq)
+            yield seq, timestamp, result
+
+    @property
+    def n_pending(self):
+        """Number of submitted frames whose results have not been yielded"""
+        return len(self.submitted)
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        self.pool.close()
+        self.pool.join()
+        del self.ring
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
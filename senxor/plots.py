@@ -7,6 +7,8 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import matplotlib.path as path
 import cv2 as cv
+from senxor.utils import FrameHistogram
+from senxor.timeseries import TimeSeries
 matplotlib.use('TkAgg')
 logging.getLogger('matplotlib.font_manager').disabled = True
 logging.getLogger('matplotlib').setLevel(logging.WARNING)
@@ -64,6 +66,40 @@ def get_hist_patch(data, *args, **kwargs):
                               edgecolor=hist_edge_color, alpha=hist_face_alpha)
     return patch
 
+class HistPatch:
+    """
+    A histogram patch with fixed bin `edges`, updated in place.
+
+    The vertexes and codes of the bar outlines (c.f. `get_hist_patch`) are
+    built once; `update` only writes the new counts into the tops of the
+    bars of the persistent vertex array.
+    """
+    def __init__(self, edges, hist_edge_color='yellow', hist_face_color='green',
+                 hist_face_alpha=0.5):
+        nrects = len(edges) - 1
+        nverts = nrects * 5
+        self.verts = np.zeros((nverts, 2))
+        self.verts[0::5, 0] = edges[:-1]
+        self.verts[1::5, 0] = edges[:-1]
+        self.verts[2::5, 0] = edges[1:]
+        self.verts[3::5, 0] = edges[1:]
+        codes = np.ones(nverts, dtype=np.uint8) * path.Path.LINETO
+        codes[0::5] = path.Path.MOVETO
+        codes[4::5] = path.Path.CLOSEPOLY
+        self.path = path.Path(self.verts, codes)
+        # the path must refer to, not copy, the vertex array
+        self.verts = self.path.vertices
+        self.patch = patches.PathPatch(self.path, facecolor=hist_face_color,
+                                       edgecolor=hist_edge_color,
+                                       alpha=hist_face_alpha)
+
+    def update(self, counts):
+        """Set the heights of the bars to `counts`"""
+        self.verts[1::5, 1] = counts
+        self.verts[2::5, 1] = counts
+        self.patch.stale = True
+        return self.patch
+
 def get_image(figure):
     """Transform a matplotlib `figure` to an image to be displayed by `opencv.imshow`"""
     # redraw the canvas
@@ -77,7 +113,17 @@ def get_image(figure):
     return img
 
 class Histogram:
-    """Continuously updatable histogram plot"""
+    """
+    Continuously updatable histogram plot
+
+    The bins are fixed: `param['bins']` intervals of `param['range']`, or
+    of `xlim`, or of the range of the initial `data`. Data are binned by
+    a `FrameHistogram`, which may be passed as `param['engine']` to share
+    the counts of a frame with other consumers, e.g. auto-contrast; then
+    call `update()` without data after binning the frame. With
+    `param['cumulative']`, the decayed cumulative histogram of the engine
+    is plotted.
+    """
 
     def __init__(self, data, figsize=(6,5), param=None):
         # create a figure to be updated
@@ -97,8 +143,9 @@ class Histogram:
         if param.get('ylabel', None) is not None:
             self.ax.set_ylabel(param.pop('ylabel'))
         self.ax.autoscale(enable=False)
-        if param.get('xlim', None) is not None:
-            self.ax.set_xlim(param.pop('xlim'))
+        xlim = param.pop('xlim', None)
+        if xlim is not None:
+            self.ax.set_xlim(xlim)
         if param.get('ylim', None) is not None:
             self.ax.set_ylim(param.pop('ylim'))
         if param.get('xticks', None) is not None:
@@ -107,15 +154,31 @@ class Histogram:
             self.ax.yaxis.set_ticks(param.pop('yticks'))
         self.labels = param.pop('labels', None)
         self.data = data
-        self.patch = get_hist_patch(data, **param)
         self.nbins = param.get('bins', 50)
+        self.cumulative = param.pop('cumulative', False)
+        self.engine = param.pop('engine', None)
+        if self.engine is None:
+            hist_range = param.get('range', None)
+            if hist_range is None:
+                hist_range = xlim
+            if hist_range is None:
+                hist_range = (float(np.min(data)), float(np.max(data)))
+            self.engine = FrameHistogram(self.nbins, hist_range,
+                                         decay=param.pop('decay', None))
+        style = {k: param[k] for k in ('hist_edge_color', 'hist_face_color',
+                                       'hist_face_alpha') if k in param}
+        self.hist_patch = HistPatch(self.engine.edges, **style)
+        self.patch = self.hist_patch.patch
         self.ax.add_patch(self.patch)
+        self.update(data)
 
     def update(self, data=None):
+        """Bin `data`, if given, and update the bars to the current counts"""
         if data is not None:
             self.data = data
-        patch = get_hist_patch(self.data, bins=self.nbins)
-        self.patch.set_path(patch.get_path())
+            self.engine(data)
+        counts = self.engine.cumulative if self.cumulative else self.engine.counts
+        self.hist_patch.update(counts)
         # return list is required by FuncAnimation
         return self.patch,
 
@@ -158,7 +221,12 @@ class LinePlot():
         self.ax.figure.tight_layout()
         self.labels = param.get('labels', None)
         # establish a reference to a data object that
-        # is updated outside, but is accessible to self.update
+        # is updated outside, but is accessible to self.update;
+        # a TimeSeries is read, decimated, on each update
+        self.max_points = param.get('max_points', 2000)
+        self.series = data if isinstance(data, TimeSeries) else None
+        if self.series is not None:
+            data = self.series.data(self.max_points)
         self.data = data
         # define the plot object
         self.markers = ['x', '+', 'x', '+', 's', 'd']
@@ -182,11 +250,20 @@ class LinePlot():
     def update(self, data=None):
         """Update the positions, colors and size of the scatter points"""
         #t0 = time.time()
+        if data is None and self.series is not None:
+            data = self.series.data(self.max_points)
         if data is None:
             data = self.data
-        for i, line in enumerate(self.lines):
-            # update only ydata, xdata is set in self.setup()
-            line.set_ydata(data[:, i+1])
+            for i, line in enumerate(self.lines):
+                # update only ydata, xdata is set in self.setup()
+                line.set_ydata(data[:, i+1])
+        else:
+            # new data may differ in length and X values
+            self.data = data
+            for i, line in enumerate(self.lines):
+                line.set_data(data[:, 0], data[:, i+1])
+            self.ax.relim()
+            self.ax.autoscale_view()
         #cost = time.time() - t0
         #print('Plot update: {} ms'.format(cost*1.e3))
         return self.lines,
@@ -241,6 +318,13 @@ class LivePlot2Y():
         # Establish a reference to a data object that
         # is updated outside, but is accessible to self.update
         # Note: data has X and left-Y items, data2 has only right-Y items
+        # Two TimeSeries, appended to at the same times, are read,
+        # decimated, on each update
+        self.max_points = param.get('max_points', 2000)
+        self.series = None
+        if isinstance(data, TimeSeries):
+            self.series = (data, data2)
+            data, data2 = self._series_data()
         self.data = data
         self.data2 = data2
         # define the plot object
@@ -275,6 +359,11 @@ class LivePlot2Y():
         self.ax2.legend(self.lines2, self.labels[len(self.lines):], loc=1)
         return self.lines, self.lines2
 
+    def _series_data(self):
+        series, series2 = self.series
+        return series.data(self.max_points), \
+               series2.data(self.max_points)[:, 1:]
+
     def update(self, *args, **kwargs):
         """Update the positions, colors and size of the scatter points"""
         #t0 = time.time()
@@ -282,14 +371,28 @@ class LivePlot2Y():
             data = kwargs['data']
             data2 = kwargs['data2']
         except KeyError:
-            data = self.data
-            data2 = self.data2
-        for i, line in enumerate(self.lines):
-            # update only ydata, xdata is set in self.setup()
-            line.set_ydata(data[:, i+1])
-        for i, line in enumerate(self.lines2):
-            # update only ydata, xdata is set in self.setup()
-            line.set_ydata(data2[:, i])
+            if self.series is None:
+                data = self.data
+                data2 = self.data2
+            else:
+                data, data2 = self._series_data()
+        if data is self.data and data2 is self.data2:
+            for i, line in enumerate(self.lines):
+                # update only ydata, xdata is set in self.setup()
+                line.set_ydata(data[:, i+1])
+            for i, line in enumerate(self.lines2):
+                # update only ydata, xdata is set in self.setup()
+                line.set_ydata(data2[:, i])
+        else:
+            # new data may differ in length and X values
+            self.data, self.data2 = data, data2
+            for i, line in enumerate(self.lines):
+                line.set_data(data[:, 0], data[:, i+1])
+            for i, line in enumerate(self.lines2):
+                line.set_data(data[:, 0], data2[:, i])
+            for ax in (self.ax, self.ax2):
+                ax.relim()
+                ax.autoscale_view()
         # must return a list of artists to use 'blit=True'
         #cost = time.time() - t0
         #print('Plot update: {} ms'.format(cost*1.e3))
@@ -0,0 +1,145 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Statistics of arbitrary regions of interest (ROI) of a frame.
+#
+# ROIs -- rectangles, polygons or masks, e.g. one per part on the build
+# plate -- are rasterised once into label maps. The per-frame statistics
+# of all ROIs then cost a gather and a few segmented reductions over the
+# labelled pixels, independent of the number of ROIs.
+#
+import numpy as np
+import cv2 as cv
+
+
+class ROISet:
+    """
+    A set of named ROIs within frames of a given `shape` (rows, cols).
+
+    ROIs may overlap: overlapping ROIs are placed in separate label maps
+    (layers), each of which is a partition of some of the frame pixels.
+
+    Usage:
+
+        rois = ROISet((62, 80))
+        rois.add_slice('Front', slice(0, 20), slice(0, 26))
+        rois.add_polygon('part_1', [(10, 10), (30, 12), (20, 40)])
+        ...
+        stats = rois(frame)
+        print(dict(zip(rois.names, stats['mean'])))
+    """
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self.names = []
+        self.layers = []
+        self._compiled = False
+
+    def add_mask(self, name, mask):
+        """Add a ROI given by a boolean `mask` of the frame shape"""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != self.shape:
+            raise ValueError(f'ROI mask shape {mask.shape} differs from '
+                             f'frame shape {self.shape}')
+        if not mask.any():
+            raise ValueError(f'ROI {name} is empty')
+        label = len(self.names) + 1
+        for layer in self.layers:
+            if not layer[mask].any():
+                break
+        else:
+            layer = np.zeros(self.shape, dtype=np.int32)
+            self.layers.append(layer)
+        layer[mask] = label
+        self.names.append(name)
+        self._compiled = False
+
+    def add_slice(self, name, rows, cols):
+        """Add a rectangular ROI given by `rows` and `cols` slices of the frame"""
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[rows, cols] = True
+        self.add_mask(name, mask)
+
+    def add_rect(self, name, x, y, w, h):
+        """Add a rectangular ROI given by its top-left corner, width and height"""
+        self.add_slice(name, slice(y, y + h), slice(x, x + w))
+
+    def add_polygon(self, name, points):
+        """Add a polygonal ROI given by a list of (x, y) vertexes"""
+        mask = np.zeros(self.shape, dtype=np.uint8)
+        cv.fillPoly(mask, [np.asarray(points, dtype=np.int32)], 1)
+        self.add_mask(name, mask)
+
+    def add_grid(self, n_rows, n_cols, prefix='cell'):
+        """Add the cells of an `n_rows` x `n_cols` grid over the frame"""
+        ny, nx = self.shape
+        y = np.linspace(0, ny, n_rows + 1).astype(int)
+        x = np.linspace(0, nx, n_cols + 1).astype(int)
+        for i in range(n_rows):
+            for j in range(n_cols):
+                self.add_slice(f'{prefix}_{i}_{j}', slice(y[i], y[i+1]),
+                               slice(x[j], x[j+1]))
+
+    def compile(self):
+        """
+        Precompute, per layer, the labelled pixels grouped by label.
+
+        Called automatically on first use after ROIs were added.
+        """
+        self._groups = []
+        for layer in self.layers:
+            flat = layer.ravel()
+            index = np.flatnonzero(flat)
+            index = index[np.argsort(flat[index], kind='stable')]
+            labels, starts = np.unique(flat[index], return_index=True)
+            self._groups.append((index, starts, labels - 1))
+        n = len(self.names)
+        self.count = np.zeros(n, dtype=np.int64)
+        for index, starts, rois in self._groups:
+            self.count[rois] = np.diff(np.append(starts, len(index)))
+        self._sum = np.zeros(n)
+        self.stats = {
+            'mean': np.zeros(n),
+            'min': np.zeros(n),
+            'max': np.zeros(n),
+            'count': self.count,
+        }
+        self._compiled = True
+
+    def __call__(self, frame):
+        """
+        Return a dictionary of the 'mean', 'min', 'max' and 'count' arrays
+        of all ROIs, in the order of `self.names`.
+
+        The arrays are reused and overwritten on the next call.
+        """
+        if not self._compiled:
+            self.compile()
+        flat = frame.reshape(-1)
+        for index, starts, rois in self._groups:
+            values = flat[index]
+            self._sum[rois] = np.add.reduceat(values, starts, dtype=np.float64)
+            self.stats['min'][rois] = np.minimum.reduceat(values, starts)
+            self.stats['max'][rois] = np.maximum.reduceat(values, starts)
+        np.divide(self._sum, self.count, out=self.stats['mean'])
+        return self.stats
+
+    def value_map(self, values, default=0., dtype=np.float32):
+        """
+        Return a per-pixel map with `values[i]` over ROI self.names[i].
+
+        Pixels outside all ROIs are set to `default`. Where ROIs overlap,
+        the ROI added last prevails. Useful to expand per-ROI parameters,
+        e.g. emissivity or distance, to the frame.
+        """
+        values = np.asarray(values, dtype=dtype)
+        if len(values) != len(self.names):
+            raise ValueError(f'Expected {len(self.names)} ROI values, '
+                             f'got {len(values)}')
+        lut = np.append(np.asarray(default, dtype=dtype), values)
+        # the last added of the ROIs at a pixel has the highest label
+        label = np.maximum.reduce(self.layers) if self.layers else \
+                np.zeros(self.shape, dtype=np.int32)
+        return lut[label]
+
+    def label_map(self, layer=0):
+        """Return the label map of a layer; label i+1 is ROI self.names[i]"""
+        return self.layers[layer]
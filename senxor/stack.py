@@ -0,0 +1,173 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Stack-aware variants of the frame helpers in senxor.utils.
+#
+# A stack is an (N, rows, cols) array of N frames, e.g. a whole build
+# loaded for post-processing. Temporal filters work along axis 0 and
+# also accept an (N,) series, e.g. of frame minima.
+#
+import numpy as np
+
+
+def data_to_stack(data, array_shape, hflip=False, vflip=False, rotate=0):
+    """
+    Convert an (N, ncols * nrows) array of 1D frames to an (N, rows, cols) view.
+
+    The orientation options are those of `senxor.utils.data_to_view`, and,
+    like there, no data is copied. Use `np.ascontiguousarray` on the result
+    if a contiguous stack is required.
+    """
+    if rotate % 90:
+        raise ValueError(f'Rotation must be a multiple of 90 deg: {rotate}')
+    ncols, nrows = array_shape
+    # reshape(order='F').T of a single frame is equivalent to a C-order
+    # reshape to (nrows, ncols)
+    stack = data.reshape(-1, nrows, ncols)
+    if hflip:
+        stack = stack[:, :, ::-1]
+    if vflip:
+        stack = stack[:, ::-1, :]
+    k = (rotate // 90) % 4
+    if k:
+        stack = np.rot90(stack, k, axes=(1, 2))
+    return stack
+
+def stack_range(stack):
+    """Return the per-frame (min, max) of `stack` as an (N, 2) array"""
+    lo = stack.min(axis=(1, 2))
+    hi = stack.max(axis=(1, 2))
+    return np.stack((lo, hi), axis=1)
+
+def _per_frame(values, n, dtype=np.float32):
+    """Broadcast a scalar or (N,) per-frame values to shape (N, 1, 1)"""
+    values = np.asarray(values, dtype=dtype)
+    return np.broadcast_to(values.reshape(-1, 1, 1), (n, 1, 1))
+
+def remap_stack(stack, new_range=(0, 255), curr_range=None, to_uint8=True):
+    """
+    Remap each frame of `stack` from its current range to `new_range`.
+
+    The transformation is that of `senxor.utils.remap`, applied per frame.
+    `curr_range` is either a (lo, hi) pair common to all frames, or an
+    (N, 2) array of per-frame ranges, e.g. from `stack_range` after
+    temporal filtering; if None, each frame's own limits are used.
+
+    The arithmetic, and its dtype, are those of `remap`: float64 for
+    integer frames, e.g. raw uint16, and the frames' own dtype for float
+    frames, so that each frame is remapped exactly as by `remap`.
+    """
+    n = len(stack)
+    lo2, hi2 = new_range
+    if curr_range is None:
+        curr_range = stack_range(stack)
+    # the dtype of remap's (data - lo1) / float(hi1 - lo1)
+    dtype = np.result_type(stack.dtype, 1.)
+    curr_range = np.asarray(curr_range, dtype=dtype).reshape(-1, 2)
+    lo1 = _per_frame(curr_range[:, 0], n, dtype)
+    hi1 = _per_frame(curr_range[:, 1], n, dtype)
+    out = stack.astype(dtype)
+    out -= lo1
+    out /= hi1 - lo1
+    out *= hi2 - lo2
+    out += lo2
+    if to_uint8:
+        return out.astype('uint8')
+    else:
+        return out.astype('float16')
+
+def clip_stack(stack, minval=None, maxval=None, c0=0.0, c1=0.0):
+    """
+    Clip the lowest and highest values of each frame of `stack`.
+
+    As `senxor.utils.clip_frame`, but `minval` and `maxval` may be scalars
+    or (N,) per-frame values; if None, the per-frame limits are used.
+    """
+    n = len(stack)
+    if minval is None or maxval is None:
+        lo_hi = stack_range(stack)
+        minval, maxval = lo_hi[:, 0], lo_hi[:, 1]
+    minval = _per_frame(minval, n)
+    maxval = _per_frame(maxval, n)
+    _range = maxval - minval
+    return np.clip(stack, minval + c0 * _range, maxval - c1 * _range)
+
+def cumulative_average(stack):
+    """Return the running mean of `stack` along axis 0, i.e. over all frames so far"""
+    out = np.cumsum(stack, axis=0, dtype=np.float64)
+    count = np.arange(1, len(stack) + 1).reshape((-1,) + (1,) * (stack.ndim - 1))
+    out /= count
+    return out.astype(np.float32)
+
+def boxcar_average(stack, depth):
+    """
+    Return the average of the last `depth` frames along axis 0.
+
+    Equivalent to applying `senxor.utils.TrueAverageFilter(depth)` to each
+    frame in turn, including the warm-up over the first `depth` frames.
+    """
+    csum = np.cumsum(stack, axis=0, dtype=np.float64)
+    csum[depth:] -= csum[:-depth].copy()
+    count = np.minimum(np.arange(1, len(stack) + 1), depth)
+    csum /= count.reshape((-1,) + (1,) * (stack.ndim - 1))
+    return csum.astype(np.float32)
+
+def exponential_average(stack, alpha, initial=None, block=64):
+    """
+    Return the exponential moving average of `stack` along axis 0.
+
+    s[k] = (1 - alpha) * s[k-1] + alpha * stack[k], with s[-1] = `initial`,
+    or s[0] = stack[0] if `initial` is None.
+
+    The recursion is evaluated in blocks of `block` frames; within a block
+    it is a single contraction with a lower-triangular weight matrix.
+    """
+    stack = np.asarray(stack, dtype=np.float32)
+    out = np.empty(stack.shape, dtype=np.float32)
+    if len(stack) == 0:
+        return out
+    if initial is None:
+        out[0] = stack[0]
+        start, state = 1, stack[0].astype(np.float32)
+    else:
+        start, state = 0, np.asarray(initial, dtype=np.float32)
+    # weights within a block: L[k, j] = alpha * (1-alpha)^(k-j) for j <= k
+    # and the decay of the state from before the block: d[k] = (1-alpha)^(k+1)
+    k = np.arange(block)
+    L = np.tril(alpha * (1. - alpha) ** (k[:, None] - k[None, :]))
+    L = L.astype(np.float32)
+    d = ((1. - alpha) ** (k + 1)).astype(np.float32)
+    for i in range(start, len(stack), block):
+        x = stack[i: i + block]
+        n = len(x)
+        res = np.tensordot(L[:n, :n], x, axes=1)
+        res += d[:n].reshape((-1,) + (1,) * (stack.ndim - 1)) * state
+        out[i: i + n] = res
+        state = res[-1]
+    return out
+
+def rolling_average(stack, N=4):
+    """
+    Return the rolling average of `stack` along axis 0.
+
+    Equivalent to applying `senxor.utils.RollingAverageFilter(N)` to each
+    frame (or value) in turn: a cumulative mean over the first `N` frames,
+    followed by exponential averaging with weight 1/N.
+    """
+    stack = np.asarray(stack)
+    out = np.empty(stack.shape, dtype=np.float32)
+    out[:N] = cumulative_average(stack[:N])
+    if len(stack) > N:
+        out[N:] = exponential_average(stack[N:], 1. / N, initial=out[N-1])
+    return out
+
+def region_means(stack, regions):
+    """
+    Return an (N, len(regions)) array of the mean of each region per frame.
+
+    `regions` is a list of (row_slice, col_slice) pairs, e.g. the
+    grid regions of grid.py.
+    """
+    out = np.empty((len(stack), len(regions)), dtype=np.float32)
+    for i, (rows, cols) in enumerate(regions):
+        out[:, i] = stack[:, rows, cols].mean(axis=(1, 2))
+    return out
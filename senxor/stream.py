@@ -0,0 +1,209 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Binary protocol for streaming frames over a socket, e.g. from grid.py
+# to the ip.py viewer.
+#
+# Each message is a fixed-size header followed by the payload:
+#
+#     magic       4s   b'MIFS'
+#     version     B
+#     encoding    B    0: raw array data, 1: JPEG, 2: PNG
+#     dtype       B    index in DTYPES
+#     ndim        B    1 to 4
+#     seq         Q    frame sequence number
+#     timestamp   d    seconds since the epoch
+#     shape       4I   array shape, padded with zeros
+#     nbytes      Q    payload size in bytes
+#
+# all in network byte order. Raw payloads are the C-ordered array data,
+# in little-endian byte order. The receiver reads payloads into a reused
+# buffer and returns frames as views of it, so nothing is deserialised
+# and nothing is copied after the socket read.
+#
+import struct
+import time
+import numpy as np
+import cv2 as cv
+
+MAGIC = b'MIFS'
+VERSION = 1
+HEADER = struct.Struct('>4sBBBBQd4IQ')
+
+ENCODING_RAW = 0
+ENCODING_JPEG = 1
+ENCODING_PNG = 2
+ENCODINGS = {'raw': ENCODING_RAW, 'jpeg': ENCODING_JPEG, 'png': ENCODING_PNG}
+_image_ext = {ENCODING_JPEG: '.jpg', ENCODING_PNG: '.png'}
+
+DTYPES = [np.dtype(t).newbyteorder('<') for t in
+          ('uint8', 'uint16', 'int16', 'uint32', 'int32',
+           'float16', 'float32', 'float64')]
+
+# largest payload accepted by a FrameReceiver, unless given otherwise
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+
+def pack_header(seq, timestamp, encoding, dtype, shape, nbytes):
+    """Return the header of a message, as bytes"""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    if dtype not in DTYPES:
+        raise ValueError(f'Unsupported frame data type: {dtype}')
+    if not 1 <= len(shape) <= 4:
+        raise ValueError(f'Unsupported frame shape: {shape}')
+    ndim = len(shape)
+    shape = tuple(shape) + (0,) * (4 - ndim)
+    return HEADER.pack(MAGIC, VERSION, encoding, DTYPES.index(dtype), ndim,
+                       seq, timestamp, *shape, nbytes)
+
+def unpack_header(buffer, max_payload=MAX_PAYLOAD):
+    """
+    Return the header in `buffer` as a dictionary.
+
+    Raise ValueError if the header is malformed, or announces a payload
+    that is inconsistent with the frame shape or larger than `max_payload`.
+    """
+    magic, version, encoding, idtype, ndim, seq, timestamp, *shape, nbytes =\
+        HEADER.unpack(buffer)
+    if magic != MAGIC:
+        raise ValueError(f'Bad frame header: {bytes(magic)}')
+    if version != VERSION:
+        raise ValueError(f'Unsupported protocol version: {version}')
+    if encoding not in ENCODINGS.values() or idtype >= len(DTYPES) or\
+       not 1 <= ndim <= 4:
+        raise ValueError('Bad frame header')
+    dtype = DTYPES[idtype]
+    shape = tuple(shape[:ndim])
+    if nbytes > max_payload:
+        raise ValueError(f'Frame payload of {nbytes} bytes is too large')
+    if encoding == ENCODING_RAW and\
+       nbytes != int(np.prod(shape)) * dtype.itemsize:
+        raise ValueError(f'Payload of {nbytes} bytes does not match '
+                         f'frame {shape} {dtype}')
+    return {'seq': seq, 'timestamp': timestamp, 'encoding': encoding,
+            'dtype': dtype, 'shape': shape, 'nbytes': nbytes}
+
+
+class FrameSender:
+    """
+    Send frames over a connected stream socket.
+
+    `encoding` is 'raw', or 'jpeg' or 'png' for uint8 images, which are
+    then compressed by OpenCV.
+
+    Usage:
+
+        client_socket, client_address = server_socket.accept()
+        sender = FrameSender(client_socket)
+        ...
+        sender.send(image, seq=header['frame_counter'])
+    """
+    def __init__(self, sock, encoding='raw', params=None):
+        self.sock = sock
+        self.encoding = ENCODINGS[encoding]
+        self.params = params or []
+        self.seq = 0
+
+    def send(self, frame, seq=None, timestamp=None):
+        """Send `frame`; return the sequence number it was sent with"""
+        seq = self.seq if seq is None else seq
+        self.seq = seq + 1
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.encoding == ENCODING_RAW:
+            frame = np.ascontiguousarray(
+                frame, dtype=frame.dtype.newbyteorder('<'))
+            # casting a view of an empty array raises TypeError
+            payload = memoryview(frame).cast('B') if frame.size else\
+                      memoryview(b'')
+        else:
+            ok, payload = cv.imencode(_image_ext[self.encoding], frame,
+                                      self.params)
+            if not ok:
+                raise ValueError('Could not encode frame')
+            payload = memoryview(payload).cast('B')
+        header = pack_header(seq, timestamp, self.encoding, frame.dtype,
+                             frame.shape, payload.nbytes)
+        self._send([memoryview(header), payload])
+        return seq
+
+    def _send(self, buffers):
+        """Send all of `buffers`, a list of byte memoryviews"""
+        try:
+            sendmsg = self.sock.sendmsg
+        except AttributeError:
+            # no sendmsg on Windows
+            for buffer in buffers:
+                self.sock.sendall(buffer)
+            return
+        # one system call, and no waiting for the header to be acked;
+        # sendmsg may send only part of the buffers, e.g. if interrupted
+        # by a signal, so send the rest until all are sent
+        buffers = [buffer for buffer in buffers if buffer.nbytes]
+        while buffers:
+            n = sendmsg(buffers)
+            while buffers and n >= buffers[0].nbytes:
+                n -= buffers[0].nbytes
+                buffers.pop(0)
+            if n:
+                buffers[0] = buffers[0][n:]
+
+
+class FrameReceiver:
+    """
+    Receive frames sent by a `FrameSender` over a connected stream socket.
+
+    The header and payload are read with `recv_into` into preallocated
+    buffers; raw frames are returned as `np.frombuffer` views of the
+    payload buffer. These views are overwritten by the next `recv`, so copy
+    a frame if it must persist.
+
+    Usage:
+
+        receiver = FrameReceiver(sock)
+        while True:
+            message = receiver.recv()
+            if message is None:
+                break   # connection closed
+            header, frame = message
+            ...
+    """
+    def __init__(self, sock, max_payload=MAX_PAYLOAD):
+        self.sock = sock
+        self.max_payload = max_payload
+        self.header = bytearray(HEADER.size)
+        self.payload = bytearray(0)
+
+    def _recv_exactly(self, view):
+        """Fill `view` from the socket; return False if the connection closed"""
+        n = 0
+        while n < len(view):
+            nrecv = self.sock.recv_into(view[n:])
+            if nrecv == 0:
+                return False
+            n += nrecv
+        return True
+
+    def recv(self):
+        """
+        Return the (header, frame) of the next message, or None if the
+        connection was closed.
+        """
+        if not self._recv_exactly(memoryview(self.header)):
+            return None
+        header = unpack_header(self.header, self.max_payload)
+        nbytes = header['nbytes']
+        if len(self.payload) < nbytes:
+            # a new buffer, since frames of the previous one may be in use
+            self.payload = bytearray(nbytes)
+        payload = memoryview(self.payload)[:nbytes]
+        if not self._recv_exactly(payload):
+            return None
+        if header['encoding'] == ENCODING_RAW:
+            frame = np.frombuffer(self.payload, dtype=header['dtype'],
+                                  count=int(np.prod(header['shape'])))
+            frame = frame.reshape(header['shape'])
+        else:
+            frame = cv.imdecode(np.frombuffer(payload, dtype=np.uint8),
+                                cv.IMREAD_UNCHANGED)
+            if frame is None:
+                raise ValueError(f'Could not decode frame {header["seq"]}')
+        return header, frame
@@ -0,0 +1,179 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Bounded-memory storage of long time series, e.g. the minimum, maximum
+# and ROI temperatures over a whole build, for live plots.
+#
+# The most recent samples are kept in a fixed-capacity ring. Older history
+# is kept in a pyramid of min/max decimation levels: level k = 0, 1, ...
+# holds the minimum and maximum of consecutive buckets of factor**(k+1)
+# samples, in a ring of the same capacity. Appending is O(1) amortised, and any time
+# span can be drawn from the finest level that represents it with at most
+# a given number of points.
+#
+import numpy as np
+
+
+class _Level:
+    """A ring of (time, min, max) buckets, plus the bucket being filled"""
+
+    def __init__(self, capacity, n_vars, dtype):
+        self.t = np.zeros(capacity)
+        self.lo = np.zeros((capacity, n_vars), dtype=dtype)
+        self.hi = np.zeros((capacity, n_vars), dtype=dtype)
+        self.n = 0
+        self.head = 0
+        # bucket being filled: start time, min, max and number of inputs
+        self.acc_t = None
+        self.acc_lo = np.empty(n_vars, dtype=dtype)
+        self.acc_hi = np.empty(n_vars, dtype=dtype)
+        self.acc_n = 0
+
+    def add(self, t, lo, hi):
+        """Add an input bucket to the one being filled"""
+        if self.acc_n == 0:
+            self.acc_t = t
+            self.acc_lo[:] = lo
+            self.acc_hi[:] = hi
+        else:
+            np.fmin(self.acc_lo, lo, out=self.acc_lo)
+            np.fmax(self.acc_hi, hi, out=self.acc_hi)
+        self.acc_n += 1
+
+    def push(self):
+        """Store the filled bucket in the ring and start a new one"""
+        capacity = len(self.t)
+        self.t[self.head] = self.acc_t
+        self.lo[self.head] = self.acc_lo
+        self.hi[self.head] = self.acc_hi
+        self.head = (self.head + 1) % capacity
+        self.n = min(self.n + 1, capacity)
+        self.acc_n = 0
+
+    def order(self):
+        """Return the ring indexes of the stored buckets, oldest first"""
+        capacity = len(self.t)
+        return (np.arange(self.head - self.n, self.head)) % capacity
+
+
+class TimeSeries:
+    """
+    Ring-buffered time series of `n_vars` variables with min/max decimation.
+
+    The last `capacity` samples are kept as they are; `levels` decimation
+    levels, each also of `capacity` buckets, reduce the history by `factor`
+    per level, so the series spans capacity * factor**levels samples in
+    (levels + 1) * capacity * (2 * n_vars + 1) stored values.
+
+    `data` returns an array suitable for `LinePlot` and `LivePlot2Y` of
+    senxor.plots or senxor.cvplots: time in the first column, followed by
+    the variables. Decimated buckets contribute two rows, with the minima
+    and the maxima of the bucket, so peaks survive decimation.
+
+    Usage:
+
+        trend = TimeSeries(n_vars=3, capacity=4096)
+        plot = LinePlot(trend.data(), figsize=(600, 300), param=param)
+        ...
+        trend.append(time.time(), (tmin, tmax, roi_mean))
+        plot.update(trend.data(max_points=2000))
+    """
+    def __init__(self, n_vars=1, capacity=4096, factor=4, levels=6,
+                 dtype=np.float32):
+        self.n_vars = n_vars
+        self.capacity = capacity
+        self.factor = factor
+        self.dtype = dtype
+        self.t = np.zeros(capacity)
+        self.values = np.zeros((capacity, n_vars), dtype=dtype)
+        self.n = 0
+        self.head = 0
+        self.n_appended = 0
+        self.levels = [_Level(capacity, n_vars, dtype) for _ in range(levels)]
+
+    def __len__(self):
+        """Number of samples appended so far"""
+        return self.n_appended
+
+    def append(self, t, values):
+        """Append the `values` of all variables at time `t`"""
+        values = np.asarray(values, dtype=self.dtype).reshape(self.n_vars)
+        self.t[self.head] = t
+        self.values[self.head] = values
+        self.head = (self.head + 1) % self.capacity
+        self.n = min(self.n + 1, self.capacity)
+        self.n_appended += 1
+        # propagate full buckets up the pyramid
+        lo = hi = values
+        for level in self.levels:
+            level.add(t, lo, hi)
+            if level.acc_n < self.factor:
+                break
+            t, lo, hi = level.acc_t, level.acc_lo.copy(), level.acc_hi.copy()
+            level.push()
+
+    def _raw(self):
+        order = np.arange(self.head - self.n, self.head) % self.capacity
+        return self.t[order], self.values[order]
+
+    def _tail(self, k):
+        """Return the (t, min, max) of the samples not yet in level `k`"""
+        t, lo, hi = None, None, None
+        for level in self.levels[:k + 1][::-1]:
+            if level.acc_n == 0:
+                continue
+            if t is None:
+                t, lo, hi = level.acc_t, level.acc_lo.copy(), level.acc_hi.copy()
+            else:
+                np.fmin(lo, level.acc_lo, out=lo)
+                np.fmax(hi, level.acc_hi, out=hi)
+        return t, lo, hi
+
+    def data(self, max_points=2000, t0=None, t1=None):
+        """
+        Return the (n, 1 + n_vars) array of the series between `t0` and `t1`.
+
+        The raw samples are returned if there are at most `max_points` of
+        them in the span; else the buckets of the finest decimation level
+        with at most `max_points` rows in the span.
+        """
+        t, values = self._raw()
+        in_span = self._in_span(t, t0, t1)
+        # the raw ring holds the span if nothing was dropped from it yet
+        covers = self.n == self.n_appended or (t0 is not None and t0 >= t[0])
+        if covers and in_span.sum() <= max_points or not self.levels:
+            out = np.empty((in_span.sum(), 1 + self.n_vars))
+            out[:, 0] = t[in_span]
+            out[:, 1:] = values[in_span]
+            return out
+        for k, level in enumerate(self.levels):
+            order = level.order()
+            lt, lo, hi = level.t[order], level.lo[order], level.hi[order]
+            tail_t, tail_lo, tail_hi = self._tail(k)
+            if tail_t is not None:
+                lt = np.append(lt, tail_t)
+                lo = np.vstack((lo, tail_lo))
+                hi = np.vstack((hi, tail_hi))
+            in_span = self._in_span(lt, t0, t1)
+            covers = level.n < self.capacity or (t0 is not None and t0 >= lt[0])
+            if covers and 2 * in_span.sum() <= max_points or\
+               k == len(self.levels) - 1:
+                break
+        n = in_span.sum()
+        out = np.empty((2 * n, 1 + self.n_vars))
+        out[0::2, 0] = out[1::2, 0] = lt[in_span]
+        out[0::2, 1:] = lo[in_span]
+        out[1::2, 1:] = hi[in_span]
+        return out
+
+    @staticmethod
+    def _in_span(t, t0, t1):
+        in_span = np.ones(len(t), dtype=bool)
+        if t0 is not None:
+            in_span &= t >= t0
+        if t1 is not None:
+            in_span &= t <= t1
+        return in_span
+
+    def clear(self):
+        self.__init__(self.n_vars, self.capacity, self.factor,
+                      len(self.levels), self.dtype)
@@ -0,0 +1,193 @@
+# Copyright (C) Meridian Innovation Ltd. Hong Kong, 2020. All rights reserved.
+#
+# Persistent identities for hot (or cold) spots across frames.
+#
+# The segmentation classes in senxor.utils, e.g. CVSegment and CVSegmentCH,
+# start from scratch on every frame. SpotTracker associates the spots of
+# consecutive frames by centroid and area, and keeps per-track state such
+# as peak temperature, lifetime and velocity.
+#
+import itertools
+from collections import deque
+import numpy as np
+
+
+class Track:
+    """State of a tracked spot"""
+
+    def __init__(self, track_id, frame_id, centroid, area, temperature, osd=None):
+        self.id = track_id
+        self.first_frame = frame_id
+        self.last_frame = frame_id
+        self.centroid = np.asarray(centroid, dtype=float)
+        self.area = abs(area)
+        self.temperature = temperature
+        self.peak_temperature = temperature
+        # centroid displacement per frame, smoothed
+        self.velocity = np.zeros(2)
+        self.hits = 1
+        self.misses = 0
+        self.osd = osd
+
+    @property
+    def lifetime(self):
+        """Number of frames since the track was started"""
+        return self.last_frame - self.first_frame + 1
+
+    def predict(self, frame_id):
+        """Return the centroid expected at `frame_id`, assuming constant velocity"""
+        return self.centroid + self.velocity * (frame_id - self.last_frame)
+
+    def update(self, frame_id, centroid, area, temperature, osd=None, alpha=0.5):
+        centroid = np.asarray(centroid, dtype=float)
+        dt = frame_id - self.last_frame
+        if dt > 0:
+            velocity = (centroid - self.centroid) / dt
+            self.velocity += alpha * (velocity - self.velocity)
+        self.centroid = centroid
+        self.area = abs(area)
+        self.temperature = temperature
+        self.peak_temperature = max(self.peak_temperature, temperature)
+        self.last_frame = frame_id
+        self.hits += 1
+        self.misses = 0
+        self.osd = osd
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'centroid': tuple(float(x) for x in self.centroid),
+            'area': float(self.area),
+            'temperature': self.temperature,
+            'peak_temperature': self.peak_temperature,
+            'velocity': tuple(float(v) for v in self.velocity),
+            'lifetime': self.lifetime,
+            'hits': self.hits,
+        }
+
+    def __repr__(self):
+        return 'Track({id}, centroid={centroid}, peak={peak_temperature}, '\
+               'lifetime={lifetime})'.format(**self.as_dict())
+
+
+class SpotTracker:
+    """
+    Assign persistent IDs to spots across frames.
+
+    Each frame, the spots are associated with the active tracks by the
+    distance of their centroid from the predicted track position, with a
+    penalty for relative change of area. Pairs farther apart than
+    `max_distance` pixels, or with a relative area change above
+    `max_area_change`, are not considered (gating). Candidate pairs are
+    found from the spots sorted by centroid column, so only the spots
+    within `max_distance` columns of a track are compared with it.
+    Association is greedy, in order of increasing cost, so the cost per
+    frame is about proportional to the number of gated pairs rather than
+    to tracks x spots.
+
+    Unmatched spots start new tracks; tracks unmatched for more than
+    `max_misses` frames are retired. The last `max_retired` retired tracks
+    are kept in `retired`.
+
+    Usage:
+
+        segment = CVSegment(seg_param)
+        tracker = SpotTracker(max_distance=5)
+        ...
+        segment(frame)
+        spots = SpotAnalyser.to_osd(segment.hotspot_table)
+        tracks = tracker(spots)
+        for spot, track_id in zip(spots, tracker.ids):
+            ...
+    """
+    def __init__(self, max_distance=5., max_area_change=1., area_weight=1.,
+                 max_misses=2, temperature_key='max', max_retired=100):
+        self.max_distance = max_distance
+        self.max_area_change = max_area_change
+        self.area_weight = area_weight
+        self.max_misses = max_misses
+        self.temperature_key = temperature_key
+        self.tracks = {}
+        self.retired = deque(maxlen=max_retired)
+        self.frame_id = -1
+        self.ids = []
+        self._next_id = itertools.count()
+
+    def _costs(self, centroids, areas):
+        """Return the active tracks and the gated (track, spot) index pairs by cost"""
+        tracks = list(self.tracks.values())
+        if not tracks or not len(centroids):
+            return tracks, []
+        predicted = np.array([t.predict(self.frame_id) for t in tracks])
+        track_areas = np.array([t.area for t in tracks], dtype=float)
+        # candidate pairs: the spots within max_distance columns of each track
+        by_x = np.argsort(centroids[:, 0], kind='stable')
+        xs = centroids[by_x, 0]
+        lo = np.searchsorted(xs, predicted[:, 0] - self.max_distance, 'left')
+        hi = np.searchsorted(xs, predicted[:, 0] + self.max_distance, 'right')
+        counts = hi - lo
+        it = np.repeat(np.arange(len(tracks)), counts)
+        isp = by_x[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                       counts) + np.repeat(lo, counts)]
+        # in track, then spot order, so that equal costs keep that order
+        order = np.argsort(it * len(centroids) + isp)
+        it, isp = it[order], isp[order]
+        # distance and relative area change of the candidate pairs
+        dist = np.linalg.norm(predicted[it] - centroids[isp], axis=1)
+        darea = np.abs(track_areas[it] - areas[isp]) / np.maximum(track_areas[it], 1.)
+        gated = (dist <= self.max_distance) & (darea <= self.max_area_change)
+        it, isp = it[gated], isp[gated]
+        cost = dist[gated] / self.max_distance + self.area_weight * darea[gated]
+        order = np.argsort(cost, kind='stable')
+        return tracks, list(zip(it[order], isp[order]))
+
+    def update(self, spots, frame_id=None):
+        """
+        Associate `spots` with the tracks and return the list of active tracks.
+
+        `spots` is a list of metrics dictionaries with at least 'centroid',
+        'area' and the `temperature_key`, e.g. `HotSpot.osd` or the metrics
+        of `get_label_stats`. After the call, `self.ids` holds the track ID
+        assigned to each spot, in the order of `spots`.
+        """
+        self.frame_id = self.frame_id + 1 if frame_id is None else frame_id
+        n = len(spots)
+        centroids = np.array([s['centroid'] for s in spots], dtype=float).reshape(n, 2)
+        areas = np.abs(np.array([s['area'] for s in spots], dtype=float))
+        tracks, candidates = self._costs(centroids, areas)
+        ids = [None] * n
+        matched = set()
+        for it, isp in candidates:
+            track = tracks[it]
+            if ids[isp] is not None or track.id in matched:
+                continue
+            spot = spots[isp]
+            track.update(self.frame_id, centroids[isp], areas[isp],
+                         spot[self.temperature_key], osd=spot)
+            ids[isp] = track.id
+            matched.add(track.id)
+        # retire tracks that have not been seen for too long
+        for track in tracks:
+            if track.id not in matched:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    self.retired.append(self.tracks.pop(track.id))
+        # start new tracks for unmatched spots
+        for isp in range(n):
+            if ids[isp] is None:
+                track = Track(next(self._next_id), self.frame_id, centroids[isp],
+                              areas[isp], spots[isp][self.temperature_key],
+                              osd=spots[isp])
+                self.tracks[track.id] = track
+                ids[isp] = track.id
+        self.ids = ids
+        return list(self.tracks.values())
+
+    def __call__(self, spots, frame_id=None):
+        return self.update(spots, frame_id)
+
+    def clear(self):
+        self.tracks = {}
+        self.retired.clear()
+        self.frame_id = -1
+        self.ids = []
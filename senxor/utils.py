@@ -3,18 +3,20 @@
 import time
 import os
 import logging
+import threading
+from collections import deque
 import math
 import itertools
-from functools import partial
+from functools import partial, lru_cache
 from pathlib import Path
 import operator
 import numpy as np
 import cv2 as cv
-import cmapy
 from serial.tools import list_ports
 from serial import Serial, SerialException
-from senxor.mi48 import MI48
+from senxor.mi48 import MI48, KELVIN_0
 from senxor.interfaces import MI_VID, MI_PIDs, USB_Interface
+from senxor.colormap import get_lut
 
 list_ironbow_b = [0,6,12,18,27,38,49,59,64,68,73,78,82,86,90,94,98,102,105,109,112,115,119,122,124,127,129,132,134,136,138,140,142,145,147,148,150,151,152,153,154,155,157,158,159,160,161,163,163,164,165,166,166,167,167,167,167,167,166,166,166,165,165,165,165,164,164,164,163,162,161,160,160,160,158,157,156,155,153,152,151,150,148,147,146,145,143,142,141,140,138,136,134,132,130,127,125,123,121,119,118,116,114,112,110,108,106,104,102,100,98,96,94,92,90,88,86,84,82,80,78,75,73,71,69,67,65,63,61,59,57,55,53,51,49,48,46,44,42,40,38,36,34,32,31,29,27,25,24,22,21,20,18,17,16,15,13,12,11,9,8,7,6,4,3,2,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,2,3,5,6,7,9,10,12,13,14,16,17,20,23,26,28,31,34,37,39,42,45,48,50,53,56,59,62,66,70,74,78,82,86,91,96,101,106,111,115,120,125,130,135,140,146,152,158,164,171,178,185,192,201,210,219,229,237,243,248,251,254]
 list_ironbow_g = [0,0,0,0,0,0,0,0,0,1,2,3,4,3,3,2,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,1,1,2,2,2,2,3,3,3,4,5,6,7,8,9,10,11,12,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,30,31,32,33,34,35,36,37,39,40,42,43,45,47,48,50,51,53,54,56,58,59,61,62,64,65,67,69,70,72,73,75,76,78,80,81,83,84,86,88,89,91,93,95,96,98,100,102,103,105,107,109,110,112,114,116,117,119,121,122,124,126,128,129,131,133,134,136,138,139,141,143,145,146,148,150,151,153,155,156,158,160,161,163,165,167,168,170,172,173,175,177,178,180,182,184,185,187,188,190,191,193,194,196,197,199,200,202,203,205,206,208,209,211,212,214,215,216,217,219,220,221,223,224,225,227,228,229,231,232,233,235,235,236,236,237,238,239,240,241,242,243,244,245,246,247,248,249,249,250,251,252,253,254,255,255,255,255,255,254,254,254,254,254]
@@ -101,24 +103,60 @@ def connect_senxor(src=None, name=None):
             mi48 = MI48([usb,usb], name=name, read_raw=False)
     return mi48, connected_port, port_names
 
-def data_to_frame(data, array_shape, hflip=False):
+def data_to_frame(data, array_shape, hflip=False, out=None):
     """
     Convert 1D array into nH x nV 2D array corresponding to the FPA.
 
     Use this func to change orientation to forward looking camera with `hflip`.
+    The returned frame is C-contiguous; if `out` is given, it is written there.
     """
     # Note that the data coming for the EVK is stored as a 1D array.
-    # the data.reshape() reconstructs the 2D FPA array shape; 
+    # the data.reshape() reconstructs the 2D FPA array shape;
     # Note the data ordering is 'F' (fortran-like).
-    nc, nr = array_shape
+    #
+    # The flipping in data_to_view realises horisontal flip, assuming that
+    # the USB port faces the ceiling or the sky, to correct for
+    # left/right flip in the camera, if necessary.
+    frame = data_to_view(data, array_shape, hflip=hflip)
+    return contiguous_frame(frame, out=out)
+
+def data_to_view(data, array_shape, hflip=False, vflip=False, rotate=0):
+    """
+    Return a strided 2D view of the 1D `data` in the orientation of the FPA.
+
+    No data is copied: flips and rotation only change the strides of the view.
+    `rotate` is in degrees, counter-clockwise, and must be a multiple of 90.
+    Flips are applied before the rotation.
+
+    The view is fine for NumPy reductions, e.g. means over slices;
+    use `contiguous_frame` before passing it to OpenCV.
+    """
+    if rotate % 90:
+        raise ValueError(f'Rotation must be a multiple of 90 deg: {rotate}')
+    frame = data.reshape(array_shape, order='F').T
     if hflip:
-        # The flipping below realises horisontal flip, assuming that 
-        # the USB port faces the ceiling or the sky, to correct for 
-        # left/right flip in the camera, if necessary.
-        frame = np.flip(data.reshape(array_shape, order='F').T, 1)
-    else:
-        frame = data.reshape(array_shape, order='F').T
-    return frame.copy()
+        frame = frame[:, ::-1]
+    if vflip:
+        frame = frame[::-1, :]
+    k = (rotate // 90) % 4
+    if k:
+        frame = np.rot90(frame, k)
+    return frame
+
+def contiguous_frame(frame, out=None):
+    """
+    Return a C-contiguous copy of `frame`, e.g. a view from `data_to_view`.
+
+    If `out` is given, the copy is written into it and `out` is returned;
+    `out` must be C-contiguous and have the shape of `frame`.
+    """
+    if out is None:
+        return np.array(frame, order='C')
+    if out.shape != frame.shape or not out.flags.c_contiguous:
+        raise ValueError(f'Output buffer must be C-contiguous with shape '
+                         f'{frame.shape}, not {out.shape}')
+    np.copyto(out, frame)
+    return out
 
 def remap(data, new_range=(0, 255), curr_range=None, to_uint8=True):
     """
@@ -162,6 +200,194 @@ def remap(data, new_range=(0, 255), curr_range=None, to_uint8=True):
     else:
         return out.astype('float16')
 
+
+def celsius_to_raw(temperature):
+    """
+    Convert temperature in Celsius to the raw MI48 units (deci-Kelvin).
+
+    Useful to express a display range in the units of the raw uint16 frames
+    returned by the MI48 when `read_raw` is true.
+    """
+    return int(round((temperature - KELVIN_0) * 10))
+
+
+class LUTRemap:
+    """
+    Clip and remap raw uint16 frames (deci-Kelvin) to uint8 via a lookup table.
+
+    The 65536-entry LUT realises the same linear transformation as `remap`,
+    but with clipping to `curr_range` built in, so that a frame is clipped
+    and remapped by a single gather into a reused output buffer.
+    The LUT is rebuilt only when the requested range changes; the values
+    below and above the new range are filled, and only those within it are
+    computed.
+
+    Usage:
+
+        mi48.read_raw = True
+        lutremap = LUTRemap()
+        ...
+        data, header = mi48.read()
+        frui8 = lutremap(data, curr_range=(lo, hi))
+    """
+    nmax = 65536
+
+    def __init__(self, new_range=(0, 255)):
+        self.new_range = new_range
+        self.lut = np.zeros(self.nmax, dtype=np.uint8)
+        # relative position ramp, sliced when rebuilding the LUT
+        self._ramp = np.arange(self.nmax, dtype=np.float64)
+        self.curr_range = None
+        self.out = None
+
+    def set_range(self, lo, hi):
+        """
+        Set the current range [`lo`, `hi`] in raw units; rebuild LUT if changed.
+
+        Values below `lo` map to the low end, and values above `hi` map to the
+        high end of `new_range`.
+        """
+        # keep a span of at least one raw unit, also at the top of the range
+        lo = min(max(int(lo), 0), self.nmax - 2)
+        hi = min(max(int(hi), lo + 1), self.nmax - 1)
+        if (lo, hi) == self.curr_range:
+            return
+        lo2, hi2 = self.new_range
+        # the arithmetic, in float64, and the truncation below are those
+        # of remap, so that the LUT matches it exactly
+        relpos = self._ramp[:hi - lo + 1] / float(hi - lo)
+        self.lut[:lo] = lo2
+        self.lut[lo: hi + 1] = lo2 + relpos * (hi2 - lo2)
+        self.lut[hi + 1:] = hi2
+        self.curr_range = (lo, hi)
+
+    def __call__(self, data, curr_range=None):
+        """
+        Return the uint8 remap of raw `data`, clipped to `curr_range`.
+
+        If `curr_range` is not specified, assume it is defined by the data
+        limits. The returned array is an internal buffer that is overwritten
+        on the next call; copy it if it must persist.
+        """
+        if curr_range is None:
+            curr_range = (data.min(), data.max())
+        self.set_range(*curr_range)
+        if self.out is None or self.out.shape != data.shape:
+            self.out = np.empty(data.shape, dtype=np.uint8)
+        np.take(self.lut, data, out=self.out)
+        return self.out
+
+class FrameHistogram:
+    """
+    Fixed-bin histogram of frames, computed once per frame for all consumers.
+
+    The bins are `bins` equal intervals of `range`, in Celsius. Raw uint16
+    frames (deci-Kelvin) are binned by a precomputed 65536-entry table of
+    bin indexes and one `np.bincount`; Celsius frames by the equivalent
+    float64 arithmetic, which counts as `np.histogram(frame, hist.edges)`.
+    Values outside `range` are not counted.
+
+    If `decay` is given, `cumulative` holds the decayed sum of the counts
+    of all frames so far: cumulative = decay * cumulative + counts.
+    `contrast_range` derives a display range from the counts, e.g. for
+    `LUTRemap` or `FrameRenderer`.
+
+    Usage:
+
+        mi48.read_raw = True
+        hist = FrameHistogram(bins=100, range=(15, 65), decay=0.9)
+        ...
+        counts = hist(frame)
+        lo, hi = hist.contrast_range(0.01, 0.01, raw=True)
+        img = render(frame, curr_range=(lo, hi))
+    """
+    nmax = 65536
+
+    def __init__(self, bins=50, range=(0, 100), decay=None):
+        lo, hi = range
+        self.nbins = bins
+        self.range = (float(lo), float(hi))
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.raw_edges = (self.edges - KELVIN_0) * 10
+        # bin of each raw value; values out of range go to bin `bins`
+        raw = np.arange(self.nmax)
+        index = np.searchsorted(self.raw_edges, raw, side='right') - 1
+        # the top edge belongs to the last bin, as in np.histogram
+        index[raw == self.raw_edges[-1]] = bins - 1
+        index[(index < 0) | (index >= bins)] = bins
+        self._raw_index = index.astype(np.uint16 if bins < self.nmax - 1
+                                       else np.int32)
+        self._index = None
+        self._scaled = None
+        self.decay = decay
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.cumulative = np.zeros(bins)
+        self.n_frames = 0
+
+    def _bin_index(self, data):
+        """Return the bin index of each element of `data`, into a reused buffer"""
+        if self._index is None or self._index.shape != data.shape:
+            self._index = np.empty(data.shape, dtype=self._raw_index.dtype)
+        if data.dtype == np.uint16:
+            return np.take(self._raw_index, data, out=self._index)
+        lo, hi = self.range
+        if self._scaled is None or self._scaled.shape != data.shape:
+            self._scaled = np.empty(data.shape, dtype=np.float64)
+        # bin in float64, then move values rounded across an edge into the
+        # bin of `edges` they belong to, as np.histogram does
+        scaled = np.subtract(data, lo, out=self._scaled, dtype=np.float64)
+        scaled *= self.nbins / (hi - lo)
+        outside = ~((data >= lo) & (data <= hi))
+        scaled[outside] = 0
+        index = self._index
+        np.copyto(index, scaled, casting='unsafe')
+        # the top edge belongs to the last bin
+        np.minimum(index, self.nbins - 1, out=index)
+        index[data < self.edges[index]] -= 1
+        index[(data >= self.edges[index + 1]) & (index != self.nbins - 1)] += 1
+        # out of range, including NaN, goes to nbins
+        index[outside] = self.nbins
+        return index
+
+    def update(self, data):
+        """Bin the raw uint16 or Celsius `data`; return the counts"""
+        index = self._bin_index(data)
+        counts = np.bincount(index.ravel(), minlength=self.nbins + 1)
+        self.counts[:] = counts[:self.nbins]
+        if self.decay is not None:
+            self.cumulative *= self.decay
+            self.cumulative += self.counts
+        self.n_frames += 1
+        return self.counts
+
+    def __call__(self, data):
+        return self.update(data)
+
+    def contrast_range(self, c0=0.01, c1=0.01, cumulative=False, raw=False):
+        """
+        Return the (lo, hi) range that leaves out the fractions `c0` and `c1`
+        of the counted values at the bottom and at the top.
+
+        The limits are bin edges, in Celsius or, if `raw`, in raw units.
+        With `cumulative`, the decayed cumulative histogram is used, which
+        steadies the range from frame to frame.
+        """
+        counts = self.cumulative if cumulative else self.counts
+        csum = np.cumsum(counts)
+        total = csum[-1]
+        edges = self.raw_edges if raw else self.edges
+        if total == 0:
+            return edges[0], edges[-1]
+        ilo = np.searchsorted(csum, c0 * total, side='right')
+        ihi = np.searchsorted(csum, (1. - c1) * total, side='left')
+        ihi = max(min(ihi, self.nbins - 1), ilo)
+        return edges[ilo], edges[ihi + 1]
+
+    def clear(self):
+        self.counts[:] = 0
+        self.cumulative[:] = 0
+        self.n_frames = 0
+
 def get_default_outfile(src_id=None, ext='csv'):
     """Yield a timestamped filename with specified extension."""
     ts = time.strftime('%Y%m%d-%H%M%S', time.localtime())
@@ -179,37 +405,19 @@ def get_colormap(colormap='rainbow2', nc=None):
 
     `colormap` is either from open cv, matplotlib or explicitly defined above.
     If `nc` is not None, return a quantized colormap with `nc` different colors.
+
+    LUTs come from the colormap registry in senxor.colormap, which caches
+    them, so repeated calls cost a dictionary lookup. A LUT array passed
+    as `colormap` is returned as is.
     """
-    try:
-        # use defualt opencv maps or explicitly defined above
-        cmap = colormaps[colormap]
-    except KeyError:
-        cmap = cmapy.cmap(colormap)
-    if nc is not None:
-        # some names appear in both OpenCV (int), and Matplotlib (LUT)
-        # attempt to pick up the one from Matplotlib
-        if isinstance(cmap, int):
-            try:
-                cmap = cmapy.cmap(colormap)
-            except KeyError:
-                # return non-quantized CV cmap
-                return cmap
-        # we need to create a LUT with 256 entries, and these entries
-        # are indexes in the actual color map; there are `nc` such indexes
-        nmax = 256
-        # number of indexes per color
-        ipc = nmax // nc
-        # If nmax is not multiple of nc, then we have to patch up the LUT.
-        # Below, we choose to patch up with the highest index
-        delta = nmax % nc
-        lut = [int((j // ipc) / (nc-1) * (nmax-1)) for j in range(nmax-delta)]
-        lut += [nmax-1,] * delta
-        cmap = np.array([cmap[i] for i in lut], dtype='uint8')
-    return cmap
+    if not isinstance(colormap, str):
+        return colormap
+    return get_lut(colormap, nc)
 
 
 def cv_render(data, title='', resize=(800, 620), colormap='jet',
-              interpolation=cv.INTER_CUBIC, display=True, n_colors=None):
+              interpolation=cv.INTER_CUBIC, display=True, n_colors=None,
+              out=None):
     """
     Render and display a 2D numpy array data of type uint8, using OpenCV.
     
@@ -219,20 +427,105 @@ def cv_render(data, title='', resize=(800, 620), colormap='jet',
     
     If `display` is true, render the image in an OpenCV-controled window.
     Else, return the OpenCV image object.
+
+    With a fixed `resize` and a named `colormap`, the image is rendered
+    by a cached `FrameRenderer`, into `out` if given. Without `out`, a
+    displayed image is the renderer's reused buffer, overwritten by the
+    next call, while an image that is only returned is a new array.
     """
-    # colormap may be either a colormap list or a string
-    cmap = get_colormap(colormap, n_colors)
-    cvcol = cv.applyColorMap(data, cmap)
-    if isinstance(resize, tuple) or isinstance(resize, list):
-        cvresize =  cv.resize(cvcol, dsize=resize,
-                            interpolation=interpolation)
+    if isinstance(resize, (tuple, list)) and isinstance(colormap, str):
+        render = _get_renderer(tuple(resize), colormap, n_colors, interpolation)
+        if out is None and not display:
+            out = np.empty(render.dsize[::-1] + (3,), dtype=np.uint8)
+        cvresize = render(data, out=out)
     else:
-        cvresize =  cv.resize(cvcol, dsize=None, fx=resize, fy=resize,
-                            interpolation=interpolation)
+        # colormap may be either a colormap list or a string
+        cmap = get_colormap(colormap, n_colors)
+        cvcol = cv.applyColorMap(data, cmap)
+        if isinstance(resize, tuple) or isinstance(resize, list):
+            cvresize =  cv.resize(cvcol, dsize=resize, dst=out,
+                                interpolation=interpolation)
+        else:
+            cvresize =  cv.resize(cvcol, dsize=None, fx=resize, fy=resize,
+                                dst=out, interpolation=interpolation)
     if display:
         cv.imshow(title, cvresize)
     return cvresize
 
+@lru_cache(maxsize=16)
+def _get_renderer(dsize, colormap, n_colors, interpolation):
+    """Return the FrameRenderer of `cv_render`, for the most recent settings"""
+    return FrameRenderer(dsize, colormap, n_colors, interpolation)
+
+class FrameRenderer:
+    """
+    Render frames to resized BGR images through cached lookup tables.
+
+    Raw uint16 frames (deci-Kelvin) are clipped, remapped and coloured by a
+    single gather through a 65536-entry BGR LUT, built for the current range
+    and colormap and rebuilt only when either changes; uint8 frames, e.g.
+    after `remap` and filtering, go through the 256-entry colormap LUT.
+    The coloured frame is then resized to the fixed output size `dsize`.
+    All buffers are reused, so there are no per-frame allocations and no
+    intermediates beyond the coloured frame and the output image.
+
+    Usage:
+
+        mi48.read_raw = True
+        render = FrameRenderer((800, 620), colormap='rainbow2')
+        ...
+        data, header = mi48.read()
+        frame = data_to_frame(data, mi48.fpa_shape)
+        cv.imshow('Thermal', render(frame, curr_range=(lo, hi)))
+    """
+    def __init__(self, dsize=(800, 620), colormap='jet', n_colors=None,
+                 interpolation=cv.INTER_CUBIC):
+        self.dsize = tuple(dsize)
+        self.interpolation = interpolation
+        self.lutremap = LUTRemap()
+        self.lut = np.empty((LUTRemap.nmax, 3), dtype=np.uint8)
+        self.curr_range = None
+        self.bgr = None
+        self.out = None
+        self.set_colormap(colormap, n_colors)
+
+    def set_colormap(self, colormap, n_colors=None):
+        """Set the colormap; see `get_colormap`"""
+        cmap = get_colormap(colormap, n_colors)
+        self.cmap = np.ascontiguousarray(cmap, dtype=np.uint8).reshape(256, 3)
+        self.curr_range = None
+
+    def set_range(self, lo, hi):
+        """Set the current range in raw units; rebuild the raw LUT if changed"""
+        self.lutremap.set_range(lo, hi)
+        if self.lutremap.curr_range != self.curr_range:
+            np.take(self.cmap, self.lutremap.lut, axis=0, out=self.lut)
+            self.curr_range = self.lutremap.curr_range
+
+    def __call__(self, frame, curr_range=None, out=None):
+        """
+        Return the BGR image of a raw uint16 or an uint8 `frame`.
+
+        `curr_range` applies to raw frames only; if not specified, assume
+        it is defined by the frame limits. If `out` is None, the image is
+        an internal buffer that is overwritten on the next call.
+        """
+        if self.bgr is None or self.bgr.shape[:2] != frame.shape:
+            self.bgr = np.empty(frame.shape + (3,), dtype=np.uint8)
+        if frame.dtype == np.uint8:
+            np.take(self.cmap, frame, axis=0, out=self.bgr)
+        else:
+            if curr_range is None:
+                curr_range = (frame.min(), frame.max())
+            self.set_range(*curr_range)
+            np.take(self.lut, frame, axis=0, out=self.bgr)
+        if out is None:
+            if self.out is None:
+                self.out = np.empty(self.dsize[::-1] + (3,), dtype=np.uint8)
+            out = self.out
+        cv.resize(self.bgr, self.dsize, dst=out, interpolation=self.interpolation)
+        return out
+
 def cv_filter(data, parameters=None, use_median=True, use_bilat=True,
                      use_nlm=False):
     """
@@ -277,6 +570,135 @@ def cv_filter(data, parameters=None, use_median=True, use_bilat=True,
         print('NLMeans cost [ms]: {:8.4f}'.format(time.time() - t0))
     return filtered
 
+
+def _median_stage(src, dst, ksize=5):
+    cv.medianBlur(src, ksize, dst)
+
+def _bilateral_stage(src, dst, d=7, sigmaColor=23, sigmaSpace=23):
+    cv.bilateralFilter(src, d, sigmaColor, sigmaSpace, dst)
+
+def _nlm_stage(src, dst, h=5, templateWindowSize=5, searchWindowSize=11):
+    cv.fastNlMeansDenoising(src, dst, h, templateWindowSize, searchWindowSize)
+
+
+class FilterStage:
+    """
+    A single stage of a `FilterPipeline`.
+
+    `kind` selects the OpenCV filter (see `FilterPipeline.kinds`); `params`
+    are passed to it on each call and may be changed at runtime, e.g.
+    through a `KeyboardHandler` registered on `stage.params`.
+    """
+    def __init__(self, kind, name=None, enabled=True, **params):
+        self.kind = kind
+        self.name = kind if name is None else name
+        self.func = FilterPipeline.kinds[kind]
+        self.enabled = enabled
+        self.params = params
+        self.buf = None
+        # cost of the last call and its rolling average, in ms
+        self.cost = 0.
+        self.av_cost = RollingAverageFilter(N=20)
+
+    def __repr__(self):
+        return '{}({}, enabled={}, {})'.format(self.__class__.__name__,
+                                    self.name, self.enabled, self.params)
+
+
+class FilterPipeline:
+    """
+    Spatial filtering based on an ordered, configurable list of stages.
+
+    Requires uint8 and returns uint8 data, like `cv_filter`, but each stage
+    writes into its own preallocated buffer, records its own cost, and can
+    be enabled or disabled at runtime without rebuilding the pipeline.
+
+    Usage:
+
+        spatial_filter = FilterPipeline([
+            FilterStage('median', ksize=3),
+            FilterStage('bilateral', d=5, sigmaColor=27, sigmaSpace=27),
+            FilterStage('nlm', enabled=False),
+        ])
+        ...
+        filt_uint8 = spatial_filter(frui8)
+        spatial_filter.toggle('nlm')
+        print(spatial_filter.timing())
+
+    The returned array is the buffer of the last enabled stage, which is
+    overwritten on the next call; copy it if it must persist.
+    """
+    kinds = {
+        'median': _median_stage,
+        'bilateral': _bilateral_stage,
+        'nlm': _nlm_stage,
+    }
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Filter stage names must be unique: {names}')
+        self.shape = None
+
+    @classmethod
+    def from_cv_filter(cls, parameters=None, use_median=True, use_bilat=True,
+                       use_nlm=False):
+        """Return a pipeline equivalent to `cv_filter` with the same arguments"""
+        par = {'blur_ks': 5, 'd': 7, 'sigmaColor': 23, 'sigmaSpace': 23,
+               'h': 5, 'templateWindowSize': 5, 'searchWindowSize': 11}
+        if parameters is not None:
+            par.update(parameters)
+        return cls([
+            FilterStage('median', enabled=use_median, ksize=par['blur_ks']),
+            FilterStage('bilateral', enabled=use_bilat, d=par['d'],
+                        sigmaColor=par['sigmaColor'],
+                        sigmaSpace=par['sigmaSpace']),
+            FilterStage('nlm', enabled=use_nlm, h=par['h'],
+                        templateWindowSize=par['templateWindowSize'],
+                        searchWindowSize=par['searchWindowSize']),
+        ])
+
+    def __getitem__(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def enable(self, name, enabled=True):
+        self[name].enabled = enabled
+
+    def disable(self, name):
+        self.enable(name, False)
+
+    def toggle(self, name):
+        stage = self[name]
+        stage.enabled = not stage.enabled
+
+    def _allocate(self, shape):
+        for stage in self.stages:
+            stage.buf = np.empty(shape, dtype=np.uint8)
+        self.shape = shape
+
+    def __call__(self, data):
+        if data.shape != self.shape:
+            self._allocate(data.shape)
+        filtered = data
+        for stage in self.stages:
+            if not stage.enabled:
+                continue
+            t0 = time.perf_counter()
+            stage.func(filtered, stage.buf, **stage.params)
+            stage.cost = (time.perf_counter() - t0) * 1.e3
+            stage.av_cost(stage.cost)
+            filtered = stage.buf
+        return filtered
+
+    def timing(self):
+        """Return a dictionary of the rolling average cost [ms] per enabled stage"""
+        return {stage.name: stage.av_cost.av for stage in self.stages
+                if stage.enabled}
+
 def clip_frame(frame, minval=None, maxval=None, c0=0.0, c1=0.0):
     """
     Clip the lowest and highest of the `frame`.
@@ -298,22 +720,241 @@ def clip_frame(frame, minval=None, maxval=None, c0=0.0, c1=0.0):
 
 class TrueAverageFilter:
 
-    def __init__(self, depth):
+    def __init__(self, depth, shape=None, resync=None):
+        """
+        Boxcar (true) average filter over the last ``depth`` frames.
+
+        The average is maintained by a running sum, so that each update
+        costs O(1) per pixel regardless of ``depth``. The state is float32
+        and is updated in place; the shape is taken from ``shape`` or from
+        the first frame, so any FPA (or a scalar) can be filtered.
+        To bound the float32 rounding drift of the running sum, the sum is
+        recomputed from the frame buffer every ``resync`` updates
+        (64 * depth by default).
+
+        Usage:
+
+            av_filter = TrueAverageFilter(depth=8)
+            ...
+            av_frame = av_filter(frame)
+
+        The returned array is updated in place on the next call.
+        """
         self.depth = depth
-        self.buf = np.zeros(shape=(depth,62,80))
+        self.resync = 64 * depth if resync is None else resync
+        self.buf = None
         self.counter = 0
         self.ix = 0
         self.av = 0
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape):
+        shape = tuple(shape)
+        self.buf = np.zeros((self.depth,) + shape, dtype=np.float32)
+        self.sum = np.zeros(shape, dtype=np.float32)
+        self.av = np.zeros(shape, dtype=np.float32)
+        self.counter = 0
+        self.n_updates = 0
+        self.ix = 0
 
     def update(self, new):
+        if self.buf is None or np.shape(new) != self.buf.shape[1:]:
+            self._allocate(np.shape(new))
         if self.counter < self.depth: self.counter += 1
+        # replace the oldest frame in the ring and the running sum
+        self.sum -= self.buf[self.ix]
         self.buf[self.ix] = new
-        self.av = np.sum(self.buf, axis=0)
-        self.av = self.av / self.counter
+        self.sum += self.buf[self.ix]
+        self.n_updates += 1
+        if self.n_updates % self.resync == 0:
+            np.sum(self.buf, axis=0, out=self.sum)
+        np.multiply(self.sum, 1. / self.counter, out=self.av)
         self.ix += 1
         if self.ix > self.depth - 1: self.ix = 0
         return self.av
 
+    def clear(self):
+        self.buf = None
+        self.counter = 0
+        self.ix = 0
+        self.av = 0
+
+    def __call__(self, new):
+        return self.update(new)
+
+
+class EMAFilter:
+
+    def __init__(self, alpha=0.25, shape=None):
+        """
+        Exponential moving average filter with weight ``alpha`` of the new frame.
+
+        The state is float32 and is updated in place; the first frame
+        initialises the average. The shape is taken from ``shape`` or from
+        the first frame.
+
+        Usage:
+
+            ema_filter = EMAFilter(alpha=0.2)
+            ...
+            av_frame = ema_filter(frame)
+
+        The returned array is updated in place on the next call.
+        """
+        self.alpha = alpha
+        self.av = None
+        self.delta = None
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape):
+        self.av = np.zeros(shape, dtype=np.float32)
+        self.delta = np.zeros(shape, dtype=np.float32)
+        self.count = 0
+
+    def update(self, new):
+        if self.av is None or np.shape(new) != self.av.shape:
+            self._allocate(np.shape(new))
+        if self.count == 0:
+            self.av[...] = new
+        else:
+            np.subtract(new, self.av, out=self.delta)
+            self.delta *= self.alpha
+            self.av += self.delta
+        self.count += 1
+        return self.av
+
+    def clear(self):
+        self.av = None
+
+    def __call__(self, new):
+        return self.update(new)
+
+
+class TemporalMedianFilter:
+
+    def __init__(self, depth=5, shape=None):
+        """
+        Per-pixel median over the last ``depth`` frames.
+
+        Robust against transient outliers, e.g. spatter, at the cost of a
+        partial sort over ``depth`` values per pixel.
+        The frames are kept in a preallocated float32 ring and the median
+        is written into a reused output buffer.
+        """
+        self.depth = depth
+        self.buf = None
+        self.av = None
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape):
+        shape = tuple(shape)
+        self.buf = np.zeros((self.depth,) + shape, dtype=np.float32)
+        self.av = np.zeros(shape, dtype=np.float32)
+        self.counter = 0
+        self.ix = 0
+
+    def update(self, new):
+        if self.buf is None or np.shape(new) != self.buf.shape[1:]:
+            self._allocate(np.shape(new))
+        if self.counter < self.depth: self.counter += 1
+        self.buf[self.ix] = new
+        np.median(self.buf[:self.counter], axis=0, out=self.av)
+        self.ix += 1
+        if self.ix > self.depth - 1: self.ix = 0
+        return self.av
+
+    def clear(self):
+        self.buf = None
+
+    def __call__(self, new):
+        return self.update(new)
+
+
+class KalmanFilter:
+
+    def __init__(self, process_noise=1.e-3, measurement_noise=0.1,
+                 motion_gain=1., motion_sigma=3., shape=None):
+        """
+        Per-pixel scalar Kalman filter with motion-adaptive process noise.
+
+        A host-side alternative to the MI48 temporal filter (filter 1).
+        Each pixel is modelled as a constant temperature plus process noise.
+        The process noise of a pixel is inflated by the part of its squared
+        innovation (new frame minus estimate) that exceeds ``motion_sigma``
+        standard deviations of the expected innovation:
+
+            Q = process_noise + motion_gain * max(innov^2 - motion_sigma^2 * (P + R), 0)
+
+        so static pixels are averaged strongly, while pixels that change,
+        e.g. at a moving melt pool, follow the measurement with little lag.
+
+        ``process_noise`` and ``measurement_noise`` are variances in the
+        units of the frame squared, e.g. degC^2. The state is kept in
+        preallocated float32 arrays and updated in place.
+
+        Usage:
+
+            mi48.disable_filter(f1=True)
+            kalman = KalmanFilter(measurement_noise=0.2**2)
+            ...
+            frame = kalman(data_to_frame(data, mi48.fpa_shape))
+
+        The returned array is updated in place on the next call.
+        """
+        self.q = process_noise
+        self.r = measurement_noise
+        self.motion_gain = motion_gain
+        self.motion_sigma2 = motion_sigma**2
+        self.x = None
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape):
+        # estimate, its variance, innovation, gain and a scratch buffer
+        self.x = np.zeros(shape, dtype=np.float32)
+        self.P = np.zeros(shape, dtype=np.float32)
+        self.innov = np.zeros(shape, dtype=np.float32)
+        self.gain = np.zeros(shape, dtype=np.float32)
+        self.tmp = np.zeros(shape, dtype=np.float32)
+        self.count = 0
+
+    def update(self, new):
+        if self.x is None or np.shape(new) != self.x.shape:
+            self._allocate(np.shape(new))
+        if self.count == 0:
+            self.x[...] = new
+            self.P.fill(self.r)
+            self.count += 1
+            return self.x
+        self.count += 1
+        x, P, innov, gain, tmp = self.x, self.P, self.innov, self.gain, self.tmp
+        # innovation and motion-adaptive prediction of the variance:
+        # P = P + q + motion_gain * max(innov^2 - motion_sigma^2 * (P + r), 0)
+        np.subtract(new, x, out=innov)
+        np.add(P, self.r, out=gain)
+        gain *= -self.motion_sigma2
+        np.multiply(innov, innov, out=tmp)
+        gain += tmp
+        np.maximum(gain, 0., out=gain)
+        gain *= self.motion_gain
+        P += gain
+        P += self.q
+        # Kalman gain K = P / (P + r)
+        np.add(P, self.r, out=gain)
+        np.divide(P, gain, out=gain)
+        # correction of the estimate and its variance
+        innov *= gain
+        x += innov
+        np.subtract(1., gain, out=gain)
+        P *= gain
+        return self.x
+
+    def clear(self):
+        self.x = None
+
     def __call__(self, new):
         return self.update(new)
 
@@ -354,7 +995,100 @@ class RollingAverageFilter:
         return self.av
 
 
-class FibonacciAverageFilter:
+def fibonacci_weights(N=6, i_start=1):
+    """Return normalised Fibonacci weights for ``N`` frames, oldest first"""
+    w = np.array(FibonacciAverageFilter.fib[i_start: i_start + N], dtype=float)
+    return w / w.sum()
+
+def triangular_weights(N=6):
+    """Return normalised linearly increasing weights for ``N`` frames, oldest first"""
+    w = np.arange(1, N + 1, dtype=float)
+    return w / w.sum()
+
+def exponential_weights(N=6, alpha=0.5):
+    """
+    Return normalised exponential weights for ``N`` frames, oldest first.
+
+    The weight of each frame is (1 - alpha) times the weight of the next one.
+    """
+    w = (1. - alpha) ** np.arange(N - 1, -1, -1, dtype=float)
+    return w / w.sum()
+
+
+class WeightedWindowFilter:
+
+    def __init__(self, weights, initial=None, recursive=False,
+                 dtype=np.float32, copy=False):
+        """
+        Weighted average filter over the last ``len(weights)`` frames.
+
+        ``weights`` are ordered from the oldest to the newest frame and are
+        normalised here; see `fibonacci_weights`, `triangular_weights`
+        and `exponential_weights`.
+        The frames are kept in a preallocated ring of ``dtype`` and shape
+        (N, rows, cols) -- or (N,) for scalars such as frame min/max -- and
+        each output is a single contraction of the ring with the weights,
+        written into a reused buffer. That buffer is returned, and so is
+        overwritten by the next update, unless ``copy`` is true.
+
+        The ring is filled with ``initial``, or with the first frame.
+        If ``recursive`` is true, the output replaces the newest frame
+        in the ring, realising a feedback (IIR) filter.
+
+        Usage:
+
+            # Fibonacci-weighted average of frame minimum over 6 frames
+            min_filter = WeightedWindowFilter(fibonacci_weights(6))
+            ...
+            min_temp = min_filter(data.min())
+        """
+        self.dtype = dtype
+        self.copy = copy
+        w = np.asarray(weights, dtype=dtype)
+        self.N = len(w)
+        self.weights = w / w.sum()
+        # weights aligned with the ring, for each position of the newest frame
+        self._ring_weights = np.array([np.roll(self.weights, ix + 1)
+                                       for ix in range(self.N)])
+        self.recursive = recursive
+        self.buf = None
+        self.av = None
+        if initial is not None:
+            self._allocate(initial)
+
+    def _allocate(self, initial):
+        shape = np.shape(initial)
+        self.buf = np.empty((self.N,) + shape, dtype=self.dtype)
+        self.buf[...] = initial
+        self.av = np.empty(shape, dtype=self.dtype)
+        # 2D views for the contraction
+        self._buf2d = self.buf.reshape(self.N, -1)
+        self._av1d = self.av.reshape(-1)
+        self.ix = self.N - 1
+
+    def update(self, new):
+        """Update and return the weighted average estimate"""
+        if self.buf is None or np.shape(new) != self.buf.shape[1:]:
+            self._allocate(new)
+        self.ix += 1
+        if self.ix > self.N - 1: self.ix = 0
+        self.buf[self.ix] = new
+        np.dot(self._ring_weights[self.ix], self._buf2d, out=self._av1d)
+        if self.recursive:
+            self.buf[self.ix] = self.av
+        # return a scalar for scalar input, else the (copied) buffer
+        if not self.av.ndim:
+            return self.av[()]
+        return self.av.copy() if self.copy else self.av
+
+    def clear(self):
+        self.buf = None
+
+    def __call__(self, new):
+        return self.update(new)
+
+
+class FibonacciAverageFilter(WeightedWindowFilter):
 
     fib = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55]
 
@@ -362,30 +1096,26 @@ class FibonacciAverageFilter:
         """
         Fibonacci-weighted average filter over ``N`` frames.
 
+        The filter is recursive: the newest frame is replaced by the
+        weighted average. As before, the average is computed in float64
+        and every call returns a new array.
+
         Usage:
 
-            # establish rolling average over 20 frames
-            min_filter = RollingAverageFilter(initial_min, N=20)
+            # establish rolling average over 6 frames
+            min_filter = FibonacciAverageFilter(initial_min, N=6)
             ...
 
             min_temp = min_filter(measured_min)
         """
-        self.N = N
         self.s = i_start
         self.p = i_start + N
-        self.frames = [initial] * self.N
-        w = np.array(self.fib[self.s: self.p])
-        self.weights = np.asarray(w)/np.sum(w)
+        super().__init__(fibonacci_weights(N, i_start), initial=initial,
+                         recursive=True, dtype=np.float64, copy=True)
 
     def __call__(self, new):
         """Update the rolling average estimate"""
-        self.frames = self.frames[1:] + [new]
-        #print(len(self.frames))
-        self.frames[-1] = np.sum([w*f for w,f in
-                            zip(self.weights, self.frames)], axis=0)
-
-        #print(self.frames[-1].shape)
-        return self.frames[-1]
+        return self.update(new)
 
 
 class KeyboardHandler:
@@ -566,8 +1296,8 @@ def get_contour_stats(data, contours, minArea=None, min_sdev=None,
             cx = int(M['m10']/M['m00'])
             cy = int(M['m01']/M['m00'])
             centroid = (cx, cy)
-            centre_9_ix_iy = np.array([[cx+i, cy+j] for i in [-1, 0, +1] for j in [-1, 0, +1]], ndmin=2, dtype=int)
-            centre_5_ix_iy = np.array([[cx-1, cy], [cx, cy], [cx+1, cy], [cx, cy-1], [cx, cy+1], ], ndmin=2, dtype=int)
+            centre_9_ix_iy = (cx, cy) + _spot_kernel(9)[:, ::-1]
+            centre_5_ix_iy = (cx, cy) + _spot_kernel(5)[:, ::-1]
             metrics['centroid'] = centroid
             metrics['area'] = int(math.copysign(len( mask[mask != 0]), area))
             metrics['mean'] = data[mask != 0].mean()
@@ -599,6 +1329,213 @@ def get_contour_stats(data, contours, minArea=None, min_sdev=None,
     output = sorted(output, key=lambda L: L[2][sortby], reverse=True)
     return output
 
+def _get_blob_stats(data, labelled, minArea=None, min_sdev=None,
+                    mean_range=None, sortby='mean', with_masks=True,
+                    n_groups=1, width=None, connectivity=8):
+    """
+    Return the [(contour, mask, metrics)] lists of labelled blobs, per group.
+
+    `labelled` is the output of `cv.connectedComponentsWithStats` on `data`,
+    with `connectivity`.
+    With `n_groups` > 1, `data` holds that many frames of `width` columns
+    side by side, separated by one column; each blob belongs to the frame
+    it lies in, and its coordinates, contour and mask refer to that frame.
+    """
+    n_labels, labels, cc_stats, centroids = labelled
+    if n_labels < 2:
+        return [[] for _ in range(n_groups)]
+    ny, nx = data.shape
+    if width is None:
+        width = nx
+    count = cc_stats[1:, cv.CC_STAT_AREA]
+    flat_labels = labels.ravel()
+    values = data.ravel()
+    # mean and standard deviation from weighted label counts
+    _values = values.astype(np.float64)
+    s1 = np.bincount(flat_labels, weights=_values, minlength=n_labels)[1:]
+    s2 = np.bincount(flat_labels, weights=_values * _values,
+                     minlength=n_labels)[1:]
+    mean = s1 / count
+    sdev = np.sqrt(np.maximum(s2 / count - mean * mean, 0.))
+    # order statistics from pixel values sorted by label, then value;
+    # each label then occupies a contiguous segment of the sorted values
+    fg = flat_labels > 0
+    fg_values = values[fg]
+    # sort by value, then stably by label; a stable sort of uint16 labels
+    # is a radix sort, much faster than np.lexsort
+    order = np.argsort(fg_values)
+    fg_labels = flat_labels[fg][order]
+    if n_labels <= 65536:
+        fg_labels = fg_labels.astype(np.uint16)
+    sorted_values = fg_values[order[np.argsort(fg_labels, kind='stable')]]
+    ends = np.cumsum(count)
+    starts = ends - count
+    vmin = sorted_values[starts]
+    vmax = sorted_values[ends - 1]
+    median = 0.5 * (sorted_values[starts + (count - 1) // 2].astype(np.float64) +
+                    sorted_values[starts + count // 2])
+    # the frame (group) of each blob, and its column offset in `data`
+    cx = centroids[1:, 0].astype(int)
+    cy = centroids[1:, 1].astype(int)
+    group = cc_stats[1:, cv.CC_STAT_LEFT] // (width + 1)
+    x_offset = group * (width + 1)
+    # values at and around the centroid; note that y-index (row) comes first
+    offs_9 = _spot_kernel(9)[:, ::-1]
+    offs_5 = _spot_kernel(5)[:, ::-1]
+    x_lo, x_hi = x_offset[:, None], x_offset[:, None] + width - 1
+    ix_9 = np.clip(cx[:, None] + offs_9[:, 0], x_lo, x_hi)
+    iy_9 = np.clip(cy[:, None] + offs_9[:, 1], 0, ny - 1)
+    ix_5 = np.clip(cx[:, None] + offs_5[:, 0], x_lo, x_hi)
+    iy_5 = np.clip(cy[:, None] + offs_5[:, 1], 0, ny - 1)
+    columns = {
+        'area': -count,
+        'mean': mean,
+        'median': median,
+        'sdev': sdev,
+        'min': vmin,
+        'max': vmax,
+        'spread': vmax - vmin,
+        'center_9': data[iy_9, ix_9].mean(axis=1),
+        'center_5': data[iy_5, ix_5].mean(axis=1),
+        'center': data[cy, cx],
+    }
+    cx -= x_offset
+    # select blobs and sort them by the desired metric;
+    # the contour area is at most the pixel count, so the pixel count
+    # is a cheap pre-selection by minArea, refined on the contour below
+    keep = np.ones(n_labels - 1, dtype=bool)
+    if minArea is not None:
+        keep &= columns['area'] < minArea
+    if min_sdev is not None:
+        keep &= sdev >= min_sdev
+    if mean_range is not None:
+        keep &= (mean >= mean_range[0]) & (mean <= mean_range[1])
+    selected = np.flatnonzero(keep)
+    selected = selected[np.argsort(-columns[sortby][selected], kind='stable')]
+    # with 8-connectivity, trace the outer contours of all blobs at once:
+    # the top level of RETR_CCOMP holds one outer contour per blob,
+    # starting at its first pixel in raster order
+    outer = {}
+    if connectivity == 8 and len(selected):
+        contours, hierarchy = cv.findContours((labels > 0).view(np.uint8),
+                                    cv.RETR_CCOMP, cv.CHAIN_APPROX_SIMPLE)
+        for c, hc in zip(contours, hierarchy[0]):
+            if hc[3] < 0:
+                outer[labels[c[0, 0, 1], c[0, 0, 0]]] = c
+    output = [[] for _ in range(n_groups)]
+    keys = list(columns)
+    rows = zip(*(col[selected] for col in columns.values()))
+    rects = cc_stats[selected + 1, :cv.CC_STAT_AREA].tolist()
+    for i, row, (x, y, w, h) in zip(selected.tolist(), rows, rects):
+        label = i + 1
+        blob = labels[y:y+h, x:x+w] == label
+        x_off = int(x_offset[i])
+        x -= x_off
+        if label in outer:
+            contour = outer[label]
+            if x_off:
+                contour = contour - np.array([x_off, 0], dtype=contour.dtype)
+        else:
+            contours, _ = cv.findContours(blob.view(np.uint8), cv.RETR_EXTERNAL,
+                                          cv.CHAIN_APPROX_SIMPLE, offset=(x, y))
+            contour = max(contours, key=len)
+        if minArea is not None and\
+           not cv.contourArea(contour, oriented=True) < minArea:
+            continue
+        mask = None
+        if with_masks:
+            mask = np.zeros((ny, width), dtype='uint8')
+            mask[y:y+h, x:x+w] = blob
+        metrics = {'centroid': (int(cx[i]), int(cy[i]))}
+        metrics.update(zip(keys, row))
+        metrics['area'] = int(metrics['area'])
+        output[group[i]].append((contour, mask, metrics))
+    return output
+
+def get_label_stats(data, binary, minArea=None, min_sdev=None,
+                    mean_range=None, sortby='mean', connectivity=8,
+                    with_masks=True):
+    """
+    Return a list of tupples: [(contour, mask, metrics)] for blobs in `binary`.
+
+    Drop-in alternative to `get_contour_stats` that takes the binary image
+    instead of its contours. The binary image is labelled once, and the
+    metrics of all blobs are computed together in a few vectorised passes,
+    so the cost hardly grows with the number of blobs.
+
+    The 'metrics' dictionary has the same keys as in `get_contour_stats`.
+    All blobs are foreground (hot on cold), so 'area' is negative and is
+    the number of pixels of the blob; holes in a blob are not part of it.
+    As in `get_contour_stats`, `minArea` applies to the oriented area of
+    the blob's contour.
+    The centroid is that of the blob pixels. Only the contour of each blob
+    is traced, within its bounding box; the full-frame `mask` is omitted
+    (None) if `with_masks` is false.
+    """
+    labelled = cv.connectedComponentsWithStats(
+        binary.astype(np.uint8, copy=False), connectivity=connectivity,
+        ltype=cv.CV_32S)
+    return _get_blob_stats(data, labelled, minArea=minArea, min_sdev=min_sdev,
+                           mean_range=mean_range, sortby=sortby,
+                           with_masks=with_masks, connectivity=connectivity)[0]
+
+def get_hot_cold_stats(data, hot, cold, minArea=None, min_sdev=None,
+                       mean_range=None, sortby='mean', connectivity=8,
+                       with_masks=True, buffers=None):
+    """
+    Return the `get_label_stats` lists of the `hot` and the `cold` binary images.
+
+    Both classes are labelled in one connected-components pass, on an image
+    holding the hot and the cold binary side by side, with a separating
+    column, so that touching hot and cold blobs remain apart.
+    `buffers` is an optional dictionary in which the side-by-side images
+    are kept between calls.
+    """
+    ny, nx = data.shape
+    if buffers is None:
+        buffers = {}
+    if buffers.get('binary') is None or buffers['binary'].shape != (ny, 2*nx+1):
+        buffers['binary'] = np.zeros((ny, 2*nx+1), dtype=np.uint8)
+        buffers['data'] = np.zeros((ny, 2*nx+1), dtype=data.dtype)
+    binary, _data = buffers['binary'], buffers['data']
+    if _data.dtype != data.dtype:
+        _data = buffers['data'] = np.zeros((ny, 2*nx+1), dtype=data.dtype)
+    binary[:, :nx] = hot
+    binary[:, nx+1:] = cold
+    _data[:, :nx] = data
+    _data[:, nx+1:] = data
+    labelled = cv.connectedComponentsWithStats(binary, connectivity=connectivity,
+                                               ltype=cv.CV_32S)
+    hot_stats, cold_stats = _get_blob_stats(_data, labelled, minArea=minArea,
+                            min_sdev=min_sdev, mean_range=mean_range,
+                            sortby=sortby, with_masks=with_masks,
+                            n_groups=2, width=nx, connectivity=connectivity)
+    return hot_stats, cold_stats
+
+@lru_cache(maxsize=None)
+def _spot_kernel(n):
+    """
+    Return the read-only (k, 2) array of (row, col) offsets of an `n`-pixel spot.
+
+    The special cases n = 1, 3, 5, 6 are those of `get_ipx_1D`; otherwise
+    n must be (2q+1)^2 and the spot is a square.
+    """
+    special = {
+        1: [(0, 0)],
+        3: [(0, 0), (0, -1), (0, 1)],
+        5: [(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)],
+        6: [(0, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)],
+    }
+    try:
+        kernel = np.array(special[n])
+    except KeyError:
+        q, r = int(np.sqrt(n) // 2), int(np.sqrt(n) % 2)
+        assert r == 1
+        offs = range(-q, q+1)
+        kernel = np.array(list(itertools.product(offs, offs)))
+    kernel.setflags(write=False)
+    return kernel
+
 def get_ipx_1D(icol_irow, n=9, ncols=80):
     """
     Return the 1-D vector indexes of the `n` pixels centered on `icol_irow`
@@ -606,39 +1543,87 @@ def get_ipx_1D(icol_irow, n=9, ncols=80):
     """
     ipc, ipr = icol_irow
     ipx = ncols * ipr + ipc-1
-
-    # special cases first
-    if n == 1:
-        ipx = [ipx]
-        return ipx
-    if n == 3:
-        ipx = [ipx, ipx-1, ipx+1]
-        return ipx
-    if n == 5:
-        ipx = [ipx, ipx-1, ipx+1, ipx-ncols, ipx+ncols]
-        return ipx
-    if n == 6:
-        ipx = [ipx, ipx-ncols-1, ipx-ncols+1, ipx+ncols-1, ipx+ncols+1]
-        return ipx
-
-    # if n == (2q+1)^2
-    q, r = int(np.sqrt(n) // 2), int(np.sqrt(n) % 2)
-    assert r == 1
-    offs = range(-q, q+1)
-    ix_offs = [coloffs + ncols * rowoffs for (rowoffs, coloffs)
-               in itertools.product(offs, offs)]
-    ipx = [ipx + offs for offs in ix_offs]
-    return ipx
+    kernel = _spot_kernel(n)
+    return (ipx + kernel[:, 0] * ncols + kernel[:, 1]).tolist()
 
 def get_spot_offsets(n=9):
-    q, r = int(np.sqrt(n) // 2), int(np.sqrt(n) % 2)
-    assert r == 1
-    offs = range(-q, q+1)
-    return np.array(list(itertools.product(offs,offs)))
+    return _spot_kernel(n).copy()
 
 def get_spot_in_frame(centre=(40,31), n=9):
-    offs = get_spot_offsets()
-    return np.array(centre) + offs
+    """Return the (col, row) coordinates of the `n` pixels of the spot at `centre`"""
+    offs = _spot_kernel(n)
+    # the kernel offsets are (row, col)
+    return np.array(centre) + offs[:, ::-1]
+
+
+class SpotSampler:
+    """
+    Sample the pixels of many spots of a frame in one fancy-indexing call.
+
+    Each spot is `n` pixels centred on a (col, row) centre, with the
+    pixel patterns of `get_ipx_1D`. Calling the sampler returns an
+    (n_spots, n_pixels) array. The flat pixel indexes of the spots are
+    computed once per set of centres and reused while the centres persist.
+    Until centres are given, there are no spots and the samples are empty.
+
+    `border` decides what happens to spot pixels outside the frame:
+    'clip' samples the nearest frame pixel, 'nan' returns NaN for them.
+
+    Usage:
+
+        sampler = SpotSampler((62, 80), n=9)
+        sampler.set_centres([(40, 31), (10, 5), (79, 0)])
+        ...
+        spot_means = sampler(frame).mean(axis=1)
+    """
+    def __init__(self, shape, n=9, border='clip'):
+        if border not in ('clip', 'nan'):
+            raise ValueError(f'Border handling must be clip or nan: {border}')
+        self.shape = tuple(shape)
+        self.n = n
+        self.border = border
+        self.kernel = _spot_kernel(n)
+        # no spots until centres are given
+        self.set_centres(np.empty((0, 2), dtype=int))
+
+    def index(self, centres):
+        """Return the flat pixel indexes and validity of the spots at `centres`"""
+        ny, nx = self.shape
+        centres = np.asarray(centres, dtype=int).reshape(-1, 2)
+        rows = centres[:, 1, None] + self.kernel[None, :, 0]
+        cols = centres[:, 0, None] + self.kernel[None, :, 1]
+        valid = (rows >= 0) & (rows < ny) & (cols >= 0) & (cols < nx)
+        index = np.clip(rows, 0, ny - 1) * nx + np.clip(cols, 0, nx - 1)
+        return index, valid
+
+    def set_centres(self, centres):
+        """Precompute the pixel indexes for the spots at `centres`"""
+        self.centres = np.asarray(centres, dtype=int).reshape(-1, 2)
+        self._index, self._valid = self.index(self.centres)
+        self._all_valid = self._valid.all()
+        self.out = None
+
+    def __call__(self, frame, centres=None):
+        """
+        Return the (n_spots, n_pixels) samples of `frame`.
+
+        If `centres` is given and differs from the current ones, the spot
+        indexes are recomputed. The returned array is reused and is
+        overwritten on the next call.
+        """
+        if centres is not None and (
+                np.shape(centres) != self.centres.shape or
+                not np.array_equal(centres, self.centres)):
+            self.set_centres(centres)
+        dtype = frame.dtype
+        if self.border == 'nan' and not self._all_valid:
+            dtype = np.result_type(dtype, np.float16)
+        if self.out is None or self.out.dtype != dtype:
+            self.out = np.empty(self._index.shape, dtype=dtype)
+        np.take(frame.reshape(-1), self._index, out=self.out)
+        if self.border == 'nan' and not self._all_valid:
+            self.out[~self._valid] = np.nan
+        return self.out
 
 def stptime2float(x, fmt="%Y-%m-%dT%H:%M:%S.%f%z"):
     """
@@ -679,6 +1664,79 @@ def compose_display(img_list):
     return img
 
 
+def mosaic_layout(n_tiles):
+    """
+    Return the (rows, cols) layout of `n_tiles` tiles.
+
+    4, 6 and 8 tiles are laid out in two rows, as by `compose_display`;
+    up to 3, and 5 or 7 tiles, in a single row; more than 8 tiles in a
+    near-square grid.
+    """
+    if n_tiles in (4, 6, 8):
+        return 2, n_tiles // 2
+    if n_tiles > 8:
+        n_cols = math.ceil(math.sqrt(n_tiles))
+        return math.ceil(n_tiles / n_cols), n_cols
+    return 1, n_tiles
+
+
+class Mosaic:
+    """
+    Compose images of the same size into a mosaic on a preallocated canvas.
+
+    The canvas is allocated on the first call, and again only if the number,
+    size or type of the tiles change. Each call writes the tiles into their
+    slots of the canvas; a tile given as None is unchanged since the last
+    call, and is skipped. Unused slots are black.
+
+    `layout` is a (rows, cols) pair; by default, it is chosen by
+    `mosaic_layout` for the number of tiles.
+
+    Usage:
+
+        mosaic = Mosaic()
+        ...
+        canvas = mosaic([img1, img2, None, img4])   # img3 is unchanged
+    """
+    def __init__(self, layout=None):
+        self.layout = layout
+        self.canvas = None
+        self.slots = []
+
+    def _allocate(self, n_tiles, shape, dtype):
+        n_rows, n_cols = self.layout or mosaic_layout(n_tiles)
+        if n_rows * n_cols < n_tiles:
+            raise ValueError(f'Layout {n_rows}x{n_cols} cannot hold {n_tiles} tiles')
+        h, w = shape[:2]
+        self.canvas = np.zeros((n_rows * h, n_cols * w) + shape[2:], dtype=dtype)
+        self.slots = [self.canvas[i*h: (i+1)*h, j*w: (j+1)*w]
+                      for i in range(n_rows) for j in range(n_cols)][:n_tiles]
+        self.tile_shape = shape
+        self.tile_dtype = dtype
+
+    def __call__(self, img_list):
+        """Write the tiles of `img_list` into the canvas and return it"""
+        tiles = [img for img in img_list if img is not None]
+        if not tiles:
+            if self.canvas is None:
+                raise ValueError('First mosaic needs all tiles')
+            return self.canvas
+        shape, dtype = tiles[0].shape, tiles[0].dtype
+        if self.canvas is None or len(img_list) != len(self.slots) or\
+           shape != self.tile_shape or dtype != self.tile_dtype:
+            if len(tiles) != len(img_list):
+                raise ValueError('New mosaic layout needs all tiles')
+            self._allocate(len(img_list), shape, dtype)
+        for slot, img in zip(self.slots, img_list):
+            if img is None:
+                continue
+            if img.shape != shape:
+                raise ValueError(f'Mosaic tiles must have the same shape: '
+                                 f'{img.shape} vs. {shape}')
+            np.copyto(slot, img)
+        return self.canvas
+
+
 def annotate(image, isd, scale=1):
     """
     Annotate the `image` with elements of input data structure `isd`.
@@ -708,34 +1766,169 @@ def annotate(image, isd, scale=1):
     return image
 
 
+class _RateMeter:
+    """Rate of events per second over the last `n` events"""
+    def __init__(self, n=30):
+        self.times = deque(maxlen=n)
+
+    def tick(self, t=None):
+        self.times.append(time.time() if t is None else t)
+
+    @property
+    def rate(self):
+        if len(self.times) < 2 or self.times[-1] == self.times[0]:
+            return 0.
+        return (len(self.times) - 1) / (self.times[-1] - self.times[0])
+
+
 class Display:
     """
     This class helps to compose a display of a list of rendered images,
     optionally locating the window at a specified location on the screen.
+
+    By default, the images are composed on the preallocated canvas of a
+    `Mosaic`; images given as None are unchanged since the last call.
+
+    After `start`, calls only compose the images and hand them over, so
+    they may be made from an acquisition thread that never waits for the
+    GUI. The main thread calls `update` in a loop: it shows the latest
+    image handed over at the display rate, and processes window events.
+    Images handed over faster are dropped. HighGUI calls stay on the main
+    thread, since several backends (Cocoa, Qt) only support that.
+
+    Usage:
+
+        display = Display({'window_coord': None, 'window_title': 'Thermal',
+                           'display_fps': 10})
+
+        def acquire():
+            while not done.is_set():
+                ...
+                display([img])
+
+        display.start()
+        threading.Thread(target=acquire, daemon=True).start()
+        while display.update() != ord('q'):
+            pass
+        done.set()
+        display.stop()
+        print(display.stats())
     """
 
-    def __init__(self, options, composer=compose_display):
+    def __init__(self, options, composer=None):
         """
         Decide how to organize rendered images on the display.
         `options` is a dictionary:
 
             * `window_coord` -- in x,y pixels,
-            * `window_title` -- as a string.
+            * `window_title` -- as a string,
+            * `display_fps` -- optional display rate after `start`.
         """
         self.coord = options['window_coord']
         self.title = options['window_title'].upper()
-        self.composer = composer
+        self.composer = Mosaic() if composer is None else composer
+        self.display_fps = options.get('display_fps', 15)
         self.dir = Path(options.get('directory', 'images'))
         try:
             os.mkdir(self.dir)
         except FileExistsError:
             pass
+        self.img = None
+        self.started = False
+        self.lock = threading.Lock()
+        # latest image handed over and not yet shown, and the image shown
+        self.pending = None
+        self.front = None
+        self.is_new = False
+        self.next_time = 0.
+        self.keys = deque(maxlen=64)
+        self.n_frames = 0
+        self.n_shown = 0
+        self.n_dropped = 0
+        self.processing_rate = _RateMeter()
+        self.display_rate = _RateMeter()
 
     def __call__(self, img_list):
-        self.img = self.composer(img_list)
-        cv.imshow(self.title, self.img)
+        img = self.composer(img_list)
+        self.n_frames += 1
+        self.processing_rate.tick()
+        if not self.started:
+            self.img = img
+            self._show(img)
+            return
+        with self.lock:
+            if self.pending is None or self.pending.shape != img.shape:
+                self.pending = np.empty_like(img)
+            if self.is_new:
+                self.n_dropped += 1
+            np.copyto(self.pending, img)
+            self.is_new = True
+
+    def _show(self, img):
+        cv.imshow(self.title, img)
         if self.coord is not None:
             cv.moveWindow(self.title, *self.coord)
+        self.n_shown += 1
+        self.display_rate.tick()
+
+    def update(self):
+        """
+        Show the latest image handed over, if any, and process window
+        events until the next image is due; return the key pressed, or -1.
+
+        Call from the main thread, after `start`.
+        """
+        with self.lock:
+            if self.is_new:
+                self.pending, self.front = self.front, self.pending
+                self.is_new = False
+                img = self.front
+            else:
+                img = None
+        if img is not None:
+            self.img = img
+            self._show(img)
+        period = 1. / self.display_fps
+        self.next_time += period
+        # waitKey also lets HighGUI process window events
+        key = cv.waitKey(max(int((self.next_time - time.time()) * 1000), 1))
+        if time.time() > self.next_time + period:
+            # fell behind; do not try to catch up
+            self.next_time = time.time()
+        if key != -1:
+            self.keys.append(key)
+        return key
+
+    def start(self):
+        """Hand images over to `update`, which shows them at `display_fps`"""
+        self.started = True
+        self.next_time = time.time()
+
+    def stop(self):
+        """Stop handing images over, and close the window"""
+        if not self.started:
+            return
+        self.started = False
+        cv.destroyWindow(self.title)
+
+    def get_key(self):
+        """Return the next key pressed in the display window, or -1"""
+        try:
+            return self.keys.popleft()
+        except IndexError:
+            return -1
+
+    def stats(self):
+        """
+        Return the processing rate (images handed over per second), the
+        display rate, and the number of images shown and dropped.
+        """
+        return {
+            'processing_fps': self.processing_rate.rate,
+            'display_fps': self.display_rate.rate,
+            'n_shown': self.n_shown,
+            'n_dropped': self.n_dropped,
+        }
 
     def save(self, filename):
         """
@@ -941,6 +2134,157 @@ class ColdSpot:
         self.bg_mask[y0:y1, x0:x1] = False
 
 
+def box_points(boxes):
+    """
+    Return the (n, 4, 2) vertexes of `n` rotated boxes, as `cv.boxPoints`.
+
+    `boxes` is an (n, 5) array of rows: x_center, y_center, width, height,
+    angle of rotation in degrees, i.e. flattened `cv.minAreaRect` output.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 5)
+    # single precision arithmetic, as in OpenCV, so that the vertexes
+    # truncate to the same integer coordinates
+    cx, cy, w, h = boxes[:, :4].T.astype(np.float32)
+    angle = np.radians(boxes[:, 4])
+    b = np.cos(angle).astype(np.float32) * np.float32(0.5)
+    a = np.sin(angle).astype(np.float32) * np.float32(0.5)
+    pts = np.empty((len(boxes), 4, 2), dtype=np.float32)
+    pts[:, 0, 0] = cx - a * h - b * w
+    pts[:, 0, 1] = cy + b * h - a * w
+    pts[:, 1, 0] = cx + a * h - b * w
+    pts[:, 1, 1] = cy - b * h - a * w
+    pts[:, 2, 0] = cx + a * h + b * w
+    pts[:, 2, 1] = cy - b * h + a * w
+    pts[:, 3, 0] = cx - a * h + b * w
+    pts[:, 3, 1] = cy + b * h + a * w
+    return pts
+
+
+class SpotAnalyser:
+    """
+    Calculate the geometrical and background metrics of all hot (or cold)
+    spots of a frame at once, as an alternative to one `HotSpot` (or
+    `ColdSpot`) object per spot.
+
+    The background of each spot is taken from its extended box, as in
+    `HotSpot` and `ColdSpot`, but without full-frame masks or sorts: the
+    extreme values come from a sort of the pixels of the box only, and the
+    box sums from a summed-area table of the frame. `hot_and_cold`
+    analyses the hot and the cold spots of a frame together.
+
+    Calling the analyser returns a columnar table: a dictionary of arrays
+    with one row per spot, with the keys of `HotSpot.osd` (or `ColdSpot.osd`)
+    plus 'ix' and 'bg_mean' (mean of the extended box).
+    The contours are kept as a list under 'contour'.
+
+    Usage:
+
+        analyser = SpotAnalyser(p, kind='hot')
+        ...
+        stats = get_label_stats(frame, hs_binary, minArea=p['contour_minArea'])
+        spots = analyser(frame, stats)
+        hottest_bg = spots['bg'][0]
+    """
+    n_extreme = 12
+
+    def __init__(self, p, kind='hot'):
+        if kind not in ('hot', 'cold'):
+            raise ValueError(f'Spot kind must be hot or cold: {kind}')
+        self.p = p
+        self.kind = kind
+
+    def __call__(self, frame, contour_stats):
+        """
+        Return the table of spot metrics.
+
+        `contour_stats` is the output of `get_label_stats` or
+        `get_contour_stats`: a list of (contour, mask, metrics).
+        """
+        if self.kind == 'hot':
+            return self._analyse(frame, contour_stats, [])[0]
+        return self._analyse(frame, [], contour_stats)[1]
+
+    def hot_and_cold(self, frame, hs_stats, cs_stats):
+        """
+        Return the tables of the hot and of the cold spots, analysing both
+        together, e.g. the output of `get_hot_cold_stats`.
+        """
+        return self._analyse(frame, hs_stats, cs_stats)
+
+    def _analyse(self, frame, hs_stats, cs_stats):
+        ny, nx = frame.shape
+        n_hot = len(hs_stats)
+        contour_stats = list(hs_stats) + list(cs_stats)
+        n = len(contour_stats)
+        contours = [c for c, _, _ in contour_stats]
+        table = {'contour': contours}
+        # contour statistics as columns
+        if n:
+            for key in contour_stats[0][2]:
+                table[key] = np.array([m[key] for _, _, m in contour_stats])
+        # min area boxes as rows of x, y, width, height, angle
+        boxes = np.array([(*c, *s, a) for (c, s, a) in
+                          (cv.minAreaRect(c) for c in contours)],
+                         dtype=np.float64).reshape(-1, 5)
+        table['bbox_area'] = boxes[:, 2] * boxes[:, 3]
+        table['min_area_bbox'] = box_points(boxes).astype(int)
+        e = self.p['bbox_extension']
+        extended = boxes.copy()
+        extended[:, 2:4] += 2 * e
+        table['extended_bbox_rotated'] = box_points(extended).astype(int)
+        extended[:, 4] = 0
+        extended_bbox = box_points(extended).astype(int)
+        table['extended_bbox'] = extended_bbox
+        # extended box limits, constrained to the frame as in HotSpot._bg_mask
+        x0 = np.maximum(extended_bbox[:, :, 0].min(axis=1), 0)
+        x1 = np.minimum(extended_bbox[:, :, 0].max(axis=1), nx - 1)
+        y0 = np.maximum(extended_bbox[:, :, 1].min(axis=1), 0)
+        y1 = np.minimum(extended_bbox[:, :, 1].max(axis=1), ny - 1)
+        width = np.maximum(x1 - x0, 0)
+        height = np.maximum(y1 - y0, 0)
+        npix = width * height
+        # box sums from the summed-area table
+        sat = cv.integral(frame.astype(np.float64))
+        box_sum = sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table['bg_mean'] = box_sum / npix
+        # extreme values of each box, from a sort of the box only
+        k = self.n_extreme
+        n_lowest = np.minimum(npix, k)
+        lowest = np.zeros((n, k))
+        first = np.full(n, np.nan)
+        last = np.full(n, np.nan)
+        for i, (ya, yb, xa, xb) in enumerate(zip(y0.tolist(), y1.tolist(),
+                                                  x0.tolist(), x1.tolist())):
+            if ya < yb and xa < xb:
+                values = np.sort(frame[ya:yb, xa:xb], axis=None)
+                lowest[i, :len(values)] = values[:k]
+                first[i] = values[0]
+                last[i] = values[-1]
+        lowest_sum = lowest.sum(axis=1)
+        hot = {'ix': np.arange(n_hot)}
+        cold = {'ix': np.arange(n - n_hot)}
+        for key, column in table.items():
+            hot[key] = column[:n_hot]
+            cold[key] = column[n_hot:]
+        h, c = slice(None, n_hot), slice(n_hot, None)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # mean of the 12 lowest values in the extended box
+            hot['bg'] = lowest_sum[h] / n_lowest[h]
+            hot['bg_min'] = first[h]
+            # as ColdSpot: mean of the extended box less its 12 lowest values
+            cold['bg'] = (box_sum[c] - lowest_sum[c]) / (npix[c] - n_lowest[c])
+            cold['bg_max'] = last[c]
+        return hot, cold
+
+    @staticmethod
+    def to_osd(table):
+        """Return a list of per-spot dictionaries, as `HotSpot.osd`"""
+        keys = [key for key in table if key != 'ix']
+        return [{key: table[key][i] for key in keys}
+                for i in range(len(table['ix']))]
+
+
 class CVSegment:
     """
     A class for quick segmentation based on simple, Otsu, or Adaptive threshold.
@@ -964,12 +2308,15 @@ class CVSegment:
         return threshold, binary
 
     def _contour(self, data, binary):
-        contours, hierarchy = cv.findContours(binary, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
-        contours = get_contour_stats(data, contours, minArea=self.p['contour_minArea'])
+        # label the blobs once and get the stats of all of them together
+        contours = get_label_stats(data, binary, minArea=self.p['contour_minArea'])
         return contours
 
     def __init__(self, p):
         self.p = p
+        self.hs_analyser = SpotAnalyser(p, kind='hot')
+        self.hs_stats = []
+        self._hotspots = None
         if p['threshold_type'] == 'simple':
             self.threshold = partial(cv.threshold, thresh=p['threshold'],
                                      maxval=1, type=cv.THRESH_BINARY)
@@ -984,25 +2331,44 @@ class CVSegment:
                 thresholdType=cv.THRESH_BINARY,
                 blockSize=p['threshold_blocksize'], C=p['threshold_C'])
 
+    @property
+    def hotspots(self):
+        """`HotSpot` objects of the last frame, built on first access"""
+        if self._hotspots is None:
+            self._hotspots = [HotSpot(i, self.frame, c[0], c[1], c[2], self.p)\
+                              for i, c in enumerate(self.hs_stats)]
+        return self._hotspots
+
     def __call__(self, frame, frui8=None):
         # binarise
         if frui8 is None:
             frui8 = remap(frame)
+        self.frame = frame
         self.frui8 = frui8
         threshold, binary = self.threshold(frui8)
         self.binary = binary
         # contours of the hot spots and get the corresonding masks and stats
-        contours = (self._contour(frame, binary))
-        self.hotspots = [HotSpot(i, frame, c[0], c[1], c[2], self.p)\
-                    for i, c in enumerate(contours)]
+        self.hs_stats = self._contour(frame, binary)
+        self.hotspot_table = self.hs_analyser(frame, self.hs_stats)
+        self._hotspots = None
         # formulate the intermediate processing frames and output structured data
         self.out_frames = {'normed': self.frui8, 'binary': self.binary}
-        self.osd = {'n_hotspots': len(self.hotspots)}
+        self.osd = {'n_hotspots': len(self.hs_stats)}
 
 
 class CVSegmentCH:
     """
     A class for quick segmentation on both hot-on-cold and cold-on-hot split.
+
+    The metrics of the spots are computed for all spots at once by
+    `SpotAnalyser`, in `hotspot_table` and `coldspot_table`. The `hotspots`
+    and `coldspots` lists of `HotSpot` and `ColdSpot` objects, with their
+    full-frame masks, are built only if accessed.
+
+    If the parameter `single_pass` is true, pixels are classified as hot,
+    cold or neutral in one go, and hot and cold blobs are labelled in one
+    connected-components pass. The result is that of thresholding the
+    normalised frame and its inverse separately.
     """
     def _adaptive_threshold(self, frame, *args, **kwargs):
         threshold = None
@@ -1023,13 +2389,57 @@ class CVSegmentCH:
         return threshold, binary
 
     def _contour(self, data, binary):
-        contours, hierarchy = cv.findContours(binary, cv.RETR_TREE,
-                                              cv.CHAIN_APPROX_SIMPLE)
-        contours = get_contour_stats(data, contours, minArea=self.p['contour_minArea'])
+        # label the blobs once and get the stats of all of them together
+        contours = get_label_stats(data, binary, minArea=self.p['contour_minArea'])
         return contours
 
+    def _classify(self, frame):
+        """
+        Three-way threshold of `frame` into hot and cold binary images.
+
+        The conditions are those of self.threshold applied to `frame` and
+        to `255-frame`, expressed in terms of `frame` only.
+        """
+        p = self.p
+        if p['threshold_type'] == 'simple':
+            hot = frame > p['threshold']
+            cold = frame < 255 - p['threshold']
+        if p['threshold_type'] == 'otsu':
+            # Otsu's threshold of the inverted frame is not simply related
+            # to that of the frame if the histogram has gaps, so get both;
+            # only the thresholds are used, not the binary images
+            buf = self.buffers
+            if buf.get('inverted') is None or buf['inverted'].shape != frame.shape:
+                buf['inverted'] = np.empty_like(frame)
+                buf['otsu'] = np.empty_like(frame)
+            cv.bitwise_not(frame, buf['inverted'])
+            hs_threshold, _ = cv.threshold(frame, p['threshold'], 1,
+                                  cv.THRESH_BINARY+cv.THRESH_OTSU, buf['otsu'])
+            cs_threshold, _ = cv.threshold(buf['inverted'], p['threshold'], 1,
+                                  cv.THRESH_BINARY+cv.THRESH_OTSU, buf['otsu'])
+            hot = frame > hs_threshold + p['otsu_threshold_delta']
+            cold = frame < 255 - cs_threshold - p['otsu_threshold_delta']
+        if p['threshold_type'] == 'adaptive':
+            # local mean as in cv.adaptiveThreshold, shared by both classes
+            bs = p['threshold_blocksize']
+            mean = cv.boxFilter(frame, -1, (bs, bs), borderType=
+                                cv.BORDER_REPLICATE | cv.BORDER_ISOLATED)
+            diff = frame.astype(np.int16) - mean
+            idelta = math.ceil(p['threshold_C'])
+            hot = diff > -idelta
+            cold = diff < idelta
+        return hot.view(np.uint8), cold.view(np.uint8)
+
     def __init__(self, p):
         self.p = p
+        self.single_pass = p.get('single_pass', False)
+        self.buffers = {}
+        self.hs_analyser = SpotAnalyser(p, kind='hot')
+        self.cs_analyser = SpotAnalyser(p, kind='cold')
+        self.hs_stats = []
+        self.cs_stats = []
+        self._hotspots = None
+        self._coldspots = None
         if p['threshold_type'] == 'simple':
             self.threshold = partial(cv.threshold, thresh=p['threshold'],
                                      maxval=1, type=cv.THRESH_BINARY)
@@ -1044,30 +2454,69 @@ class CVSegmentCH:
                 thresholdType=cv.THRESH_BINARY,
                 blockSize=p['threshold_blocksize'], C=p['threshold_C'])
 
-    def __call__(self, frame, frui8=None):
-        # binarise
-        if frui8 is None:
-            frui8 = remap(frame)
-        self.frui8 = frui8
+    def _single_pass(self, frame):
+        """Segment hot and cold spots with one threshold and one labelling"""
+        hs_binary, cs_binary = self._classify(self.frui8)
+        self.hs_binary = hs_binary
+        self.cs_binary = cs_binary
+        self.hs_stats, self.cs_stats = get_hot_cold_stats(frame, hs_binary,
+                                        cs_binary,
+                                        minArea=self.p['contour_minArea'],
+                                        buffers=self.buffers)
+        # metrics of all spots, hot and cold, at once
+        self.hotspot_table, self.coldspot_table =\
+            self.hs_analyser.hot_and_cold(frame, self.hs_stats, self.cs_stats)
+
+    def _two_pass(self, frame):
+        """Segment hot and cold spots with separate thresholds and labellings"""
+        frui8 = self.frui8
         hs_threshold, hs_binary = self.threshold(frui8)
         cs_threshold, cs_binary = self.threshold(255-frui8)
         self.hs_binary = hs_binary
         self.cs_binary = cs_binary
         # contours of the hot spots and get the corresonding masks and stats
-        contours = (self._contour(frame, hs_binary))
-        self.hotspots = [HotSpot(i, frame, c[0], c[1], c[2], self.p)\
-                    for i, c in enumerate(contours)]
+        self.hs_stats = self._contour(frame, hs_binary)
         # contours of the cold spots and get the corresonding masks and stats
-        contours = (self._contour(frame, cs_binary))
-        self.coldspots = [ColdSpot(i, frame, c[0], c[1], c[2], self.p)\
-                    for i, c in enumerate(contours)]
+        self.cs_stats = self._contour(frame, cs_binary)
+        # metrics of all spots
+        self.hotspot_table = self.hs_analyser(frame, self.hs_stats)
+        self.coldspot_table = self.cs_analyser(frame, self.cs_stats)
+
+    @property
+    def hotspots(self):
+        """`HotSpot` objects of the last frame, built on first access"""
+        if self._hotspots is None:
+            self._hotspots = [HotSpot(i, self.frame, c[0], c[1], c[2], self.p)\
+                              for i, c in enumerate(self.hs_stats)]
+        return self._hotspots
+
+    @property
+    def coldspots(self):
+        """`ColdSpot` objects of the last frame, built on first access"""
+        if self._coldspots is None:
+            self._coldspots = [ColdSpot(i, self.frame, c[0], c[1], c[2], self.p)\
+                               for i, c in enumerate(self.cs_stats)]
+        return self._coldspots
+
+    def __call__(self, frame, frui8=None):
+        # binarise
+        if frui8 is None:
+            frui8 = remap(frame)
+        self.frame = frame
+        self.frui8 = frui8
+        if self.single_pass:
+            self._single_pass(frame)
+        else:
+            self._two_pass(frame)
+        self._hotspots = None
+        self._coldspots = None
         # formulate the intermediate processing frames and output structured data
         self.out_frames = {'normed': self.frui8,
                            'hs_binary': self.hs_binary,
                            'cs_binary': self.cs_binary}
         self.osd = {
-            'n_hotspots': len(self.hotspots),
-            'n_coldspots': len(self.coldspots)
+            'n_hotspots': len(self.hs_stats),
+            'n_coldspots': len(self.cs_stats)
         }
 
 
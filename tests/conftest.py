@@ -0,0 +1,6 @@
+# Make the senxor package importable when running pytest from the
+# repository root, since the package is not installed.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.colormap import (get_lut, quantise_lut, colormap_names,
+                             build_colormap_bundle, _mpl_lut, NMAX)
+from senxor.utils import colormaps, get_colormap
+
+RAMP = np.arange(NMAX, dtype=np.uint8).reshape(NMAX, 1)
+
+
+@pytest.mark.parametrize('name', sorted(colormaps))
+def test_bundle_matches_opencv_and_senxor_colormaps(name):
+    cmap = colormaps[name]
+    if isinstance(cmap, int):
+        expected = cv.applyColorMap(RAMP, cmap)
+    else:
+        expected = np.asarray(cmap, dtype=np.uint8).reshape(NMAX, 1, 3)
+    np.testing.assert_array_equal(get_lut(name), expected)
+
+
+@pytest.mark.parametrize('name', ['coolwarm', 'Greys', 'tab10', 'gist_earth'])
+def test_bundle_matches_matplotlib(name):
+    pytest.importorskip('matplotlib')
+    assert name not in colormaps
+    np.testing.assert_array_equal(get_lut(name), _mpl_lut(name))
+
+
+def test_reversed_luts():
+    np.testing.assert_array_equal(get_lut('viridis_r'), get_lut('viridis')[::-1])
+    np.testing.assert_array_equal(get_lut('jet', reverse=True),
+                                  get_lut('jet')[::-1])
+
+
+@pytest.mark.parametrize('n_colors', [2, 5, 7, 16])
+def test_quantised_lut_matches_reference(n_colors):
+    lut = get_lut('viridis')
+    # the quantisation of the former senxor.utils.get_colormap
+    ipc = NMAX // n_colors
+    delta = NMAX % n_colors
+    index = [int((j // ipc) / (n_colors - 1) * (NMAX - 1))
+             for j in range(NMAX - delta)] + [NMAX - 1] * delta
+    expected = np.array([lut[i] for i in index], dtype=np.uint8)
+    quantised = get_lut('viridis', n_colors)
+    np.testing.assert_array_equal(quantised, expected)
+    assert len(np.unique(quantised.reshape(NMAX, 3), axis=0)) == n_colors
+    with pytest.raises(ValueError):
+        quantise_lut(lut, 1)
+
+
+def test_luts_are_cached_and_read_only():
+    lut = get_lut('rainbow2', 8)
+    assert get_lut('rainbow2', 8) is lut
+    assert get_colormap('rainbow2', 8) is lut
+    assert not lut.flags.writeable
+    with pytest.raises(ValueError):
+        lut[0] = 0
+
+
+def test_unknown_colormap_does_not_import_matplotlib():
+    code = ('import sys\n'
+            'from senxor.colormap import get_lut\n'
+            'try:\n'
+            '    get_lut("no_such_map")\n'
+            'except KeyError:\n'
+            '    print("matplotlib" in sys.modules)\n')
+    root = Path(__file__).resolve().parent.parent
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, cwd=root)
+    assert result.stdout.strip() == 'False', result.stderr
+
+
+def test_bundle_rebuilds_identically(tmp_path):
+    pytest.importorskip('matplotlib')
+    path = tmp_path / 'colormaps.npz'
+    build_colormap_bundle(path)
+    # the full set of names depends on the installed Matplotlib
+    names = ('jet', 'rainbow2', 'viridis', 'inferno')
+    assert set(names) <= set(colormap_names(path))
+    for name in names:
+        np.testing.assert_array_equal(get_lut(name, path=str(path)),
+                                      get_lut(name))
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+from senxor.mi48 import MI48, KELVIN_0
+from senxor.correction import (load_distance_correction, distance_factor,
+                               DistanceCorrection, EmissivityCorrection)
+from senxor.roi import ROISet
+from senxor.utils import data_to_frame
+
+FPA_SHAPE = (80, 62)
+
+
+def test_distance_table():
+    distance, factor = load_distance_correction()
+    assert np.all(np.diff(distance) > 0)
+    assert distance[0] == 5 and factor[0] == 0.86
+    raw_distance, raw_factor = load_distance_correction(column='raw')
+    np.testing.assert_array_equal(raw_distance, distance)
+    assert raw_factor[5] == 1.09 and factor[5] == 1.07
+    with pytest.raises(ValueError):
+        factor[0] = 1.
+    with pytest.raises(ValueError):
+        load_distance_correction(column='smooth')
+
+
+def test_distance_factor_interpolates_and_holds_ends():
+    distance, factor = load_distance_correction()
+    np.testing.assert_allclose(distance_factor(distance), factor)
+    assert distance_factor(12.5) == pytest.approx((0.94 + 1.0) / 2)
+    assert distance_factor(0) == factor[0]
+    assert distance_factor(1e4) == factor[-1]
+    distance_map = np.full((62, 80), 20.)
+    assert distance_factor(distance_map).shape == (62, 80)
+
+
+def test_distance_table_fills_missing_factors(tmp_path):
+    path = tmp_path / 'distance.dat'
+    path.write_text('# distance raw clean\n'
+                    '10  1.0  1.0\n'
+                    '30  2.0      # no clean factor\n'
+                    '20  1.5  1.2\n'
+                    '40  3.0  3.0\n')
+    distance, factor = load_distance_correction(path)
+    np.testing.assert_array_equal(distance, [10, 20, 30, 40])
+    np.testing.assert_allclose(factor, [1.0, 1.2, 2.1, 3.0])
+
+
+def test_distance_correction():
+    rng = np.random.default_rng(0)
+    distance_map = rng.uniform(5, 200, (62, 80))
+    correct = DistanceCorrection(distance_map)
+    frame = rng.normal(30, 5, (62, 80)).astype(np.float32)
+    expected = frame * distance_factor(distance_map)
+    corrected = correct(frame.copy())
+    np.testing.assert_allclose(corrected, expected, rtol=1e-6)
+    out = np.empty_like(frame)
+    assert correct(frame, out=out) is out
+    np.testing.assert_allclose(correct.correct_rois([30., 40.], [12.5, 1e4]),
+                               [30. * 0.97, 40. * 1.75], rtol=1e-6)
+
+
+def raw_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(2800, 3500, (62, 80)).astype(np.uint16)
+
+
+def test_emissivity_correction_at_reference_is_default_conversion():
+    data = raw_frame()
+    to_celsius = EmissivityCorrection((62, 80), emissivity=0.95,
+                                      reference=0.95)
+    # float32 rounding of the Kelvin values; MI48.read returns float16
+    np.testing.assert_allclose(to_celsius(data), data / 10. + KELVIN_0,
+                               atol=1e-4)
+
+
+def test_emissivity_correction_matches_grey_body_formula():
+    data = raw_frame()
+    rois = ROISet((62, 80))
+    rois.add_rect('part', 10, 10, 30, 20)
+    rois.add_polygon('other', [(50, 5), (75, 5), (60, 50)])
+    emissivity = rois.value_map([0.3, 0.6], default=0.95)
+    to_celsius = EmissivityCorrection((62, 80), reference=0.95,
+                                      factor=1.05)
+    to_celsius.set_emissivity(emissivity)
+    kelvin = data / 10. * (0.95 / emissivity.astype(np.float64)) ** 0.25
+    expected = 1.05 * (kelvin + KELVIN_0)
+    np.testing.assert_allclose(to_celsius(data), expected, rtol=1e-5)
+    to_celsius.set_factor(None)
+    np.testing.assert_allclose(to_celsius(data), kelvin + KELVIN_0, rtol=1e-5)
+
+
+def test_emissivity_correction_of_flat_frames():
+    rng = np.random.default_rng(1)
+    to_celsius = EmissivityCorrection((62, 80), reference=0.95)
+    to_celsius.set_emissivity(rng.uniform(0.2, 1., (62, 80)))
+    frame = raw_frame()
+    # a flat frame as read from the MI48
+    data = frame.ravel()
+    np.testing.assert_array_equal(data_to_frame(data, FPA_SHAPE), frame)
+    corrected = to_celsius(data)
+    assert corrected.shape == data.shape
+    np.testing.assert_array_equal(data_to_frame(corrected, FPA_SHAPE),
+                                  to_celsius(frame))
+
+
+def test_invalid_emissivity():
+    with pytest.raises(ValueError):
+        EmissivityCorrection((62, 80), emissivity=0.)
+    to_celsius = EmissivityCorrection((62, 80))
+    with pytest.raises(ValueError):
+        to_celsius.set_emissivity(np.full((62, 80), 1.5))
+
+
+class FakeInterface:
+    """Return the given flat frames from read(), as an MI48 data interface"""
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+
+    def read(self, size_in_words):
+        return next(self.frames)
+
+
+def test_mi48_read_with_converter_returns_new_arrays():
+    frames = [raw_frame(seed).ravel() for seed in range(2)]
+    # an MI48 reading headerless frames, without the device set-up
+    mi48 = MI48.__new__(MI48)
+    mi48.interfaces = [None, FakeInterface(frames)]
+    mi48.fpa_shape = (62, 80)
+    mi48.capture_no_header = True
+    mi48.parse_header = False
+    mi48.read_raw = False
+    to_celsius = EmissivityCorrection((62, 80), reference=0.95)
+    mi48.set_converter(to_celsius)
+    first, header = mi48.read()
+    second, _ = mi48.read()
+    assert header is None
+    assert first.dtype == np.float32
+    assert not np.shares_memory(first, second)
+    np.testing.assert_array_equal(first, to_celsius(frames[0]))
+    np.testing.assert_array_equal(second, to_celsius(frames[1]))
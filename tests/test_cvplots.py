@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+from senxor import cvplots
+from senxor.timeseries import TimeSeries
+from senxor.utils import FrameHistogram
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def lines(rng, n=100, nvars=2):
+    data = np.empty((n, nvars + 1))
+    data[:, 0] = np.arange(n)
+    data[:, 1:] = rng.normal(30, 2, (n, nvars))
+    return data
+
+
+def check_image(plot, size):
+    image = plot.get_image()
+    assert image.shape == (size[1], size[0], 3)
+    assert image.dtype == np.uint8
+    # something is drawn over the cached background, which is untouched
+    assert not np.array_equal(image, plot.background)
+    assert plot.get_image() is image
+    return image
+
+
+def test_histogram(rng):
+    frame = rng.normal(30, 2, (62, 80))
+    hist = cvplots.Histogram(frame, figsize=(400, 300),
+                             param={'bins': 20, 'xlabel': 'T [C]'})
+    assert hist.engine.range == (frame.min(), frame.max())
+    counts, _ = np.histogram(frame, hist.engine.edges)
+    np.testing.assert_array_equal(hist.update(), counts)
+    first = check_image(hist, (400, 300)).copy()
+    hist.update(frame + 1)
+    np.testing.assert_array_equal(hist.counts,
+                                  np.histogram(frame + 1, hist.engine.edges)[0])
+    assert not np.array_equal(hist.get_image(), first)
+
+
+def test_histogram_shared_engine(rng):
+    engine = FrameHistogram(10, (20., 40.))
+    hist = cvplots.Histogram(None, figsize=(4, 3),
+                             param={'engine': engine, 'ylim': (0, 100)})
+    assert hist.ax.xlim == (20., 40.)
+    engine(rng.normal(30, 2, (62, 80)))
+    check_image(hist, (400, 300))
+
+
+@pytest.mark.parametrize('marker', ['+', 'x', 'o', 's', None])
+def test_line_plot(rng, marker):
+    data = lines(rng)
+    plot = cvplots.LinePlot(data, figsize=(600, 300),
+                            param={'labels': ['a', 'b'], 'marker': marker})
+    check_image(plot, (600, 300))
+    xlim, ylim = plot.ax.xlim, plot.ax.ylim
+    # data within the limits keep the axes; data outside extend them
+    plot.update(data[10:])
+    assert (plot.ax.xlim, plot.ax.ylim) == (xlim, ylim)
+    data = data.copy()
+    data[-1, 1] = 100.
+    plot.update(data)
+    assert plot.ax.ylim[1] > 100.
+    assert plot.ax.xlim == xlim
+    check_image(plot, (600, 300))
+
+
+def test_line_plot_fixed_limits(rng):
+    data = lines(rng)
+    plot = cvplots.LinePlot(data, figsize=(6, 3),
+                            param={'xlim': (0, 50), 'ylim': (25, 35)})
+    data[:, 1:] += 100
+    plot.update(data)
+    assert (plot.ax.xlim, plot.ax.ylim) == ((0, 50), (25, 35))
+    # everything is outside the plot area, which is left untouched
+    x0, y0, x1, y1 = plot.ax.area
+    image = plot.get_image()
+    np.testing.assert_array_equal(image[y0 + 1: y1, x0 + 1: x1],
+                                  plot.background[y0 + 1: y1, x0 + 1: x1])
+
+
+def test_line_plot_time_series(rng):
+    series = TimeSeries(n_vars=2, capacity=64)
+    for i, value in enumerate(rng.normal(30, 2, (40, 2))):
+        series.append(float(i), value)
+    plot = cvplots.LinePlot(series, figsize=(400, 300))
+    check_image(plot, (400, 300))
+    for i, value in enumerate(rng.normal(30, 2, (40, 2))):
+        series.append(40. + i, value)
+    np.testing.assert_array_equal(plot.update(), series.data())
+    assert plot.ax.xlim[1] >= 79.
+    check_image(plot, (400, 300))
+
+
+def test_live_plot_2y(rng):
+    data = lines(rng, nvars=1)
+    data2 = rng.normal(10, 1, (100, 2))
+    plot = cvplots.LivePlot2Y(data, data2, figsize=(600, 300),
+                              param={'labels': ['a', 'b', 'c'],
+                                     'ylabel': 'T', 'y2label': 'rate'})
+    check_image(plot, (600, 300))
+    # no data and no time series: nothing changes
+    assert plot.update()[0] is data
+    data2 = data2 * 10
+    plot.update(data=data, data2=data2)
+    assert plot.ax.y2lim[1] >= data2.max()
+    check_image(plot, (600, 300))
+    with pytest.raises(ValueError):
+        cvplots.LivePlot2Y(data, data2, param={'colors': ['r', 'g']})
+
+
+def test_live_plot_2y_time_series(rng):
+    series = TimeSeries(n_vars=1, capacity=64)
+    series2 = TimeSeries(n_vars=2, capacity=64)
+    for i in range(50):
+        series.append(float(i), rng.normal(30, 2, 1))
+        series2.append(float(i), rng.normal(10, 1, 2))
+    plot = cvplots.LivePlot2Y(series, series2, figsize=(400, 300))
+    data, data2 = plot.update()
+    np.testing.assert_array_equal(data, series.data())
+    np.testing.assert_array_equal(data2, series2.data()[:, 1:])
+    check_image(plot, (400, 300))
+
+
+@pytest.mark.parametrize('color, expected', [
+    ('C0', (180, 119, 31)), ('red', (0, 0, 255)), ('#102030', (48, 32, 16)),
+    ((1., 2., 3.), (1, 2, 3)),
+])
+def test_to_bgr(color, expected):
+    assert cvplots.to_bgr(color) == expected
+
+
+def test_to_bgr_unknown_colour():
+    with pytest.raises(ValueError):
+        cvplots.to_bgr('no such colour')
+
+
+@pytest.mark.parametrize('lo, hi', [(0, 1), (-3.2, 17.9), (25., 25.5), (0, 1000)])
+def test_nice_ticks(lo, hi):
+    ticks = cvplots.nice_ticks(lo, hi)
+    assert 3 <= len(ticks) <= 11
+    assert ticks[0] >= lo and ticks[-1] <= hi + 1e-9
@@ -0,0 +1,105 @@
+import threading
+import time
+import numpy as np
+import pytest
+from senxor import utils
+from senxor.utils import Display
+
+
+@pytest.fixture
+def highgui_calls(monkeypatch):
+    """Record the HighGUI calls, and whether they ran on the main thread"""
+    calls = []
+
+    def record(name, result=None):
+        def call(*args, **kwargs):
+            calls.append((name, threading.current_thread() is
+                          threading.main_thread()))
+            return result
+        return call
+
+    for name in ('imshow', 'moveWindow', 'destroyWindow'):
+        monkeypatch.setattr(utils.cv, name, record(name))
+    record_key = record('waitKey', ord('q'))
+
+    def wait_key(delay):
+        # waits as HighGUI does, without a window
+        time.sleep(delay / 1000)
+        return record_key(delay)
+
+    monkeypatch.setattr(utils.cv, 'waitKey', wait_key)
+    return calls
+
+
+def make_display(tmp_path, display_fps=50):
+    return Display({'window_coord': (0, 0), 'window_title': 'test',
+                    'display_fps': display_fps, 'directory': tmp_path})
+
+
+def test_handed_over_images_are_shown_on_main_thread(tmp_path, highgui_calls):
+    display = make_display(tmp_path)
+    display.start()
+    done = threading.Event()
+
+    def acquire():
+        for i in range(1, 200):
+            tile = np.full((62, 80, 3), i % 256, dtype=np.uint8)
+            display([tile, tile if i % 3 else None])
+            time.sleep(0.001)
+        done.set()
+
+    worker = threading.Thread(target=acquire)
+    worker.start()
+    keys = []
+    while not done.is_set():
+        keys.append(display.update())
+    worker.join()
+    display.update()
+    display.stop()
+    names = {name for name, _ in highgui_calls}
+    assert names == {'imshow', 'moveWindow', 'waitKey', 'destroyWindow'}
+    assert all(on_main for _, on_main in highgui_calls)
+    stats = display.stats()
+    assert 0 < stats['n_shown'] < 199
+    assert stats['n_shown'] + stats['n_dropped'] == 199
+    # the latest image was shown last
+    assert display.img.shape == (62, 160, 3)
+    assert np.all(display.img == 199)
+    assert set(keys) == {ord('q')}
+    assert display.get_key() == ord('q')
+
+
+def test_handing_over_does_not_wait_on_the_gui(tmp_path, highgui_calls,
+                                               monkeypatch):
+    # a window manager that takes 50 ms per event loop
+    monkeypatch.setattr(utils.cv, 'waitKey', lambda delay: time.sleep(0.05) or -1)
+    display = make_display(tmp_path, display_fps=100)
+    display.start()
+    done = threading.Event()
+    handover_times = []
+
+    def acquire():
+        tile = np.zeros((62, 80, 3), dtype=np.uint8)
+        for _ in range(50):
+            start = time.perf_counter()
+            display([tile])
+            handover_times.append(time.perf_counter() - start)
+        done.set()
+
+    worker = threading.Thread(target=acquire)
+    worker.start()
+    while not done.is_set():
+        display.update()
+    worker.join()
+    display.stop()
+    assert max(handover_times) < 0.05
+
+
+def test_synchronous_display(tmp_path, highgui_calls):
+    display = make_display(tmp_path)
+    tile = np.zeros((62, 80, 3), dtype=np.uint8)
+    for _ in range(3):
+        display([tile])
+    assert display.stats()['n_shown'] == 3
+    assert [name for name, _ in highgui_calls].count('imshow') == 3
+    assert display.get_key() == -1
@@ -0,0 +1,52 @@
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.utils import cv_filter, FilterPipeline, FilterStage
+
+
+@pytest.fixture
+def frui8():
+    rng = np.random.default_rng(0)
+    noise = rng.random((62, 80)).astype(np.float32)
+    return (cv.GaussianBlur(noise, (0, 0), 2) * 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize('use_median', [False, True])
+@pytest.mark.parametrize('use_bilat', [False, True])
+@pytest.mark.parametrize('use_nlm', [False, True])
+@pytest.mark.parametrize('parameters', [None, {'blur_ks': 3, 'd': 5,
+                                               'sigmaColor': 27,
+                                               'sigmaSpace': 27, 'h': 7}])
+def test_pipeline_matches_cv_filter(frui8, parameters, use_median, use_bilat,
+                                    use_nlm):
+    pipeline = FilterPipeline.from_cv_filter(parameters, use_median, use_bilat,
+                                             use_nlm)
+    expected = cv_filter(frui8, parameters, use_median, use_bilat, use_nlm)
+    # twice, since the second call reuses the stage buffers
+    for _ in range(2):
+        np.testing.assert_array_equal(pipeline(frui8), expected)
+
+
+def test_pipeline_stages_at_runtime(frui8):
+    pipeline = FilterPipeline.from_cv_filter()
+    pipeline.toggle('median')
+    np.testing.assert_array_equal(pipeline(frui8),
+                                  cv_filter(frui8, use_median=False))
+    pipeline.enable('median')
+    pipeline['bilateral'].params['d'] = 5
+    np.testing.assert_array_equal(pipeline(frui8),
+                                  cv_filter(frui8, {'d': 5}))
+    assert set(pipeline.timing()) == {'median', 'bilateral'}
+    pipeline.disable('median')
+    pipeline.disable('bilateral')
+    assert pipeline(frui8) is frui8
+
+
+def test_pipeline_stage_names():
+    with pytest.raises(ValueError):
+        FilterPipeline([FilterStage('median'), FilterStage('median')])
+    pipeline = FilterPipeline([FilterStage('median', name='m3', ksize=3),
+                               FilterStage('median', name='m5', ksize=5)])
+    with pytest.raises(KeyError):
+        pipeline['median']
+    assert pipeline['m5'].params == {'ksize': 5}
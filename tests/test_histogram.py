@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from senxor.mi48 import KELVIN_0
+from senxor.utils import FrameHistogram
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32, np.float16])
+def test_celsius_counts_match_np_histogram(rng, dtype):
+    hist = FrameHistogram(bins=100, range=(15, 65))
+    for _ in range(20):
+        frame = (rng.random((62, 80)) * 60 + 10).astype(dtype)
+        # values on the bin edges, and out of range
+        frame[0, :50] = hist.edges[rng.integers(0, 101, 50)]
+        frame[1, :3] = (np.nan, 14.99, 65.01)
+        expected, _ = np.histogram(frame[np.isfinite(frame)], hist.edges)
+        np.testing.assert_array_equal(hist(frame), expected)
+
+
+def test_celsius_counts_match_np_histogram_of_range(rng):
+    hist = FrameHistogram(bins=50, range=(20, 40))
+    frame = rng.normal(30, 6, 100000)
+    expected, _ = np.histogram(frame, 50, (20, 40))
+    np.testing.assert_array_equal(hist(frame), expected)
+
+
+def test_raw_counts_match_celsius_counts(rng):
+    hist = FrameHistogram(bins=50, range=(15, 65))
+    raw = rng.integers(2800, 3500, (62, 80)).astype(np.uint16)
+    expected, _ = np.histogram(raw, hist.raw_edges)
+    np.testing.assert_array_equal(hist(raw), expected)
+
+
+def test_cumulative_and_contrast_range(rng):
+    hist = FrameHistogram(bins=10, range=(0, 10), decay=0.5)
+    frame = np.full((4, 4), 5.5)
+    hist(frame)
+    hist(frame)
+    assert hist.cumulative[5] == 16 * 1.5
+    assert hist.contrast_range(0, 0) == (5., 6.)
+    hist.clear()
+    assert hist.contrast_range() == (0., 10.)
+    assert hist.contrast_range(raw=True)[0] == -KELVIN_0 * 10
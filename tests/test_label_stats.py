@@ -0,0 +1,98 @@
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.utils import (get_label_stats, get_contour_stats,
+                          get_hot_cold_stats, _spot_kernel)
+
+
+def hole_free_binaries(n, seed=0):
+    """Yield smooth frames and binaries of their warm blobs, holes filled"""
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        noise = rng.random((62, 80)).astype(np.float32)
+        frame = cv.GaussianBlur(noise, (0, 0), rng.uniform(1.5, 3)) * 200 + 20
+        binary = (frame > np.percentile(frame, 70)).astype(np.uint8)
+        contours, _ = cv.findContours(binary, cv.RETR_EXTERNAL,
+                                      cv.CHAIN_APPROX_SIMPLE)
+        filled = np.zeros_like(binary)
+        cv.drawContours(filled, contours, -1, 1, cv.FILLED)
+        yield frame, filled
+
+
+def contour_stats(frame, binary, **kwargs):
+    contours, _ = cv.findContours(binary, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+    return get_contour_stats(frame, contours, **kwargs)
+
+
+def clipped_centre_mean(frame, centroid, n):
+    """Mean of the `n` pixels around `centroid`, clipped to the frame"""
+    ny, nx = frame.shape
+    points = np.array(centroid) + _spot_kernel(n)[:, ::-1]
+    return frame[np.clip(points[:, 1], 0, ny - 1),
+                 np.clip(points[:, 0], 0, nx - 1)].mean()
+
+
+def test_label_stats_match_contour_stats_of_hole_free_blobs():
+    n_blobs = n_shifted = 0
+    for frame, binary in hole_free_binaries(40):
+        expected = contour_stats(frame, binary, minArea=-2)
+        stats = get_label_stats(frame, binary, minArea=-2)
+        assert len(stats) == len(expected)
+        for (contour, mask, metrics), (contour2, mask2, metrics2) in\
+                zip(stats, expected):
+            n_blobs += 1
+            np.testing.assert_array_equal(contour, contour2)
+            np.testing.assert_array_equal(mask, mask2)
+            assert metrics.keys() == metrics2.keys()
+            assert metrics['area'] == metrics2['area']
+            for key in ('mean', 'median', 'sdev', 'min', 'max', 'spread'):
+                assert metrics[key] == pytest.approx(metrics2[key], rel=1e-5)
+            # the centroid of the pixels, not of the contour polygon, which
+            # differs by a pixel or two for irregular blobs
+            (cx, cy), (cx2, cy2) = metrics['centroid'], metrics2['centroid']
+            assert abs(cx - cx2) <= 2 and abs(cy - cy2) <= 2
+            n_shifted += (cx, cy) != (cx2, cy2)
+            ys, xs = np.nonzero(mask)
+            assert (cx, cy) == (int(xs.mean()), int(ys.mean()))
+            # values around the centroid are clipped to the frame
+            assert metrics['center'] == frame[cy, cx]
+            for n in (9, 5):
+                assert metrics[f'center_{n}'] == pytest.approx(
+                    clipped_centre_mean(frame, (cx, cy), n), rel=1e-6)
+                if (cx, cy) == (cx2, cy2) and 0 < cx < 79 and 0 < cy < 61:
+                    assert metrics[f'center_{n}'] == pytest.approx(
+                        metrics2[f'center_{n}'], rel=1e-6)
+    assert n_blobs > 100 and n_shifted > 0
+
+
+def test_label_stats_exclude_holes():
+    frame = np.full((30, 40), 20., dtype=np.float32)
+    frame[5:25, 5:35] = 60.
+    frame[10:20, 15:25] = 10.
+    binary = (frame > 30).astype(np.uint8)
+    ((contour, mask, metrics),) = get_label_stats(frame, binary)
+    contours = contour_stats(frame, binary)
+    # the contours of the blob and of its hole
+    filled = [m for m in contours if m[2]['area'] < 0]
+    ((contour2, mask2, metrics2),) = filled
+    np.testing.assert_array_equal(contour, contour2)
+    assert metrics['area'] == -(20 * 30 - 10 * 10)
+    assert metrics2['area'] == -20 * 30
+    assert metrics['mean'] == 60.
+    assert metrics2['mean'] < 60.
+    assert not mask[15, 20] and mask2[15, 20]
+
+
+def test_hot_cold_stats_match_label_stats():
+    for frame, hot in hole_free_binaries(10, seed=1):
+        cold = (frame < np.percentile(frame, 30)).astype(np.uint8)
+        hs_stats, cs_stats = get_hot_cold_stats(frame, hot, cold, minArea=-2)
+        for stats, binary in ((hs_stats, hot), (cs_stats, cold)):
+            expected = get_label_stats(frame, binary, minArea=-2)
+            assert len(stats) == len(expected)
+            for (contour, mask, metrics), (contour2, mask2, metrics2) in\
+                    zip(stats, expected):
+                np.testing.assert_array_equal(contour, contour2)
+                np.testing.assert_array_equal(mask, mask2)
+                for key in metrics:
+                    np.testing.assert_array_equal(metrics[key], metrics2[key])
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from senxor.utils import LUTRemap, remap, data_to_frame
+
+FPA_SHAPE = (80, 62)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_lutremap_matches_clip_and_remap(rng):
+    lutremap = LUTRemap()
+    for _ in range(100):
+        lo = int(rng.integers(0, 65000))
+        hi = min(lo + int(rng.integers(1, 3000)), 65535)
+        data = rng.integers(0, 65536, 4960).astype(np.uint16)
+        # every value of the range, and its ends
+        data[:80] = np.linspace(lo, hi, 80).astype(np.uint16)
+        expected = remap(np.clip(data, lo, hi), curr_range=(lo, hi))
+        np.testing.assert_array_equal(lutremap(data, (lo, hi)), expected)
+
+
+def test_lutremap_after_data_to_frame(rng):
+    data = rng.integers(2700, 3300, 4960).astype(np.uint16)
+    lo, hi = 2900, 3100
+    frame = data_to_frame(data, FPA_SHAPE, hflip=True)
+    expected = remap(np.clip(frame, lo, hi), curr_range=(lo, hi))
+    np.testing.assert_array_equal(LUTRemap()(frame, (lo, hi)), expected)
+
+
+def test_lutremap_default_range_is_data_limits(rng):
+    data = rng.integers(2700, 3300, (62, 80)).astype(np.uint16)
+    np.testing.assert_array_equal(LUTRemap()(data), remap(data))
+
+
+@pytest.mark.parametrize('lo, hi', [(65535, 65535), (100, 100), (-5, 10)])
+def test_lutremap_degenerate_ranges(lo, hi):
+    lutremap = LUTRemap()
+    lutremap.set_range(lo, hi)
+    lo, hi = lutremap.curr_range
+    assert 0 <= lo < hi <= 65535
+    assert lutremap.lut[lo] == 0 and lutremap.lut[hi] == 255
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from senxor.utils import Mosaic, compose_display, mosaic_layout
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def tiles(rng, n, shape=(62, 80, 3), dtype=np.uint8):
+    return [rng.integers(0, 256, shape).astype(dtype) for _ in range(n)]
+
+
+@pytest.mark.parametrize('n_tiles', [1, 2, 3, 4, 5, 6, 7, 8])
+@pytest.mark.parametrize('shape', [(62, 80, 3), (62, 80)])
+def test_mosaic_matches_compose_display(rng, n_tiles, shape):
+    mosaic = Mosaic()
+    for _ in range(3):
+        img_list = tiles(rng, n_tiles, shape)
+        np.testing.assert_array_equal(mosaic(img_list),
+                                      compose_display(img_list))
+
+
+def test_canvas_is_reused(rng):
+    mosaic = Mosaic()
+    canvas = mosaic(tiles(rng, 4))
+    img_list = tiles(rng, 4)
+    assert mosaic(img_list) is canvas
+    np.testing.assert_array_equal(canvas, compose_display(img_list))
+
+
+def test_none_tiles_are_unchanged(rng):
+    mosaic = Mosaic()
+    first = tiles(rng, 6)
+    mosaic(first)
+    second = tiles(rng, 6)
+    canvas = mosaic([second[0], None, second[2], None, None, second[5]])
+    expected = [second[0], first[1], second[2], first[3], first[4], second[5]]
+    np.testing.assert_array_equal(canvas, compose_display(expected))
+    assert mosaic([None] * 6) is canvas
+
+
+def test_reallocates_on_new_tiles(rng):
+    mosaic = Mosaic()
+    mosaic(tiles(rng, 4))
+    for img_list in (tiles(rng, 6), tiles(rng, 6, (31, 40, 3)),
+                     tiles(rng, 6, (31, 40, 3), np.float32)):
+        canvas = mosaic(img_list)
+        assert canvas.dtype == img_list[0].dtype
+        np.testing.assert_array_equal(canvas, compose_display(img_list))
+
+
+def test_large_mosaic_is_near_square(rng):
+    img_list = tiles(rng, 10, (4, 5))
+    assert mosaic_layout(10) == (3, 4)
+    canvas = Mosaic()(img_list)
+    assert canvas.shape == (12, 20)
+    np.testing.assert_array_equal(canvas[8:, 5:10], img_list[9])
+    np.testing.assert_array_equal(canvas[8:, 10:], 0)
+
+
+def test_mosaic_errors(rng):
+    with pytest.raises(ValueError):
+        Mosaic()([None, None])
+    with pytest.raises(ValueError):
+        Mosaic(layout=(1, 2))(tiles(rng, 3))
+    mosaic = Mosaic()
+    mosaic(tiles(rng, 4))
+    with pytest.raises(ValueError):
+        mosaic(tiles(rng, 4) + [None])
+    with pytest.raises(ValueError):
+        mosaic(tiles(rng, 3) + tiles(rng, 1, (31, 40, 3)))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from senxor.utils import data_to_view, data_to_frame, contiguous_frame
+
+FPA_SHAPE = (80, 62)
+
+
+@pytest.fixture
+def data():
+    return np.arange(80 * 62, dtype=np.uint16)
+
+
+def reference_frame(data, hflip=False, vflip=False, rotate=0):
+    """The orientation by copies, as data_to_frame used to do"""
+    frame = np.reshape(data, FPA_SHAPE, order='F').T.copy()
+    if hflip:
+        frame = np.flip(frame, 1).copy()
+    if vflip:
+        frame = np.flip(frame, 0).copy()
+    for _ in range((rotate // 90) % 4):
+        # counter-clockwise by 90 deg
+        frame = frame.T[::-1].copy()
+    return frame
+
+
+@pytest.mark.parametrize('hflip', [False, True])
+@pytest.mark.parametrize('vflip', [False, True])
+@pytest.mark.parametrize('rotate', [0, 90, 180, 270, -90, 450])
+def test_data_to_view(data, hflip, vflip, rotate):
+    view = data_to_view(data, FPA_SHAPE, hflip, vflip, rotate)
+    assert np.shares_memory(view, data)
+    np.testing.assert_array_equal(view,
+                                  reference_frame(data, hflip, vflip, rotate))
+
+
+def test_data_to_view_rejects_odd_rotation(data):
+    with pytest.raises(ValueError):
+        data_to_view(data, FPA_SHAPE, rotate=45)
+
+
+@pytest.mark.parametrize('hflip', [False, True])
+def test_data_to_frame(data, hflip):
+    frame = data_to_frame(data, FPA_SHAPE, hflip=hflip)
+    assert frame.flags.c_contiguous and frame.shape == (62, 80)
+    assert not np.shares_memory(frame, data)
+    np.testing.assert_array_equal(frame, reference_frame(data, hflip))
+    out = np.empty((62, 80), dtype=np.uint16)
+    assert data_to_frame(data, FPA_SHAPE, hflip=hflip, out=out) is out
+    np.testing.assert_array_equal(out, frame)
+
+
+def test_contiguous_frame_checks_out(data):
+    view = data_to_view(data, FPA_SHAPE, rotate=90)
+    with pytest.raises(ValueError):
+        contiguous_frame(view, out=np.empty((62, 80), dtype=np.uint16))
+    with pytest.raises(ValueError):
+        contiguous_frame(view, out=np.empty((62, 80), dtype=np.uint16).T)
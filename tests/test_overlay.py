@@ -0,0 +1,90 @@
+import cv2 as cv
+import numpy as np
+import pytest
+from senxor.overlay import Overlay
+
+SIZE = (900, 600)
+GRID_ROWS, GRID_COLS = 3, 3
+POSITIONS = {'Front': (50, 50), 'Back': (650, 50), 'Left': (50, 550),
+             'Right': (650, 550), 'Avg': (350, 300)}
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def draw_directly(image, texts):
+    """The per-frame drawing of the grid demos that Overlay replaces"""
+    for i in range(1, GRID_ROWS):
+        cv.line(image, (0, i * 200), (900, i * 200), (255, 255, 255), 1)
+    for j in range(1, GRID_COLS):
+        cv.line(image, (j * 300, 0), (j * 300, 600), (255, 255, 255), 1)
+    for name, text in texts.items():
+        x, y = POSITIONS[name]
+        (text_width, text_height), _ = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 1, 2)
+        text_box_top_left = (x - 10, y - text_height - 10)
+        text_box_bottom_right = (x + text_width + 10, y + 10)
+        cv.rectangle(image, text_box_top_left, text_box_bottom_right, (0, 0, 0), -1)
+        cv.putText(image, text, (x, y), cv.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return image
+
+
+def grid_overlay():
+    overlay = Overlay(SIZE)
+    overlay.add_grid(GRID_ROWS, GRID_COLS)
+    for name, org in POSITIONS.items():
+        overlay.add_text(name, org)
+    return overlay
+
+
+def test_overlay_matches_direct_drawing(rng):
+    overlay = grid_overlay()
+    # values of varying width, so labels shrink and grow between frames,
+    # and repeated values, so some labels are not redrawn
+    values = [5.0, 5.0, 123.4, -7.2, 123.4, 37.0]
+    for i, value in enumerate(values):
+        image = rng.integers(0, 256, (600, 900, 3)).astype(np.uint8)
+        texts = {name: f"{name}: {value + k * (i % 2):.1f}°C"
+                 for k, name in enumerate(POSITIONS)}
+        for name, text in texts.items():
+            overlay.set_text(name, text)
+        expected = draw_directly(image.copy(), texts)
+        assert overlay(image) is image
+        np.testing.assert_array_equal(image, expected)
+
+
+def test_static_drawing_matches_direct_drawing(rng):
+    overlay = Overlay(SIZE)
+    overlay.draw(cv.circle, (450, 300), 20, color=(0, 0, 255), thickness=2)
+    overlay.draw(cv.rectangle, (10, 10), (100, 80), color=(0, 255, 0),
+                 thickness=-1)
+    image = rng.integers(0, 256, (600, 900, 3)).astype(np.uint8)
+    expected = image.copy()
+    cv.circle(expected, (450, 300), 20, (0, 0, 255), 2)
+    cv.rectangle(expected, (10, 10), (100, 80), (0, 255, 0), -1)
+    np.testing.assert_array_equal(overlay(image), expected)
+
+
+def test_label_update_restores_static_layer():
+    overlay = Overlay(SIZE)
+    overlay.add_grid(GRID_ROWS, GRID_COLS)
+    # a label across the grid line at x = 300
+    overlay.add_text('label', (250, 100), text='a long label over the line')
+    overlay.set_text('label', 'x')
+    image = np.zeros((600, 900, 3), dtype=np.uint8)
+    expected = draw_directly(image.copy(), {})
+    label = overlay.labels['label']
+    label.draw(expected, 'x')
+    np.testing.assert_array_equal(overlay(image), expected)
+
+
+def test_set_text_skips_unchanged_text():
+    overlay = Overlay(SIZE)
+    overlay.add_text('label', (50, 50), text='same')
+    before = overlay.image.copy()
+    overlay.image[:] = 1
+    overlay.set_text('label', 'same')
+    assert (overlay.image == 1).all()
+    overlay.set_text('label', 'other')
+    assert not np.array_equal(overlay.image, before)
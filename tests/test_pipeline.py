@@ -0,0 +1,81 @@
+import time
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.pipeline import AnalyticsPipeline, segment_hot_cold
+from senxor.utils import CVSegmentCH, SpotAnalyser
+
+
+def slow_sum(frame, delays):
+    """Sum `frame` after a delay chosen by its first value"""
+    time.sleep(delays[int(frame[0, 0]) % len(delays)])
+    if frame[0, 1] < 0:
+        raise ValueError('negative marker')
+    return float(frame.sum())
+
+
+def test_results_in_submission_order():
+    # later frames finish first
+    delays = [0.2, 0.15, 0.1, 0.05, 0.]
+    frames = [np.full((62, 80), i, dtype=np.float32) for i in range(10)]
+    with AnalyticsPipeline(slow_sum, n_slots=16, n_workers=4,
+                           func_kwargs={'delays': delays}) as pipeline:
+        seqs = [pipeline.submit(frame, seq=100 + i, timestamp=float(i))
+                for i, frame in enumerate(frames)]
+        assert seqs == list(range(100, 110))
+        results = list(pipeline.results(block=True, timeout=10))
+        assert pipeline.n_pending == 0
+    assert [seq for seq, _, _ in results] == seqs
+    assert [timestamp for _, timestamp, _ in results] == list(range(10))
+    assert [result for _, _, result in results] ==\
+           [float(frame.sum()) for frame in frames]
+
+
+def test_frames_are_skipped_when_no_slot_is_free():
+    frame = np.zeros((62, 80), dtype=np.float32)
+    with AnalyticsPipeline(slow_sum, n_slots=2, n_workers=2,
+                           func_kwargs={'delays': [0.3]}) as pipeline:
+        seqs = [pipeline.submit(frame) for _ in range(5)]
+        assert seqs == [0, 1, None, None, None]
+        assert pipeline.n_skipped == 3
+        assert list(pipeline.results()) == []
+        results = list(pipeline.results(block=True, timeout=10))
+        assert [seq for seq, _, _ in results] == [0, 1]
+        # the slots are free again
+        assert pipeline.submit(frame) == 5
+
+
+def test_failed_analytics_yield_none():
+    frames = [np.zeros((62, 80), dtype=np.float32) for _ in range(3)]
+    frames[1][0, 1] = -1
+    with AnalyticsPipeline(slow_sum, n_workers=2,
+                           func_kwargs={'delays': [0.]}) as pipeline:
+        for frame in frames:
+            pipeline.submit(frame)
+        results = list(pipeline.results(block=True, timeout=10))
+    assert [result for _, _, result in results] == [0., None, 0.]
+    assert pipeline.n_errors == 1
+
+
+def test_segment_hot_cold_matches_segmentation():
+    rng = np.random.default_rng(0)
+    noise = rng.random((62, 80)).astype(np.float32)
+    frame = cv.GaussianBlur(noise, (0, 0), 2.5) * 200 + 20
+    param = {'threshold_type': 'otsu', 'threshold': 200,
+             'otsu_threshold_delta': 0,
+             'contour_minArea': -2, 'bbox_extension': 3}
+    with AnalyticsPipeline(segment_hot_cold, n_workers=1,
+                           func_kwargs={'param': param}) as pipeline:
+        pipeline.submit(frame)
+        ((_, _, result),) = pipeline.results(block=True, timeout=10)
+    segment = CVSegmentCH(param)
+    segment(frame)
+    assert result['osd'].keys() == segment.osd.keys()
+    for key, value in segment.osd.items():
+        np.testing.assert_array_equal(result['osd'][key], value)
+    expected = SpotAnalyser.to_osd(segment.hotspot_table)
+    assert len(result['hotspots']) == len(expected) > 0
+    for spot, expected_spot in zip(result['hotspots'], expected):
+        assert spot.keys() == expected_spot.keys()
+        for key, value in expected_spot.items():
+            np.testing.assert_array_equal(spot[key], value)
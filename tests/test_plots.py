@@ -0,0 +1,30 @@
+from unittest import mock
+import numpy as np
+import pytest
+
+matplotlib = pytest.importorskip('matplotlib')
+# senxor.plots selects the TkAgg backend, which needs a display
+matplotlib.use('Agg')
+with mock.patch.object(matplotlib, 'use'):
+    from senxor import plots
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.random((62, 80)) * 10
+
+
+@pytest.mark.parametrize('param, expected', [
+    ({}, None),
+    ({'xlim': (0., 10.)}, (0., 10.)),
+    ({'xlim': np.array([0., 10.])}, (0., 10.)),
+    ({'range': np.array([2., 8.]), 'xlim': (0., 10.)}, (2., 8.)),
+])
+def test_histogram_range(frame, param, expected):
+    hist = plots.Histogram(frame, param=dict(param, bins=20))
+    if expected is None:
+        expected = (frame.min(), frame.max())
+    assert hist.engine.range == pytest.approx(expected)
+    counts, _ = np.histogram(frame, hist.engine.edges)
+    np.testing.assert_array_equal(hist.engine.counts, counts)
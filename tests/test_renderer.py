@@ -0,0 +1,79 @@
+import cv2 as cv
+import numpy as np
+import pytest
+from senxor.utils import FrameRenderer, cv_render, get_colormap, remap
+
+SHAPE = (62, 80)
+INTERPOLATIONS = [cv.INTER_CUBIC, cv.INTER_LINEAR, cv.INTER_NEAREST]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def reference(frui8, dsize, colormap, interpolation):
+    """The applyColorMap + resize path that FrameRenderer replaces"""
+    cvcol = cv.applyColorMap(frui8, get_colormap(colormap))
+    return cv.resize(cvcol, dsize=dsize, interpolation=interpolation)
+
+
+@pytest.mark.parametrize('colormap', ['jet', 'rainbow2', 'viridis'])
+@pytest.mark.parametrize('interpolation', INTERPOLATIONS)
+def test_uint8_frame_matches_reference(rng, colormap, interpolation):
+    render = FrameRenderer((800, 620), colormap, interpolation=interpolation)
+    for _ in range(3):
+        frame = rng.integers(0, 256, SHAPE).astype(np.uint8)
+        expected = reference(frame, (800, 620), colormap, interpolation)
+        np.testing.assert_array_equal(render(frame), expected)
+
+
+@pytest.mark.parametrize('interpolation', INTERPOLATIONS)
+def test_raw_frame_matches_clip_remap_reference(rng, interpolation):
+    render = FrameRenderer((900, 600), 'jet', interpolation=interpolation)
+    # ranges change, repeat and change back, so the LUT is rebuilt and reused
+    for lo, hi in [(2900, 3100), (2900, 3100), (2700, 3300), (2900, 3100)]:
+        frame = rng.integers(2700, 3300, SHAPE).astype(np.uint16)
+        frui8 = remap(np.clip(frame, lo, hi), curr_range=(lo, hi))
+        expected = reference(frui8, (900, 600), 'jet', interpolation)
+        np.testing.assert_array_equal(render(frame, curr_range=(lo, hi)),
+                                      expected)
+
+
+def test_raw_frame_default_range_is_frame_limits(rng):
+    frame = rng.integers(2700, 3300, SHAPE).astype(np.uint16)
+    expected = reference(remap(frame), (800, 620), 'jet', cv.INTER_CUBIC)
+    np.testing.assert_array_equal(FrameRenderer()(frame), expected)
+
+
+def test_set_colormap_rebuilds_raw_lut(rng):
+    render = FrameRenderer((800, 620), 'jet')
+    frame = rng.integers(2700, 3300, SHAPE).astype(np.uint16)
+    render(frame, curr_range=(2800, 3200))
+    render.set_colormap('rainbow2')
+    frui8 = remap(np.clip(frame, 2800, 3200), curr_range=(2800, 3200))
+    expected = reference(frui8, (800, 620), 'rainbow2', cv.INTER_CUBIC)
+    np.testing.assert_array_equal(render(frame, curr_range=(2800, 3200)),
+                                  expected)
+
+
+def test_output_buffers(rng):
+    render = FrameRenderer((160, 124), 'jet')
+    frame = rng.integers(0, 256, SHAPE).astype(np.uint8)
+    first = render(frame)
+    assert render(frame) is first
+    out = np.empty((124, 160, 3), dtype=np.uint8)
+    assert render(frame, out=out) is out
+    np.testing.assert_array_equal(out, first)
+
+
+@pytest.mark.parametrize('colormap', ['jet', 'rainbow2'])
+def test_cv_render_matches_reference(rng, colormap):
+    frame = rng.integers(0, 256, SHAPE).astype(np.uint8)
+    expected = reference(frame, (800, 620), colormap, cv.INTER_CUBIC)
+    image = cv_render(frame, colormap=colormap, display=False)
+    np.testing.assert_array_equal(image, expected)
+    # a returned image is not the cached renderer's buffer
+    again = cv_render(frame, colormap=colormap, display=False)
+    assert again is not image
+    np.testing.assert_array_equal(again, expected)
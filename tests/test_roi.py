@@ -0,0 +1,80 @@
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.roi import ROISet
+
+SHAPE = (62, 80)
+
+
+@pytest.fixture
+def rois():
+    rois = ROISet(SHAPE)
+    rois.add_slice('Front', slice(0, 20), slice(0, 26))
+    rois.add_rect('Back', 50, 30, 20, 25)
+    # overlaps both rectangles
+    rois.add_polygon('part', [(10, 10), (60, 12), (30, 50)])
+    rois.add_grid(2, 3)
+    return rois
+
+
+def roi_masks(rois):
+    """Return the masks of the ROIs from their label maps"""
+    return [np.logical_or.reduce([layer == i + 1 for layer in rois.layers])
+            for i in range(len(rois.names))]
+
+
+def test_roi_stats_match_masked_frame(rois):
+    rng = np.random.default_rng(0)
+    masks = roi_masks(rois)
+    assert len(rois.layers) > 1
+    for _ in range(5):
+        frame = rng.normal(30, 5, SHAPE).astype(np.float32)
+        stats = rois(frame)
+        for i, mask in enumerate(masks):
+            values = frame[mask]
+            assert stats['count'][i] == len(values)
+            assert stats['min'][i] == values.min()
+            assert stats['max'][i] == values.max()
+            np.testing.assert_allclose(stats['mean'][i],
+                                       values.astype(np.float64).mean())
+
+
+def test_roi_masks(rois):
+    masks = dict(zip(rois.names, roi_masks(rois)))
+    expected = np.zeros(SHAPE, dtype=bool)
+    expected[0:20, 0:26] = True
+    np.testing.assert_array_equal(masks['Front'], expected)
+    expected = np.zeros(SHAPE, dtype=bool)
+    expected[30:55, 50:70] = True
+    np.testing.assert_array_equal(masks['Back'], expected)
+    polygon = np.zeros(SHAPE, dtype=np.uint8)
+    cv.fillPoly(polygon, [np.array([(10, 10), (60, 12), (30, 50)])], 1)
+    np.testing.assert_array_equal(masks['part'], polygon.astype(bool))
+    grid = sum(masks[f'cell_{i}_{j}'].astype(int)
+               for i in range(2) for j in range(3))
+    np.testing.assert_array_equal(grid, 1)
+
+
+def test_value_map_last_added_prevails(rois):
+    values = np.arange(1, len(rois.names) + 1)
+    value_map = rois.value_map(values)
+    # the grid cells, added last, cover the frame
+    assert value_map[5, 5] == rois.names.index('cell_0_0') + 1
+    only_rects = ROISet(SHAPE)
+    only_rects.add_rect('a', 0, 0, 10, 10)
+    only_rects.add_rect('b', 5, 5, 10, 10)
+    value_map = only_rects.value_map([0.5, 0.9], default=1.)
+    assert value_map[0, 0] == 0.5
+    assert value_map[7, 7] == np.float32(0.9)
+    assert value_map[40, 40] == 1.
+
+
+def test_invalid_rois():
+    rois = ROISet(SHAPE)
+    with pytest.raises(ValueError):
+        rois.add_mask('wrong shape', np.ones((10, 10), dtype=bool))
+    with pytest.raises(ValueError):
+        rois.add_slice('empty', slice(0, 0), slice(0, 10))
+    rois.add_rect('a', 0, 0, 10, 10)
+    with pytest.raises(ValueError):
+        rois.value_map([1., 2.])
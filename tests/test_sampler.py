@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from senxor.utils import (get_spot_in_frame, get_ipx_1D, get_spot_offsets,
+                          SpotSampler)
+
+SHAPE = (62, 80)
+
+
+@pytest.mark.parametrize('n', [1, 3, 5, 6, 9, 25])
+def test_spot_patterns_agree(n):
+    centre = (40, 31)
+    points = get_spot_in_frame(centre, n)
+    flat = points[:, 1] * SHAPE[1] + points[:, 0]
+    sampler = SpotSampler(SHAPE, n=n)
+    index, valid = sampler.index([centre])
+    assert valid.all()
+    np.testing.assert_array_equal(flat, index[0])
+    # get_ipx_1D indexes the pixel left of the centre as the centre
+    ipx = np.array(get_ipx_1D(centre, n, ncols=SHAPE[1]))
+    np.testing.assert_array_equal(ipx - ipx[0], flat - flat[0])
+    np.testing.assert_array_equal(get_spot_offsets(n)[:, ::-1],
+                                  points - centre)
+
+
+def test_three_pixel_spot_is_horizontal():
+    points = get_spot_in_frame((40, 31), n=3)
+    np.testing.assert_array_equal(points, [[40, 31], [39, 31], [41, 31]])
+
+
+def test_sampler_values_and_borders():
+    frame = np.arange(SHAPE[0] * SHAPE[1], dtype=np.float32).reshape(SHAPE)
+    centres = [(40, 31), (0, 0), (79, 61)]
+    sampler = SpotSampler(SHAPE, n=9, border='nan')
+    assert sampler(frame).shape == (0, 9)
+    samples = sampler(frame, centres)
+    for centre, sample in zip(centres, samples):
+        points = get_spot_in_frame(centre, 9)
+        inside = ((points >= 0) & (points < SHAPE[::-1])).all(axis=1)
+        expected = np.full(9, np.nan, dtype=np.float32)
+        expected[inside] = frame[points[inside, 1], points[inside, 0]]
+        np.testing.assert_array_equal(sample, expected)
+    clipped = SpotSampler(SHAPE, n=9)(frame, centres)
+    assert not np.isnan(clipped).any()
+    assert clipped[1].min() == frame[0, 0]
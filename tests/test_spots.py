@@ -0,0 +1,109 @@
+import numpy as np
+import cv2 as cv
+import pytest
+from senxor.utils import (SpotAnalyser, HotSpot, ColdSpot, CVSegmentCH,
+                          get_label_stats)
+
+PARAM = {'threshold': 200, 'otsu_threshold_delta': 0,
+         'threshold_blocksize': 11, 'threshold_C': -2,
+         'contour_minArea': -2, 'bbox_extension': 3}
+
+
+def smooth_frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        noise = rng.random((62, 80)).astype(np.float32)
+        yield cv.GaussianBlur(noise, (0, 0), 2.5) * 200 + 20
+
+
+def assert_table_matches(table, spots):
+    rows = SpotAnalyser.to_osd(table)
+    assert len(rows) == len(spots)
+    for spot, row in zip(spots, rows):
+        assert row.keys() >= spot.osd.keys()
+        for key, value in spot.osd.items():
+            np.testing.assert_allclose(np.asarray(row[key], dtype=float),
+                                       np.asarray(value, dtype=float),
+                                       rtol=1e-6, err_msg=key)
+
+
+@pytest.mark.parametrize('kind, spot_class', [('hot', HotSpot),
+                                              ('cold', ColdSpot)])
+def test_spot_analyser_matches_spot_objects(kind, spot_class):
+    analyser = SpotAnalyser(PARAM, kind=kind)
+    for frame in smooth_frames(10):
+        if kind == 'hot':
+            binary = (frame > np.percentile(frame, 70)).astype(np.uint8)
+        else:
+            binary = (frame < np.percentile(frame, 30)).astype(np.uint8)
+        stats = get_label_stats(frame, binary, minArea=PARAM['contour_minArea'])
+        spots = [spot_class(i, frame, *s, PARAM) for i, s in enumerate(stats)]
+        assert_table_matches(analyser(frame, stats), spots)
+
+
+def test_spot_analyser_hot_and_cold_matches_separate_calls():
+    hs_analyser = SpotAnalyser(PARAM, kind='hot')
+    cs_analyser = SpotAnalyser(PARAM, kind='cold')
+    for frame in smooth_frames(10, seed=1):
+        hs_stats = get_label_stats(
+            frame, (frame > np.percentile(frame, 70)).astype(np.uint8))
+        cs_stats = get_label_stats(
+            frame, (frame < np.percentile(frame, 30)).astype(np.uint8))
+        hs_table, cs_table = hs_analyser.hot_and_cold(frame, hs_stats, cs_stats)
+        for joint, separate in ((hs_table, hs_analyser(frame, hs_stats)),
+                                (cs_table, cs_analyser(frame, cs_stats))):
+            assert joint.keys() == separate.keys()
+            for key in joint:
+                if key == 'contour':
+                    continue
+                np.testing.assert_array_equal(joint[key], separate[key])
+
+
+def test_spot_analyser_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        SpotAnalyser(PARAM, kind='warm')
+
+
+@pytest.mark.parametrize('threshold_type', ['simple', 'otsu', 'adaptive'])
+@pytest.mark.parametrize('single_pass', [False, True])
+def test_segment_tables_match_spot_objects(threshold_type, single_pass):
+    segment = CVSegmentCH(dict(PARAM, threshold_type=threshold_type,
+                               single_pass=single_pass))
+    for frame in smooth_frames(5, seed=2):
+        segment(frame)
+        assert_table_matches(segment.hotspot_table, segment.hotspots)
+        assert_table_matches(segment.coldspot_table, segment.coldspots)
+
+
+@pytest.mark.parametrize('threshold_type', ['simple', 'otsu', 'adaptive'])
+def test_single_pass_matches_two_passes(threshold_type):
+    two_pass = CVSegmentCH(dict(PARAM, threshold_type=threshold_type,
+                                single_pass=False))
+    single_pass = CVSegmentCH(dict(PARAM, threshold_type=threshold_type,
+                                   single_pass=True))
+    for frame in smooth_frames(30, seed=3):
+        two_pass(frame)
+        single_pass(frame)
+        np.testing.assert_array_equal(single_pass.hs_binary, two_pass.hs_binary)
+        np.testing.assert_array_equal(single_pass.cs_binary, two_pass.cs_binary)
+        for single, two in ((single_pass.hs_stats, two_pass.hs_stats),
+                            (single_pass.cs_stats, two_pass.cs_stats)):
+            assert len(single) == len(two)
+            for (contour, mask, metrics), (contour2, mask2, metrics2) in\
+                    zip(single, two):
+                np.testing.assert_array_equal(contour, contour2)
+                np.testing.assert_array_equal(mask, mask2)
+                assert metrics.keys() == metrics2.keys()
+                for key in metrics:
+                    np.testing.assert_array_equal(metrics[key], metrics2[key])
+        for single, two in ((single_pass.hotspot_table, two_pass.hotspot_table),
+                            (single_pass.coldspot_table,
+                             two_pass.coldspot_table)):
+            assert single.keys() == two.keys()
+            for key in single:
+                if key == 'contour':
+                    for contour, contour2 in zip(single[key], two[key]):
+                        np.testing.assert_array_equal(contour, contour2)
+                else:
+                    np.testing.assert_array_equal(single[key], two[key])
+        assert single_pass.osd == two_pass.osd
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from senxor.utils import (data_to_view, remap, clip_frame, TrueAverageFilter,
+                          RollingAverageFilter)
+from senxor.stack import (data_to_stack, stack_range, remap_stack, clip_stack,
+                          cumulative_average, boxcar_average,
+                          exponential_average, rolling_average, region_means)
+
+FPA_SHAPE = (80, 62)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    return rng.normal(30, 5, (20, 80 * 62)).astype(np.float32)
+
+
+@pytest.mark.parametrize('hflip', [False, True])
+@pytest.mark.parametrize('vflip', [False, True])
+@pytest.mark.parametrize('rotate', [0, 90, 180, 270])
+def test_data_to_stack_matches_data_to_view(data, hflip, vflip, rotate):
+    stack = data_to_stack(data, FPA_SHAPE, hflip, vflip, rotate)
+    assert np.shares_memory(stack, data)
+    for frame, stack_frame in zip(data, stack):
+        expected = data_to_view(frame, FPA_SHAPE, hflip, vflip, rotate)
+        np.testing.assert_array_equal(stack_frame, expected)
+
+
+def test_data_to_stack_rejects_odd_rotation(data):
+    with pytest.raises(ValueError):
+        data_to_stack(data, FPA_SHAPE, rotate=45)
+
+
+@pytest.mark.parametrize('to_uint8', [True, False])
+def test_remap_stack_matches_remap(data, to_uint8):
+    stack = data_to_stack(data, FPA_SHAPE)
+    remapped = remap_stack(stack, to_uint8=to_uint8)
+    for frame, stack_frame in zip(stack, remapped):
+        expected = remap(frame, to_uint8=to_uint8)
+        np.testing.assert_array_equal(stack_frame, expected)
+    common = remap_stack(stack, curr_range=(20, 40), to_uint8=to_uint8)
+    np.testing.assert_array_equal(common[3], remap(stack[3], curr_range=(20, 40),
+                                                   to_uint8=to_uint8))
+
+
+@pytest.mark.parametrize('to_uint8', [True, False])
+def test_remap_stack_of_raw_frames_matches_remap(to_uint8):
+    rng = np.random.default_rng(1)
+    raw = rng.integers(2000, 4000, (50, 80 * 62)).astype(np.uint16)
+    stack = data_to_stack(raw, FPA_SHAPE)
+    remapped = remap_stack(stack, to_uint8=to_uint8)
+    assert remapped.dtype == (np.uint8 if to_uint8 else np.float16)
+    for frame, stack_frame in zip(stack, remapped):
+        np.testing.assert_array_equal(stack_frame,
+                                      remap(frame, to_uint8=to_uint8))
+    # per-frame ranges, e.g. from stack_range of the filtered stack
+    lo_hi = stack_range(stack) + [[-10, 10]]
+    remapped = remap_stack(stack, curr_range=lo_hi, to_uint8=to_uint8)
+    for frame, (lo, hi), stack_frame in zip(stack, lo_hi, remapped):
+        expected = remap(frame, curr_range=(float(lo), float(hi)),
+                         to_uint8=to_uint8)
+        np.testing.assert_array_equal(stack_frame, expected)
+
+
+def test_clip_stack_matches_clip_frame(data):
+    stack = data_to_stack(data, FPA_SHAPE)
+    clipped = clip_stack(stack, c0=0.1, c1=0.2)
+    for frame, stack_frame in zip(stack, clipped):
+        np.testing.assert_allclose(stack_frame,
+                                   clip_frame(frame, c0=0.1, c1=0.2), rtol=1e-6)
+    lo_hi = stack_range(stack)
+    np.testing.assert_array_equal(lo_hi[:, 0], stack.min(axis=(1, 2)))
+    np.testing.assert_array_equal(lo_hi[:, 1], stack.max(axis=(1, 2)))
+
+
+def test_boxcar_average_matches_true_average_filter(data):
+    stack = data_to_stack(data, FPA_SHAPE)
+    av_filter = TrueAverageFilter(depth=4)
+    averaged = boxcar_average(stack, 4)
+    for frame, av_frame in zip(stack, averaged):
+        np.testing.assert_allclose(av_frame, av_filter(frame), rtol=1e-5)
+
+
+def test_cumulative_average(data):
+    averaged = cumulative_average(data)
+    for i in range(len(data)):
+        np.testing.assert_allclose(averaged[i], data[:i + 1].mean(axis=0),
+                                   rtol=1e-5)
+
+
+def test_exponential_average_matches_recursion(data):
+    alpha = 0.3
+    averaged = exponential_average(data, alpha, block=7)
+    state = data[0].astype(np.float64)
+    for frame, av_frame in zip(data, averaged):
+        state = (1 - alpha) * state + alpha * frame
+        np.testing.assert_allclose(av_frame, state, rtol=1e-5)
+
+
+def test_rolling_average_matches_rolling_average_filter(data):
+    series = data[:, 100]
+    av_filter = RollingAverageFilter(N=4)
+    expected = [av_filter(value) for value in series]
+    np.testing.assert_allclose(rolling_average(series, N=4), expected,
+                               rtol=1e-5)
+
+
+def test_region_means(data):
+    stack = data_to_stack(data, FPA_SHAPE)
+    regions = [(slice(0, 31), slice(0, 40)), (slice(31, 62), slice(40, 80))]
+    means = region_means(stack, regions)
+    for i, (rows, cols) in enumerate(regions):
+        np.testing.assert_allclose(means[:, i],
+                                   stack[:, rows, cols].mean(axis=(1, 2)),
+                                   rtol=1e-6)
@@ -0,0 +1,122 @@
+import socket
+import threading
+import numpy as np
+import pytest
+from senxor.stream import (FrameSender, FrameReceiver, pack_header,
+                           unpack_header, HEADER)
+
+
+class PartialSocket:
+    """Stream socket stand-in whose sendmsg sends at most `chunk` bytes"""
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self.data = bytearray()
+
+    def sendmsg(self, buffers):
+        n = 0
+        for buffer in buffers:
+            k = min(len(buffer), self.chunk - n)
+            self.data += bytes(buffer[:k])
+            n += k
+            if n == self.chunk:
+                break
+        return n
+
+
+def receive_all(data):
+    """Return the (header, copy of frame) of all messages in `data`"""
+    sender, receiver = socket.socketpair()
+    writer = threading.Thread(target=lambda: (sender.sendall(data),
+                                              sender.close()))
+    writer.start()
+    frame_receiver = FrameReceiver(receiver)
+    messages = []
+    while True:
+        message = frame_receiver.recv()
+        if message is None:
+            break
+        header, frame = message
+        messages.append((header, frame.copy()))
+    writer.join()
+    receiver.close()
+    return messages
+
+
+FRAMES = [
+    np.arange(62 * 80, dtype=np.uint16).reshape(62, 80),
+    np.linspace(-10, 80, 4960).reshape(62, 80),
+    np.arange(600 * 800 * 3, dtype=np.uint32).astype(np.uint8).reshape(600, 800, 3),
+    np.arange(5, dtype='>f4'),
+    np.empty((0, 80), dtype=np.float32),
+]
+
+
+def test_round_trip_over_socket():
+    a, b = socket.socketpair()
+    frame_sender, frame_receiver = FrameSender(a), FrameReceiver(b)
+    for i, frame in enumerate(FRAMES):
+        writer = threading.Thread(target=frame_sender.send,
+                                  args=(frame,), kwargs={'timestamp': 1.5})
+        writer.start()
+        header, received = frame_receiver.recv()
+        writer.join()
+        assert header['seq'] == i and header['timestamp'] == 1.5
+        assert received.shape == frame.shape
+        assert received.dtype == frame.dtype.newbyteorder('<')
+        np.testing.assert_array_equal(received, frame)
+    a.close()
+    assert frame_receiver.recv() is None
+    b.close()
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 60, 4096])
+def test_partial_sends_are_completed(chunk):
+    sock = PartialSocket(chunk)
+    frame_sender = FrameSender(sock)
+    for frame in FRAMES[:2] + FRAMES[3:]:
+        frame_sender.send(frame, seq=10)
+    messages = receive_all(sock.data)
+    assert len(messages) == 4
+    for (header, received), frame in zip(messages, FRAMES[:2] + FRAMES[3:]):
+        assert header['seq'] == 10
+        np.testing.assert_array_equal(received, frame)
+
+
+def test_sendall_without_sendmsg():
+    class NoSendmsg:
+        def __init__(self):
+            self.data = bytearray()
+
+        def sendall(self, buffer):
+            self.data += bytes(buffer)
+
+    sock = NoSendmsg()
+    FrameSender(sock).send(FRAMES[0])
+    ((header, received),) = receive_all(sock.data)
+    np.testing.assert_array_equal(received, FRAMES[0])
+
+
+@pytest.mark.parametrize('encoding', ['png', 'jpeg'])
+def test_encoded_frames(encoding):
+    sock = PartialSocket(1000)
+    frame = FRAMES[2]
+    FrameSender(sock, encoding=encoding).send(frame)
+    ((header, received),) = receive_all(sock.data)
+    assert received.shape == frame.shape
+    if encoding == 'png':
+        np.testing.assert_array_equal(received, frame)
+
+
+def test_malformed_headers():
+    header = bytearray(pack_header(0, 0., 0, np.uint16, (62, 80), 62 * 80 * 2))
+    assert unpack_header(header)['shape'] == (62, 80)
+    with pytest.raises(ValueError):
+        unpack_header(b'XXXX' + header[4:])
+    with pytest.raises(ValueError):
+        unpack_header(pack_header(0, 0., 0, np.uint16, (62, 80), 100))
+    with pytest.raises(ValueError):
+        unpack_header(header, max_payload=100)
+    with pytest.raises(ValueError):
+        pack_header(0, 0., 0, np.complex64, (62, 80), 0)
+    assert len(header) == HEADER.size
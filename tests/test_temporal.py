@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+from senxor.mi48 import FPA_SHAPE
+from senxor.utils import (TrueAverageFilter, EMAFilter, TemporalMedianFilter,
+                          KalmanFilter, WeightedWindowFilter, FibonacciAverageFilter,
+                          fibonacci_weights, triangular_weights,
+                          exponential_weights)
+
+# frame shapes (rows, cols) of a scalar, e.g. frame minimum, and of FPAs
+SHAPES = [(), FPA_SHAPE['lynx'][::-1], FPA_SHAPE['cougar'][::-1],
+          FPA_SHAPE['panther'][::-1]]
+
+
+def frames(shape, n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return [np.float32(30) + rng.normal(0, 5, shape).astype(np.float32)
+            for _ in range(n)]
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('depth', [1, 4, 7])
+def test_true_average(shape, depth):
+    av_filter = TrueAverageFilter(depth, resync=16)
+    history = frames(shape)
+    for k, frame in enumerate(history):
+        expected = np.mean(history[max(0, k + 1 - depth): k + 1], axis=0,
+                           dtype=np.float64)
+        av = av_filter(frame)
+        assert np.shape(av) == shape
+        np.testing.assert_allclose(av, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_ema(shape):
+    ema_filter = EMAFilter(alpha=0.3)
+    history = frames(shape)
+    expected = history[0].astype(np.float64)
+    for frame in history:
+        expected = expected + 0.3 * (frame - expected)
+        av = ema_filter(frame)
+        assert np.shape(av) == shape
+        np.testing.assert_allclose(av, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('depth', [1, 3, 5])
+def test_temporal_median(shape, depth):
+    median_filter = TemporalMedianFilter(depth)
+    history = frames(shape)
+    for k, frame in enumerate(history):
+        expected = np.median(history[max(0, k + 1 - depth): k + 1], axis=0)
+        av = median_filter(frame)
+        assert np.shape(av) == shape
+        np.testing.assert_array_equal(av, expected)
+
+
+@pytest.mark.parametrize('filter_class', [TrueAverageFilter, EMAFilter,
+                                          TemporalMedianFilter])
+def test_new_shape_restarts_the_filter(filter_class):
+    av_filter = filter_class(4) if filter_class is not EMAFilter else\
+                filter_class(0.5)
+    for frame in frames((32, 32), n=5):
+        av_filter(frame)
+    frame = frames((62, 80), n=1)[0]
+    np.testing.assert_allclose(av_filter(frame), frame, rtol=1e-6)
+
+
+class ListFibonacciFilter:
+    """The former list-based FibonacciAverageFilter"""
+
+    def __init__(self, initial, N=6, i_start=1):
+        self.frames = [initial] * N
+        w = np.array(FibonacciAverageFilter.fib[i_start: i_start + N])
+        self.weights = w / np.sum(w)
+
+    def __call__(self, new):
+        self.frames = self.frames[1:] + [new]
+        self.frames[-1] = np.sum([w * f for w, f in
+                                  zip(self.weights, self.frames)], axis=0)
+        return self.frames[-1]
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('N, i_start', [(6, 1), (4, 3), (1, 2)])
+def test_fibonacci_matches_former_filter(shape, N, i_start):
+    history = [frame.astype(np.float64) for frame in frames(shape)]
+    fib_filter = FibonacciAverageFilter(history[0], N=N, i_start=i_start)
+    reference = ListFibonacciFilter(history[0], N=N, i_start=i_start)
+    outputs = []
+    for frame in history:
+        av = fib_filter(frame)
+        expected = reference(frame)
+        np.testing.assert_allclose(av, expected, rtol=1e-14, atol=1e-12)
+        outputs.append(av)
+    # every call returns a new array, as before
+    if shape:
+        assert not np.shares_memory(outputs[-1], outputs[-2])
+
+
+@pytest.mark.parametrize('weights', [fibonacci_weights(6),
+                                     triangular_weights(5),
+                                     exponential_weights(4, alpha=0.3),
+                                     [1., 1., 1.]])
+@pytest.mark.parametrize('shape', SHAPES)
+def test_weighted_window(weights, shape):
+    history = frames(shape)
+    window_filter = WeightedWindowFilter(weights)
+    N = len(weights)
+    w = np.asarray(weights) / np.sum(weights)
+    for k, frame in enumerate(history):
+        # the ring starts filled with the first frame
+        window = [history[max(0, k - N + 1 + i)] for i in range(N)]
+        expected = np.tensordot(w, np.array(window, dtype=np.float64), axes=1)
+        av = window_filter(frame)
+        assert np.shape(av) == shape
+        np.testing.assert_allclose(av, expected, rtol=1e-5)
+
+
+def test_weights():
+    np.testing.assert_allclose(fibonacci_weights(4), np.array([1, 2, 3, 5]) / 11)
+    np.testing.assert_allclose(triangular_weights(3), np.array([1, 2, 3]) / 6)
+    np.testing.assert_allclose(exponential_weights(3, 0.5),
+                               np.array([1, 2, 4]) / 7)
+
+
+def test_kalman_averages_static_pixels_and_follows_a_step():
+    rng = np.random.default_rng(0)
+    sigma = 0.5
+    kalman = KalmanFilter(measurement_noise=sigma**2)
+    truth = np.full((62, 80), 30., dtype=np.float32)
+    for _ in range(50):
+        estimate = kalman(truth + rng.normal(0, sigma, truth.shape)
+                          .astype(np.float32))
+    # static pixels are averaged strongly
+    assert np.std(estimate - truth) < 0.3 * sigma
+    # a step of 20 degC in half the frame, e.g. a moving melt pool
+    truth[:, 40:] += 20
+    for k in range(3):
+        estimate = kalman(truth + rng.normal(0, sigma, truth.shape)
+                          .astype(np.float32))
+    np.testing.assert_allclose(estimate[:, 40:].mean(), 50., atol=3 * sigma)
+    assert np.std(estimate[:, :40] - truth[:, :40]) < 0.3 * sigma
+
+
+def test_kalman_matches_scalar_recursion():
+    rng = np.random.default_rng(1)
+    q, r, gain, sigma2 = 1e-3, 0.04, 1., 9.
+    kalman = KalmanFilter(process_noise=q, measurement_noise=r,
+                          motion_gain=gain, motion_sigma=3.)
+    values = 30 + rng.normal(0, 0.2, 60)
+    values[30:] += 5
+    x, P = values[0], r
+    np.testing.assert_allclose(kalman(np.float32(values[0])), x, rtol=1e-6)
+    for value in values[1:]:
+        innov = value - x
+        P = P + q + gain * max(innov**2 - sigma2 * (P + r), 0.)
+        K = P / (P + r)
+        x = x + K * innov
+        P = (1 - K) * P
+        np.testing.assert_allclose(kalman(np.float32(value)), x, rtol=1e-5)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from senxor.timeseries import TimeSeries
+
+
+def filled_series(n, capacity=64, factor=4, levels=3, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(30, 5, (n, 2)).astype(np.float32)
+    series = TimeSeries(n_vars=2, capacity=capacity, factor=factor,
+                        levels=levels)
+    for i, value in enumerate(values):
+        series.append(float(i), value)
+    return series, values
+
+
+def decimated(values, size, t0=0):
+    """Return the min/max rows of buckets of `size` samples, as TimeSeries.data"""
+    rows = []
+    for start in range(0, len(values), size):
+        if start < t0:
+            continue
+        bucket = values[start: start + size]
+        rows.append(np.append(start, bucket.min(axis=0)))
+        rows.append(np.append(start, bucket.max(axis=0)))
+    return np.array(rows)
+
+
+def test_raw_samples_while_they_fit():
+    series, values = filled_series(50)
+    data = series.data()
+    assert len(series) == 50
+    np.testing.assert_array_equal(data[:, 0], np.arange(50))
+    np.testing.assert_array_equal(data[:, 1:], values)
+    data = series.data(t0=10, t1=19.5)
+    np.testing.assert_array_equal(data[:, 1:], values[10:20])
+
+
+def test_decimated_history_keeps_minima_and_maxima():
+    series, values = filled_series(1000)
+    # the raw ring and the first level have dropped the start, the second
+    # level, of buckets of 16 samples, still holds it
+    data = series.data(max_points=200)
+    np.testing.assert_array_equal(data, decimated(values, 16))
+    assert data[:, 1].min() == values[:, 0].min()
+    assert data[:, 2].max() == values[:, 1].max()
+
+
+def test_decimated_span():
+    series, values = filled_series(1000)
+    data = series.data(max_points=200, t0=900)
+    np.testing.assert_array_equal(data, decimated(values, 4, t0=900))
+    # recent spans come from the raw samples
+    data = series.data(max_points=200, t0=950)
+    np.testing.assert_array_equal(data[:, 1:], values[950:])
+
+
+def test_coarsest_level_when_history_exceeds_all_levels():
+    series, values = filled_series(20008, capacity=16, levels=2)
+    data = series.data(max_points=10)
+    # the last 16 buckets of 16 samples, and the bucket being filled
+    expected = decimated(values, 16)[-2 * 17:]
+    np.testing.assert_array_equal(data, expected)
+
+
+def test_clear():
+    series, _ = filled_series(100)
+    series.clear()
+    assert len(series) == 0
+    assert series.data().shape == (0, 3)
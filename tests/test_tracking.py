@@ -0,0 +1,88 @@
+import numpy as np
+from senxor.tracking import SpotTracker
+
+
+def spot(x, y, area=-20, temperature=40.):
+    return {'centroid': (x, y), 'area': area, 'max': temperature}
+
+
+def test_moving_spots_keep_their_ids():
+    tracker = SpotTracker(max_distance=5)
+    tracker([spot(10, 10), spot(40, 30)])
+    first_ids = tracker.ids
+    for k in range(1, 10):
+        # listed in reverse order, so association is not by position
+        tracker([spot(40 - 2 * k, 30), spot(10 + 2 * k, 10 + k)])
+        assert tracker.ids == first_ids[::-1]
+    track = tracker.tracks[first_ids[0]]
+    assert track.lifetime == 10
+    np.testing.assert_allclose(track.velocity, (2, 1), atol=0.01)
+
+
+def test_new_and_lost_spots():
+    tracker = SpotTracker(max_distance=5, max_misses=2)
+    tracker([spot(10, 10)])
+    (id_a,) = tracker.ids
+    tracker([spot(10, 10), spot(50, 50)])
+    assert tracker.ids[0] == id_a and tracker.ids[1] != id_a
+    for _ in range(3):
+        tracker([spot(50, 50)])
+    assert id_a not in tracker.tracks
+    assert [track.id for track in tracker.retired] == [id_a]
+
+
+def test_gating_by_distance_and_area():
+    tracker = SpotTracker(max_distance=5, max_area_change=1.)
+    tracker([spot(10, 10, area=-20)])
+    (id_a,) = tracker.ids
+    tracker([spot(16, 10, area=-20)])
+    assert tracker.ids[0] != id_a
+    tracker.clear()
+    tracker([spot(10, 10, area=-20)])
+    (id_b,) = tracker.ids
+    tracker([spot(11, 10, area=-60)])
+    assert tracker.ids[0] != id_b
+
+
+def test_retired_tracks_are_bounded():
+    tracker = SpotTracker(max_distance=2, max_misses=0, max_retired=5)
+    for k in range(20):
+        tracker([spot(4 * k, 0)])
+    assert len(tracker.retired) == 5
+    assert len(tracker.tracks) == 1
+
+
+def brute_force_ids(tracker, spots):
+    """Greedy association over all track and spot pairs, by cost"""
+    centroids = np.array([s['centroid'] for s in spots], dtype=float)
+    areas = np.abs([s['area'] for s in spots]).astype(float)
+    pairs = []
+    for it, track in enumerate(tracker.tracks.values()):
+        for isp in range(len(spots)):
+            dist = np.linalg.norm(track.predict(tracker.frame_id + 1) - centroids[isp])
+            darea = abs(track.area - areas[isp]) / max(track.area, 1.)
+            if dist <= tracker.max_distance and darea <= tracker.max_area_change:
+                cost = dist / tracker.max_distance + tracker.area_weight * darea
+                pairs.append((cost, it, isp, track.id))
+    ids = {}
+    matched = set()
+    for cost, it, isp, track_id in sorted(pairs):
+        if isp not in ids and track_id not in matched:
+            ids[isp] = track_id
+            matched.add(track_id)
+    return ids
+
+
+def test_association_matches_brute_force():
+    rng = np.random.default_rng(0)
+    tracker = SpotTracker(max_distance=6)
+    positions = rng.uniform(0, 80, (30, 2))
+    for _ in range(50):
+        positions += rng.normal(0, 1.5, positions.shape)
+        keep = rng.random(len(positions)) > 0.05
+        spots = [spot(x, y, area=-rng.integers(5, 30)) for x, y in positions[keep]]
+        expected = brute_force_ids(tracker, spots)
+        tracker(spots)
+        for isp, track_id in expected.items():
+            assert tracker.ids[isp] == track_id
+        assert len(set(tracker.ids)) == len(spots)